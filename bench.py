@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+CPython Benchmark Harness for Windcave Terminal POS
+
+Benchmarks the LVGL-free terminal modules (catalog, cart, search, ...)
+under CPython with synthetic catalogs. Absolute numbers are lower than
+on the terminal's MicroPython, but relative changes carry over.
+
+Usage:
+    python3 bench.py            # run all benchmarks
+    python3 bench.py search     # run selected benchmarks
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "terminal"))
+
+BENCHMARKS = {}
+
+
+def benchmark(fn):
+    """Register a benchmark under its function name"""
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+WORDS = [
+    "flat", "white", "long", "black", "latte", "mocha", "chai", "green", "tea",
+    "cotton", "shirt", "denim", "jacket", "wool", "sock", "leather", "belt",
+    "canvas", "tote", "bag", "runner", "shoe", "sandal", "boot", "classic",
+    "slim", "relaxed", "organic", "linen", "cap", "beanie", "scarf", "glove",
+    "navy", "red", "grey", "olive", "kids", "mens", "womens", "sport", "trail"
+]
+
+
+def synthetic_catalog(count, categories=12, seed=1):
+    """Retail-style catalog: (products, categories) payload dicts"""
+    rng = random.Random(seed)
+    cats = [{"id": f"cat-{c}", "name": f"Category {c}", "icon": "📦", "color": "#4169E1"}
+            for c in range(categories)]
+    products = []
+    for i in range(count):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))).title()
+        products.append({
+            "id": f"p{i}",
+            "name": name,
+            "sku": f"{rng.randint(0, 99999999):08d}",
+            "price": rng.randint(100, 20000) / 100,
+            "category_id": f"cat-{i % categories}",
+            "color": f"#{rng.randint(0, 0xFFFFFF):06X}"
+        })
+    return products, cats
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label, samples_ms):
+    """Print mean/p50/p95/max for a list of millisecond samples"""
+    mean = sum(samples_ms) / len(samples_ms)
+    print(f"  {label:<34} n={len(samples_ms):<6} mean={mean:7.3f}ms "
+          f"p50={percentile(samples_ms, 50):7.3f}ms p95={percentile(samples_ms, 95):7.3f}ms "
+          f"max={max(samples_ms):7.3f}ms")
+
+
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+@benchmark
+def search():
+    """Index build time and per-keystroke latency of search-as-you-type"""
+    from records import product_from_json
+    from search import SearchIndex, SearchSession
+
+    queries = ["white", "cotton shirt", "slim denim jacket", "0042", "trail runner navy", "beanie"]
+
+    for count in (1000, 5000, 10000):
+        products, _ = synthetic_catalog(count)
+        products = [product_from_json(p) for p in products]
+        build_ms, index = timed_ms(SearchIndex, products)
+        print(f"{count} products: index build {build_ms:.1f}ms, {len(index.prefixes)} prefixes")
+
+        keystrokes = []
+        for query in queries:
+            session = SearchSession(index, limit=48)
+            for n in range(1, len(query) + 1):
+                ms, _ = timed_ms(session.update, query[:n])
+                keystrokes.append(ms)
+            # Backspace back to the first character
+            for n in range(len(query) - 1, 0, -1):
+                ms, _ = timed_ms(session.update, query[:n])
+                keystrokes.append(ms)
+        report("keystroke", keystrokes)
+
+
+@benchmark
+def scan():
+    """Barcode index build and lookup + cart mutation per scan"""
+    from catalog import Catalog
+    from cart import Cart
+
+    products, cats = synthetic_catalog(10000)
+    build_ms, catalog = timed_ms(Catalog.from_json, products, cats)
+    print(f"10000 products: catalog build {build_ms:.1f}ms, {len(catalog.barcodes)} codes")
+
+    rng = random.Random(2)
+    codes = [p['sku'] for p in products]
+    for burst in (1, 10, 100):
+        samples = []
+        for _ in range(50):
+            cart = Cart()
+            start = time.perf_counter()
+            for _ in range(burst):
+                product = catalog.barcodes.get(rng.choice(codes))
+                cart.add(product)
+                # Latency of each scan includes the burst queued ahead of it
+                samples.append((time.perf_counter() - start) * 1000)
+        report(f"scan-to-cart, burst of {burst}", samples)
+
+
+@benchmark
+def records():
+    """Heap per record and hot-loop time, JSON dicts vs record types"""
+    import tracemalloc
+    from records import CartLine, product_from_json
+
+    count = 5000
+    payload, _ = synthetic_catalog(count)
+
+    def heap_per_item(build):
+        # Build from fresh copies so shared payload strings are not counted twice
+        data = [dict(p) for p in payload]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        items = build(data)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return used / count, items
+
+    dict_bytes, dicts = heap_per_item(lambda data: [dict(p, color=p['color'], modifiers=None)
+                                                    for p in data])
+    rec_bytes, recs = heap_per_item(lambda data: [product_from_json(p) for p in data])
+    print(f"{count} products: dict {dict_bytes:.0f} B/item, record {rec_bytes:.0f} B/item")
+
+    line_dict = {"id": "p1", "key": ("p1", 0), "name": "Flat White", "price": 5.5,
+                 "mods": "", "qty": 1, "version": 0}
+    line_rec = CartLine("p1", ("p1", 0), "Flat White", 5.5)
+    print(f"cart line: dict {sys.getsizeof(line_dict)} B, CartLine {sys.getsizeof(line_rec)} B "
+          f"(shallow)")
+
+    lines_d = [dict(line_dict, qty=i % 5 + 1) for i in range(50)]
+    lines_r = [CartLine("p1", ("p1", i), "Flat White", 5.5, "", i % 5 + 1) for i in range(50)]
+
+    loops = [
+        ("subtotal, 50 lines",
+         lambda: sum(l['price'] * l['qty'] for l in lines_d),
+         lambda: sum(l.price * l.qty for l in lines_r)),
+        ("category filter, 5000",
+         lambda: [p for p in dicts if p['category_id'] == "cat-3"],
+         lambda: [p for p in recs if p.category_id == "cat-3"]),
+        ("id map, 5000",
+         lambda: {p['id']: p for p in dicts},
+         lambda: {p.id: p for p in recs}),
+    ]
+    for label, with_dicts, with_records in loops:
+        for kind, fn in (("dict", with_dicts), ("record", with_records)):
+            samples = [timed_ms(fn)[0] for _ in range(200)]
+            report(f"{label} ({kind})", samples)
+
+
+@benchmark
+def journal():
+    """Cart journal bytes per tap, compaction and recovery time for long orders"""
+    import shutil
+    import tempfile
+    from cart import Cart
+    from journal import CartJournal
+    from records import product_from_json
+
+    products, _ = synthetic_catalog(1000)
+    products = [product_from_json(p) for p in products]
+    directory = tempfile.mkdtemp()
+    try:
+        for taps in (20, 200, 2000):
+            rng = random.Random(taps)
+            # A long order mostly repeats items; every 10th tap removes one
+            picks = products[:max(5, taps // 10)]
+            cart = Cart()
+            journal = CartJournal(directory, compact_records=10 ** 9)
+            journal.restore(cart)
+            written = journal.bytes_written
+            tap_ms = []
+            for i in range(taps):
+                if i % 10 == 9 and cart.lines:
+                    line = rng.choice(cart.lines)
+                    ms, _ = timed_ms(lambda: (cart.remove_one(line.key),
+                                              journal.removed(line)))
+                else:
+                    product = rng.choice(picks)
+                    ms, _ = timed_ms(lambda: journal.added(*cart.add(product)))
+                tap_ms.append(ms)
+            per_tap = (journal.bytes_written - written) / taps
+            print(f"{taps} taps, {len(cart.lines)} lines: {per_tap:.1f} B/tap")
+            report("tap + journal append", tap_ms)
+
+            # Crash: a fresh cart rebuilt from a copy of the log (restore()
+            # compacts, so every round starts from the same files)
+            expected = [(l.key, l.qty) for l in cart.lines]
+            replay_ms = []
+            for _ in range(5):
+                crashed = directory + "-crash"
+                shutil.copytree(directory, crashed)
+                restored = Cart()
+                ms, _ = timed_ms(CartJournal(crashed).restore, restored)
+                shutil.rmtree(crashed)
+                assert [(l.key, l.qty) for l in restored.lines] == expected
+                replay_ms.append(ms)
+            report("recover from log", replay_ms)
+
+            compact_ms, _ = timed_ms(journal.compact, cart)
+            snap_ms, _ = timed_ms(CartJournal(directory).restore, Cart())
+            print(f"  compaction {compact_ms:.2f}ms, recover from snapshot {snap_ms:.2f}ms")
+    finally:
+        shutil.rmtree(directory)
+
+
+@benchmark
+def tabs():
+    """Heap per open tab and switch time, Cart objects vs packed tabs"""
+    import tracemalloc
+    from catalog import Catalog
+    from cart import Cart
+    from tabs import TabStore
+
+    products, cats = synthetic_catalog(1000)
+    catalog = Catalog.from_json(products, cats)
+    count = 40
+
+    for lines in (5, 15, 40):
+        rng = random.Random(lines)
+        orders = [[(p, rng.randint(1, 3)) for p in rng.sample(catalog.products, lines)]
+                  for _ in range(count)]
+
+        def fill(cart, order):
+            for product, qty in order:
+                for _ in range(qty):
+                    cart.add(product, version=catalog.version)
+            return cart
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        carts = [fill(Cart(), order) for order in orders]
+        cart_bytes = (tracemalloc.get_traced_memory()[0] - before) / count
+
+        store = TabStore()
+        before = tracemalloc.get_traced_memory()[0]
+        for cart in carts:
+            store.park(cart)
+        tab_bytes = (tracemalloc.get_traced_memory()[0] - before) / count
+        tracemalloc.stop()
+        print(f"{count} tabs of {lines} lines: Cart {cart_bytes:.0f} B/tab, "
+              f"packed {tab_bytes:.0f} B/tab ({store.memory() // count} B of line data)")
+
+        # Switch: park the current order, open another tab in its place
+        current = fill(Cart(), orders[0])
+        samples = []
+        for i in range(200):
+            tab = store.tabs[i % len(store.tabs)]
+            start = time.perf_counter()
+            store.park(current)
+            current.clear()
+            store.open(tab, current, catalog)
+            samples.append((time.perf_counter() - start) * 1000)
+        report("switch tab", samples)
+
+
+@benchmark
+def sales():
+    """Shift report from running totals vs replaying every transaction"""
+    import shutil
+    import tempfile
+    from catalog import Catalog
+    from records import CartLine, cents
+    from sales import SalesTotals
+
+    products, cats = synthetic_catalog(1000)
+    catalog = Catalog.from_json(products, cats)
+    rng = random.Random(4)
+
+    def replay(transactions):
+        # What a report costs without running totals
+        by_product = {}
+        for lines in transactions:
+            for line in lines:
+                entry = by_product.setdefault(line.id, [0, 0])
+                entry[0] += line.qty
+                entry[1] += cents(line.price) * line.qty
+        return by_product
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "sales.json")
+    totals = SalesTotals(path, compact_every=10 ** 9)
+    transactions = []
+    record_ms = []
+    for count in (100, 1000, 10000):
+        while len(transactions) < count:
+            lines = [CartLine(p.id, (p.id, 0), p.name, p.price, "", rng.randint(1, 3))
+                     for p in rng.sample(catalog.products, rng.randint(1, 8))]
+            transactions.append(lines)
+            tax = int(round(sum(cents(line.price) * line.qty for line in lines) * 0.15))
+            ms, _ = timed_ms(totals.record, lines, catalog, tax, "card", len(transactions) % 24)
+            record_ms.append(ms)
+
+        report_ms = [timed_ms(totals.report, catalog)[0] for _ in range(20)]
+        replay_ms = [timed_ms(replay, transactions)[0] for _ in range(5)]
+        print(f"{count} sales, {len(totals.products)} products sold: "
+              f"{os.path.getsize(path + '.log') // count} B logged per sale, "
+              f"snapshot {len(json.dumps(totals.to_json()))} B")
+        report("report from totals", report_ms)
+        report("replay transactions", replay_ms)
+    report("record + log one sale", record_ms)
+
+    compact_ms, _ = timed_ms(totals.compact)
+    load_ms, loaded = timed_ms(SalesTotals, path)
+    assert loaded.gross == totals.gross
+    print(f"  compaction {compact_ms:.2f}ms, load {load_ms:.2f}ms")
+    shutil.rmtree(directory)
+
+
+@benchmark
+def favorites():
+    """Decayed favorites: per-sale cost and idle re-rank vs catalog size"""
+    from catalog import Catalog
+    from favorites import Favorites
+
+    rng = random.Random(5)
+    for count in (100, 1000, 5000):
+        products, cats = synthetic_catalog(count)
+        catalog = Catalog.from_json(products, cats)
+        ids = [p.id for p in catalog.products]
+        favs = Favorites()
+        now = 0
+        record_ms = []
+        for _ in range(5000):
+            # About 300 sales a day over ~17 days: several half-lives
+            now += 300
+            items = [(pid, rng.randint(1, 3)) for pid in rng.sample(ids, rng.randint(1, 6))]
+            ms, _ = timed_ms(favs.record, items, now // 3600 % 24, now)
+            record_ms.append(ms)
+        rerank_ms = [timed_ms(favs.rerank, catalog, hour)[0] for hour in range(24)]
+        scored = sum(len(scores) for scores in favs.scores)
+        print(f"{count} products, {scored} scores kept:")
+        report("record one sale", record_ms)
+        report("re-rank (idle)", rerank_ms)
+
+    # Decay: what sold last week outranks a bigger seller from a month ago
+    favs = Favorites(size=2)
+    day = 86400
+    favs.record([("old", 40)], hour=12, now=0)
+    favs.record([("new", 12)], hour=12, now=28 * day)
+    favs.record([("x", 1)], hour=12, now=30 * day)
+    catalog = Catalog.from_json([{"id": pid, "name": pid, "price": 1, "category_id": "c"}
+                                 for pid in ("old", "new", "x")], [])
+    favs.rerank(catalog, 12)
+    assert favs.ranked[0] == "new", favs.ranked
+    print(f"  after 30 days: {favs.ranked}")
+
+
+def synthetic_rules(catalog, count, seed=6):
+    """`count` pricing rules for `catalog`: unit discounts (some timed) and bundles"""
+    rng = random.Random(seed)
+    ids = [p.id for p in catalog.products]
+    cat_ids = [c.id for c in catalog.categories]
+    rules = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            rule = {"type": "bundle", "price": rng.randint(500, 3000) / 100,
+                    "items": [{"products": rng.sample(ids, rng.randint(1, 4)),
+                               "qty": rng.randint(1, 2)} for _ in range(rng.randint(2, 3))]}
+        elif roll < 0.4:
+            rule = {"type": "percent", "value": rng.choice((10, 15, 20)),
+                    "categories": [rng.choice(cat_ids)]}
+        else:
+            rule = {"type": rng.choice(("percent", "amount")), "value": rng.randint(1, 5) * 5 / 10,
+                    "products": rng.sample(ids, rng.randint(1, 5))}
+        if rng.random() < 0.2:
+            start = rng.randint(6, 20)
+            rule.update({"days": rng.sample(range(7), rng.randint(1, 7)),
+                         "from": f"{start:02d}:00", "to": f"{start + 2:02d}:30"})
+        rule["id"] = f"r{i}"
+        rules.append(rule)
+    return {"tax": {"default": 0.15, "categories": {cat_ids[0]: 0.0, cat_ids[1]: 0.09}},
+            "rules": rules}
+
+
+@benchmark
+def pricing():
+    """Pricing rules: compile per sync, incremental line changes vs whole-cart repricing"""
+    from catalog import Catalog
+    from cart import Cart
+    from pricing import PricingRules
+
+    products, cats = synthetic_catalog(2000)
+    catalog = Catalog.from_json(products, cats)
+    rng = random.Random(7)
+    now = time.time()
+    for rule_count in (100, 500):
+        payload = synthetic_rules(catalog, rule_count)
+        compile_ms = [timed_ms(PricingRules, payload, catalog, 0.15)[0] for _ in range(5)]
+        rules = PricingRules(payload, catalog, 0.15)
+        print(f"{rule_count} rules: {len(rules.units)} products discounted, "
+              f"{len(rules.bundles)} bundles in {len(rules.groups)} groups, "
+              f"{len(rules.edges)} window edges")
+        report("compile (per sync)", compile_ms)
+
+        # Carts drawn mostly from rule products, so bundles do fill
+        hot = list(rules.group_of) + list(rules.units)
+        for size in (10, 100, 500):
+            cart = Cart(rules)
+            add_ms = []
+            reprice_ms = []
+            while cart.count() < size:
+                pool = hot if rng.random() < 0.7 else catalog.products
+                product = rng.choice(pool)
+                if isinstance(product, str):
+                    product = catalog.by_id[product]
+                ms, _ = timed_ms(cart.add, product)
+                add_ms.append(ms)
+                # What a tap costs when every rule is evaluated over the whole cart
+                if cart.count() % max(1, size // 20) == 0:
+                    reprice_ms.append(timed_ms(cart.totals.reprice, cart.lines, None, now)[0])
+
+            totals = cart.totals
+            expected = (totals.subtotal, totals.discount, totals.tax)
+            remove_ms = []
+            for line in rng.sample(cart.lines, min(20, len(cart.lines))):
+                ms, _ = timed_ms(cart.remove_one, line.key)
+                remove_ms.append(ms)
+                cart.add(catalog.by_id[line.id])
+            cart.totals.reprice(cart.lines, now=now)
+            assert (totals.subtotal, totals.discount, totals.tax) == expected, \
+                ((totals.subtotal, totals.discount, totals.tax), expected)
+            print(f"  cart of {size} units, {len(cart.lines)} lines: "
+                  f"${totals.subtotal / 100:.2f} - ${totals.discount / 100:.2f} discount "
+                  f"+ ${totals.tax / 100:.2f} tax, bundles {sum(n for _, n in totals.applied())}")
+            report("  add one unit (incremental)", add_ms)
+            report("  remove one unit (incremental)", remove_ms)
+            report("  reprice whole cart", reprice_ms)
+
+    # Happy hour: the discount follows the clock, checked once a window edge passes
+    monday = time.mktime((2024, 1, 1, 14, 59, 0, 0, 0, -1))
+    catalog = Catalog.from_json(
+        [{"id": "beer", "name": "Beer", "price": 10, "category_id": "bar"}],
+        [{"id": "bar", "name": "Bar"}], 1,
+        rules={"rules": [{"id": "hh", "type": "percent", "value": 20, "categories": ["bar"],
+                          "days": [0], "from": "15:00", "to": "17:00"}]},
+        tax_rate=0.15)
+    cart = Cart(catalog.pricing)
+    cart.totals.reprice([], now=monday)
+    cart.add(catalog.by_id["beer"])
+    assert cart.totals.discount == 0
+    assert not cart.totals.tick(cart.lines, monday + 30)
+    assert cart.totals.tick(cart.lines, monday + 60) and cart.totals.discount == 200
+    assert cart.totals.tick(cart.lines, monday + 2 * 3600 + 60) and cart.totals.discount == 0
+    print("  happy hour 15:00-17:00 applied and lifted on the minute")
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            return 1
+
+    for name in names:
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
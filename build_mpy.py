@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Bytecode Builder for Windcave Terminal POS
+
+Cross-compiles terminal/ to .mpy so MicroPython loads bytecode on boot
+instead of compiling ~4000 lines of source into the heap before the
+first frame. Optionally writes a manifest for freezing the same
+modules into firmware (no filesystem import at all).
+
+Requires mpy-cross matching the firmware's MicroPython version (1.24:
+.mpy v6). It is looked up as --mpy-cross, $MPY_CROSS, the one built in
+lv_micropython, then `mpy-cross` on PATH (pip install "mpy-cross==1.24.*").
+
+Usage:
+    ./build_mpy.py [OUT_DIR] [--manifest] [--source MODULE ...]
+
+    OUT_DIR (default build/terminal) receives one .mpy per module, the
+    modules kept as source (config.py by default, so it stays editable
+    on the device) and a two-line main.py that runs the compiled app
+    (pos_main.mpy - MicroPython only auto-runs main.py as source).
+    Upload OUT_DIR instead of terminal/.
+
+    --manifest also writes OUT_DIR/../manifest.py for building firmware
+    with FROZEN_MANIFEST=...; the device then needs only main.py and
+    config.py on its filesystem.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+TERMINAL_DIR = os.path.join(PROJECT_DIR, "terminal")
+DEFAULT_OUT = os.path.join(PROJECT_DIR, "build", "terminal")
+LV_MPY_CROSS = os.path.expanduser("~/Desktop/lv_micropython/mpy-cross/build/mpy-cross")
+
+# main.py is compiled under this name and started by the generated main.py
+ENTRY_MODULE = "pos_main"
+
+MAIN_STUB = f"""# Generated by build_mpy.py - the app is precompiled in {ENTRY_MODULE}.mpy
+import {ENTRY_MODULE}
+{ENTRY_MODULE}.main()
+"""
+
+
+def find_mpy_cross(path=None):
+    for candidate in (path, os.environ.get("MPY_CROSS"), LV_MPY_CROSS):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return shutil.which("mpy-cross")
+
+
+def build(out_dir, mpy_cross, keep_source=("config",), manifest=False):
+    """Compile terminal/ into out_dir; returns (source bytes, output bytes)"""
+    os.makedirs(out_dir, exist_ok=True)
+    src_total = out_total = 0
+    frozen = []
+
+    for filename in sorted(os.listdir(TERMINAL_DIR)):
+        name, ext = os.path.splitext(filename)
+        if ext != ".py":
+            continue
+        src = os.path.join(TERMINAL_DIR, filename)
+        src_total += os.path.getsize(src)
+
+        if name in keep_source:
+            dst = os.path.join(out_dir, filename)
+            shutil.copyfile(src, dst)
+        else:
+            module = ENTRY_MODULE if name == "main" else name
+            dst = os.path.join(out_dir, module + ".mpy")
+            # -s keeps tracebacks pointing at the real file name
+            subprocess.run([mpy_cross, "-o", dst, "-s", filename, src], check=True)
+            frozen.append((module, src))
+        out_total += os.path.getsize(dst)
+
+    with open(os.path.join(out_dir, "main.py"), "w") as f:
+        f.write(MAIN_STUB)
+    out_total += len(MAIN_STUB)
+
+    if manifest:
+        write_manifest(os.path.dirname(out_dir), frozen)
+    return src_total, out_total
+
+
+def write_manifest(build_dir, modules):
+    """Firmware manifest freezing `modules` ((name, source path) pairs)"""
+    # Frozen modules are named after their file, so main.py is staged
+    # under the entry name
+    stage = os.path.join(build_dir, "frozen")
+    os.makedirs(stage, exist_ok=True)
+    lines = [
+        "# Generated by build_mpy.py - build firmware with FROZEN_MANIFEST=<this file>",
+        'include("$(PORT_DIR)/boards/manifest.py")',
+    ]
+    for module, src in modules:
+        shutil.copyfile(src, os.path.join(stage, module + ".py"))
+        lines.append(f'module("{module}.py", base_path="{stage}")')
+
+    path = os.path.join(build_dir, "manifest.py")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"Manifest: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("out_dir", nargs="?", default=DEFAULT_OUT)
+    parser.add_argument("--mpy-cross", help="Path to mpy-cross")
+    parser.add_argument("--source", nargs="*", default=["config"],
+                        help="Modules to deploy as source (default: config)")
+    parser.add_argument("--manifest", action="store_true",
+                        help="Also write a frozen-module manifest")
+    args = parser.parse_args()
+
+    mpy_cross = find_mpy_cross(args.mpy_cross)
+    if not mpy_cross:
+        print("Error: mpy-cross not found (build lv_micropython, set MPY_CROSS "
+              "or pip install 'mpy-cross==1.24.*')")
+        return 1
+
+    src_total, out_total = build(args.out_dir, mpy_cross, args.source, args.manifest)
+    print(f"{src_total} bytes of source -> {out_total} bytes in {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Product Thumbnail Builder for Windcave Terminal POS
+
+Pre-scales product images to the grid tile sizes and writes them in
+LVGL 9's native binary image format (RGB565), so the terminal never
+decodes PNG/JPEG. Files are content-addressed (<sha1>.bin) and a
+manifest maps product ids to their thumbnail hashes per tile size.
+
+Requires Pillow (pip install pillow).
+
+Usage:
+    ./build_thumbnails.py IMAGE_DIR OUT_DIR
+
+    IMAGE_DIR contains one image per product, named by product id
+    (e.g. p1.png, p7.jpg). OUT_DIR receives <sha1>.bin files plus
+    manifest.json:
+
+        {"p1": {"95": "3f2a...", "115": "9bc1..."}, ...}
+
+    Merge each entry into the product's "thumb" field in the sync
+    payload and serve OUT_DIR at /api/thumbs/.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Tile sizes: 3.5" grid (95px) and 8" grid (115px)
+TILE_SIZES = (95, 115)
+
+# LVGL 9 image header
+LV_IMAGE_HEADER_MAGIC = 0x19
+LV_COLOR_FORMAT_RGB565 = 0x12
+
+# Tiles are drawn over the dark theme background
+BACKGROUND = (0x1A, 0x1A, 0x2E)
+
+
+def to_lvgl_bin(img, size):
+    """Center-crop and scale to size x size, return LVGL binary image bytes"""
+    img = img.convert("RGBA")
+    w, h = img.size
+    side = min(w, h)
+    img = img.crop(((w - side) // 2, (h - side) // 2, (w + side) // 2, (h + side) // 2))
+    img = img.resize((size, size), Image.LANCZOS)
+
+    # Flatten transparency onto the background - RGB565 has no alpha
+    flat = Image.new("RGB", img.size, BACKGROUND)
+    flat.paste(img, mask=img.split()[3])
+
+    pixels = bytearray()
+    for r, g, b in flat.getdata():
+        v = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+        pixels += struct.pack("<H", v)
+
+    stride = size * 2
+    header = struct.pack("<BBHHHHH", LV_IMAGE_HEADER_MAGIC, LV_COLOR_FORMAT_RGB565,
+                         0, size, size, stride, 0)
+    return header + bytes(pixels)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 1
+    if Image is None:
+        print("Error: Pillow is required (pip install pillow)")
+        return 1
+
+    image_dir, out_dir = sys.argv[1], sys.argv[2]
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = {}
+    written = 0
+    for filename in sorted(os.listdir(image_dir)):
+        product_id, ext = os.path.splitext(filename)
+        if ext.lower() not in (".png", ".jpg", ".jpeg", ".webp", ".bmp"):
+            continue
+
+        with Image.open(os.path.join(image_dir, filename)) as img:
+            entry = {}
+            for size in TILE_SIZES:
+                data = to_lvgl_bin(img, size)
+                digest = hashlib.sha1(data).hexdigest()
+                path = os.path.join(out_dir, f"{digest}.bin")
+                if not os.path.exists(path):
+                    with open(path, "wb") as f:
+                        f.write(data)
+                    written += 1
+                entry[str(size)] = digest
+            manifest[product_id] = entry
+
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"{len(manifest)} products, {written} new thumbnails in {out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Boot cost of the terminal modules: import time and heap
+
+Usage (inside lv_micropython, normally via run_headless.py --boot):
+    micropython headless/boot.py DIR
+
+DIR is terminal/ (source) or a build_mpy.py output (bytecode). Modules
+are imported in dependency order with the GC disabled, so the heap
+growth of each import includes the compiler's garbage - the peak a
+device has to survive on boot. A collection afterwards gives what
+stays resident.
+"""
+
+import gc
+import json
+import sys
+import time
+
+
+MODULES = ["config", "fonts", "records", "search", "pricing", "catalog", "cart", "journal",
+           "tabs", "sales", "favorites", "inputlog", "render", "scanner", "thumbs", "memory", "telemetry", "push",
+           "payment", "pos_ui"]
+
+
+def emit(event, **fields):
+    fields["event"] = event
+    print("@@" + json.dumps(fields))
+
+
+def run(path):
+    sys.path.insert(0, path)
+    # Compiled builds start the app from pos_main (see build_mpy.py)
+    try:
+        open(path + "/pos_main.mpy").close()
+        entry = "pos_main"
+    except OSError:
+        entry = "main"
+
+    # LVGL itself is firmware either way - keep it out of the numbers
+    import lvgl  # noqa: F401
+
+    gc.collect()
+    gc.disable()
+    base = gc.mem_alloc()
+    start = time.ticks_us()
+    for name in MODULES + [entry]:
+        before = gc.mem_alloc()
+        t = time.ticks_us()
+        __import__(name)
+        emit("module", module=name, import_us=time.ticks_diff(time.ticks_us(), t),
+             alloc=gc.mem_alloc() - before)
+    total_us = time.ticks_diff(time.ticks_us(), start)
+    peak = gc.mem_alloc() - base
+    gc.enable()
+    gc.collect()
+    emit("boot", entry=entry, import_us=total_us, peak_alloc=peak,
+         resident=gc.mem_alloc() - base)
+
+
+if __name__ == "__main__":
+    run(sys.argv[1])
@@ -0,0 +1,110 @@
+"""
+Headless LVGL Harness for Windcave Terminal POS
+
+Runs inside lv_micropython (unix port). Replaces the SDL window used by
+run_lvgl.py with an in-memory framebuffer display so scenes can be
+rendered, timed and captured without a window.
+
+Results are printed as single-line JSON records prefixed with "@@" so
+the host-side runner (run_headless.py) can pick them out of the normal
+[POS] log output.
+"""
+
+import sys
+import time
+import json
+
+import lvgl as lv
+
+# Terminal code lives next to this folder
+HEADLESS_DIR = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+TERMINAL_DIR = HEADLESS_DIR + "/../terminal"
+
+
+class Harness:
+    """In-memory RGB565 display plus helpers to drive the UI"""
+
+    def __init__(self, width, height, out_dir=None):
+        self.width = width
+        self.height = height
+        self.out_dir = out_dir
+        self.flushes = 0
+
+        lv.init()
+
+        # Full-screen buffer in DIRECT mode: the buffer *is* the framebuffer,
+        # so after a refresh it always holds the complete screen.
+        self.fb = bytearray(width * height * 2)
+        self.display = lv.display_create(width, height)
+        self.display.set_color_format(lv.COLOR_FORMAT.RGB565)
+        self.display.set_buffers(self.fb, None, len(self.fb), lv.DISPLAY_RENDER_MODE.DIRECT)
+        self.display.set_flush_cb(self._flush)
+
+    def _flush(self, disp, area, px_map):
+        self.flushes += 1
+        disp.flush_ready()
+
+    def load_app(self):
+        """Import the terminal app configured for this screen size.
+
+        Must be called once per process - config values are copied into
+        main.py at import time.
+        """
+        if TERMINAL_DIR not in sys.path:
+            sys.path.insert(0, TERMINAL_DIR)
+
+        import config
+        config.SCREEN_WIDTH = self.width
+        config.SCREEN_HEIGHT = self.height
+        # Never hit the network from the harness - always use demo data
+        config.BACKEND_URL = ""
+        # Scans are injected by benchmarks, not read from stdin
+        config.SCANNER = None
+        # Every run starts from an empty cart, shift and favorites
+        config.CART_JOURNAL_DIR = None
+        config.SALES_FILE = None
+        config.FAVORITES_FILE = None
+
+        import main
+        return main
+
+    def new_app(self, main, previous=None):
+        """Create a fresh POSApp, discarding the previous one's screen"""
+        app = main.POSApp()
+        if previous is not None:
+            previous.screen.delete()
+        return app
+
+    def click(self, obj):
+        """Deliver a CLICKED event as if the widget was tapped"""
+        obj.send_event(lv.EVENT.CLICKED, None)
+
+    def advance(self, ms, step=5):
+        """Advance LVGL time by `ms`, running timers and animations"""
+        elapsed = 0
+        while elapsed < ms:
+            lv.tick_inc(step)
+            lv.task_handler()
+            elapsed += step
+
+    def render(self):
+        """Force a full-screen redraw and return its duration in us"""
+        lv.screen_active().invalidate()
+        start = time.ticks_us()
+        lv.refr_now(self.display)
+        return time.ticks_diff(time.ticks_us(), start)
+
+    def capture(self, name):
+        """Render the current screen and write the raw frame to out_dir"""
+        render_us = self.render()
+        path = f"{self.out_dir}/{name}.rgb565"
+        with open(path, "wb") as f:
+            f.write(self.fb)
+        self.emit("frame", scene=name, file=path, render_us=render_us)
+        return render_us
+
+    def emit(self, event, **fields):
+        fields["event"] = event
+        fields["width"] = self.width
+        fields["height"] = self.height
+        print("@@" + json.dumps(fields))
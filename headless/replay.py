@@ -0,0 +1,247 @@
+"""
+Replay a terminal's input log in the headless harness
+
+Usage (inside lv_micropython, normally via run_headless.py --replay):
+    micropython headless/replay.py WIDTH HEIGHT TRACE [CATALOG]
+
+TRACE is a dump of the terminal's input log (app.dump_inputs(): the
+INPUT_LOG_FILE on the terminal, or what the backend received on
+/api/inputlog). CATALOG is the store's catalog in the /api/sync format;
+the trace names products by id, so without it only events for the demo
+catalog's products replay.
+
+Each event goes to the same POSApp handler (or widget) it was recorded
+at, after the recorded gap since the previous one, during which the
+main loop's per-cycle work runs (capped at MAX_GAP_MS). Payments use the
+simulated provider with the recorded duration and outcome. Each event is
+timed to its rendered frame and the heap it allocated is counted.
+
+Emits per-kind timings, the slowest events, and each slow frame the
+terminal recorded next to what the replay measured for the event
+before it.
+"""
+
+import gc
+import json
+import sys
+import time
+
+import lvgl as lv
+
+from harness import Harness
+
+MAX_GAP_MS = 2000   # longer pauses are cut short
+STEP_MS = 5
+SLOWEST = 10
+
+
+class Replay:
+    """Feeds trace events to a POSApp and times them"""
+
+    def __init__(self, h, app):
+        self.h = h
+        self.app = app
+        self.skipped = 0
+        self.payment_mismatches = 0
+
+    def idle(self, ms):
+        """What the main loop does between inputs, for `ms`"""
+        app = self.app
+        elapsed = 0
+        while elapsed < ms:
+            lv.tick_inc(STEP_MS)
+            lv.task_handler()
+            if app.payment_session:
+                app.payment_session.poll()
+            app.render.flush()
+            elapsed += STEP_MS
+        app.memory.idle()
+        app._update_favorites()
+
+    def feed(self, i, events):
+        """Replay events[i]; False if it can't apply to this app state"""
+        _, kind, arg, num = events[i]
+        app = self.app
+        h = self.h
+        modal = app.modifier_modal
+        if kind != "modifiers" and modal.product is not None:
+            # Picker dismissed without adding
+            modal.close()
+        if app.settings_screen.is_open():
+            app.settings_screen.close()
+
+        if kind == "product":
+            product = app.catalog.by_id.get(arg)
+            if product is None:
+                return False
+            app._on_product_select(product)
+        elif kind == "modifiers":
+            product = app.catalog.by_id.get(arg)
+            if product is None:
+                return False
+            if modal.product is product:
+                modal.mask = num
+                h.click(modal.add_btn)
+            else:
+                app._on_modifiers_confirm(product, num)
+        elif kind == "scan":
+            app._on_scan(arg, time.ticks_us())
+        elif kind == "remove":
+            for line in app.cart.lines:
+                if line.id == arg and line.key[1] == num:
+                    app._on_cart_item_click(line)
+                    break
+            else:
+                return False
+        elif kind == "category":
+            key = tuple(arg) if isinstance(arg, list) else arg
+            for btn, cat_id in app.category_bar.buttons:
+                if cat_id == key:
+                    h.click(btn)
+                    break
+            else:
+                return False
+        elif kind == "search":
+            h.click(app.header.search_btn)
+        elif kind == "query":
+            if not app.search_panel.is_open():
+                return False
+            app.search_panel.field.set_text(arg)
+        elif kind == "search_close":
+            # Also recorded after "search" closed the panel
+            if app.search_panel.is_open():
+                app.search_panel.close()
+        elif kind == "pay":
+            if not app.cart or app.payment_session:
+                return False
+            app.payment_provider = self._provider(events, i)
+            h.click(app.cart_panel.pay_btn)
+        elif kind == "pay_cancel":
+            if not app.payment_screen:
+                return False
+            h.click(app.payment_screen.cancel_btn)
+        elif kind == "paid":
+            # Outcome of the payment: already set up by "pay"; check it
+            if app.payment_session is not None:
+                self.payment_mismatches += 1
+            return True
+        elif kind == "tab_new":
+            app._on_tab_new()
+        elif kind == "tab_select":
+            # Tab ids are per terminal; names match once the tab was parked here
+            for tab in app.tabs:
+                if tab.name == arg:
+                    app._on_tab_select(tab)
+                    break
+            else:
+                return False
+        elif kind == "settings":
+            app._on_settings()
+        elif kind == "sync":
+            if num < 0:
+                return True
+            # No backend here: swap in the same catalog as a new version,
+            # which takes the app's whole post-sync path
+            from catalog import Catalog
+            catalog = app.catalog
+            app._swap_catalog(Catalog(catalog.products, catalog.categories, catalog.version + 1,
+                                      catalog.rules, catalog.tax_rate))
+        else:
+            # slow_frame: a measurement, not an input
+            return True
+        return True
+
+    @staticmethod
+    def _provider(events, i):
+        """Simulated provider reproducing the recorded outcome of the payment at events[i]"""
+        from payment import SimulatedProvider, DECLINED
+
+        for _, kind, arg, num in events[i + 1:]:
+            if kind == "paid":
+                auth_ms = min(num, 800)
+                return SimulatedProvider(num - auth_ms, auth_ms,
+                                         decline_every=1 if arg == DECLINED else 0,
+                                         clock=lv.tick_get)
+            if kind == "pay":
+                break
+        # Outcome not in the trace (or cancelled): wait for the card
+        return SimulatedProvider(60000, 800, clock=lv.tick_get)
+
+
+def run(width, height, trace_path, catalog_path=None):
+    h = Harness(width, height)
+    main = h.load_app()
+    app = h.new_app(main)
+
+    with open(trace_path) as f:
+        trace = json.load(f)
+    if catalog_path:
+        from catalog import Catalog
+        with open(catalog_path) as f:
+            data = json.load(f)
+        app._swap_catalog(Catalog.from_json(data.get("products", []), data.get("categories", []),
+                                            data.get("version", 1), app.tint_over,
+                                            data.get("pricing"), main.TAX_RATE),
+                          data.get("settings", {}))
+    events = trace["events"]
+    h.emit("trace", terminal=trace.get("terminal"), events=len(events),
+           dropped=trace.get("dropped", 0), catalog_version=trace.get("catalog_version"),
+           recorded_screen=trace.get("screen"))
+
+    replay = Replay(h, app)
+    timings = []    # (us, alloc or -1 if a GC ran, index)
+    by_kind = {}
+    last = 0
+    start = time.ticks_ms()
+    for i, (t, kind, arg, num) in enumerate(events):
+        replay.idle(min(MAX_GAP_MS, max(0, t - last)))
+        last = t
+
+        before = gc.mem_alloc()
+        t0 = time.ticks_us()
+        ok = replay.feed(i, events)
+        app.render.flush()
+        lv.refr_now(h.display)
+        us = time.ticks_diff(time.ticks_us(), t0)
+        alloc = gc.mem_alloc() - before
+
+        if not ok:
+            replay.skipped += 1
+            timings.append(None)
+            continue
+        timings.append((us, alloc if alloc >= 0 else -1, i))
+        if kind not in ("slow_frame", "paid"):
+            by_kind.setdefault(kind, []).append((us, alloc))
+
+    for kind, samples in by_kind.items():
+        times = sorted(us for us, _ in samples)
+        allocs = [a for _, a in samples if a >= 0]
+        h.emit("result", bench="replay", kind=kind, n=len(samples),
+               p50_us=times[len(times) // 2], max_us=times[-1],
+               alloc_mean=sum(allocs) // len(allocs) if allocs else None)
+
+    measured = sorted((t for t in timings if t and events[t[2]][1] not in ("slow_frame", "paid")),
+                      reverse=True)
+    for us, alloc, i in measured[:SLOWEST]:
+        at, kind, arg, num = events[i]
+        h.emit("result", bench="replay_slowest", index=i, at_ms=at, kind=kind, arg=arg,
+               us=us, alloc=alloc)
+
+    # What the terminal saw vs what the replay measured for the input before
+    for i, (at, kind, arg, num) in enumerate(events):
+        if kind != "slow_frame":
+            continue
+        j = i - 1
+        while j >= 0 and events[j][1] in ("slow_frame", "paid"):
+            j -= 1
+        replayed = timings[j][0] if j >= 0 and timings[j] else None
+        h.emit("result", bench="replay_slow_frame", index=i, at_ms=at, recorded_ms=num,
+               after=events[j][1] if j >= 0 else None, replayed_us=replayed)
+
+    h.emit("done", bench="replay", total_ms=time.ticks_diff(time.ticks_ms(), start),
+           skipped=replay.skipped, payment_mismatches=replay.payment_mismatches,
+           heap_free=gc.mem_free())
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]), int(sys.argv[2]), sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
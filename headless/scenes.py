@@ -0,0 +1,95 @@
+"""
+Scripted screenshot scenes for the headless harness
+
+Usage (inside lv_micropython, normally via run_headless.py):
+    micropython headless/scenes.py WIDTH HEIGHT OUT_DIR [scene ...]
+
+Each scene starts from a fresh POSApp with demo data, performs taps the
+same way a cashier would, then captures the screen.
+"""
+
+import sys
+import time
+
+from harness import Harness
+
+
+def scene_home(h, app):
+    """Initial screen: all products, empty cart"""
+
+
+def scene_category(h, app):
+    """Food category selected"""
+    bar = app.category_bar
+    # Second category, after the fixed buttons (Favorites, All)
+    btn, _ = bar.buttons[bar.fixed + 1]
+    h.click(btn)
+
+
+def scene_modifiers(h, app):
+    """Modifier picker for Flat White with Large + Oat selected"""
+    h.click(app.product_grid.buttons[0])
+    sections = app.modifier_modal.sections
+    h.click(sections[0][2][1])
+    h.click(sections[1][2][2])
+
+
+def scene_cart(h, app):
+    """Several products in the cart, one with modifiers, one with qty > 1"""
+    scene_modifiers(h, app)
+    h.click(app.modifier_modal.add_btn)
+    buttons = app.product_grid.buttons
+    for i in (6, 10, 10):
+        h.click(buttons[i])
+
+
+def scene_search(h, app):
+    """Search open with a partial query"""
+    h.click(app.header.search_btn)
+    app.search_panel.field.set_text("la")
+
+
+def scene_payment(h, app):
+    """Payment overlay waiting for card"""
+    scene_cart(h, app)
+    h.click(app.cart_panel.pay_btn)
+
+
+def scene_payment_success(h, app):
+    """Payment approved overlay"""
+    scene_payment(h, app)
+    app._on_payment_complete()
+
+
+SCENES = [
+    ("home", scene_home),
+    ("category", scene_category),
+    ("modifiers", scene_modifiers),
+    ("cart", scene_cart),
+    ("search", scene_search),
+    ("payment", scene_payment),
+    ("payment_success", scene_payment_success),
+]
+
+
+def run(width, height, out_dir, names=None):
+    h = Harness(width, height, out_dir)
+    main = h.load_app()
+
+    start = time.ticks_ms()
+    app = None
+    for name, scene in SCENES:
+        if names and name not in names:
+            continue
+        app = h.new_app(main, app)
+        scene(h, app)
+        app.render.flush()
+        # Let toasts finish fading in
+        h.advance(main.Styles.FADE_MS)
+        h.capture(name)
+
+    h.emit("done", total_ms=time.ticks_diff(time.ticks_ms(), start))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]), int(sys.argv[2]), sys.argv[3], sys.argv[4:])
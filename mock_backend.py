@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Mock Backend for Windcave Terminal POS
+
+A minimal stand-in for the real backend, for running terminals (or the
+LVGL preview) against a local server:
+
+    GET  /api/sync               products, categories, pricing, settings, version
+    GET  /api/events             catalog versions as server-sent events
+    GET  /api/updates?since=V    long-poll: answers once the version moves
+    GET  /api/ws                 catalog versions over a WebSocket
+    POST /api/catalog/bump       reprice a product (new catalog version)
+    POST /api/transactions       completed sales (counted)
+    POST /api/telemetry          terminal performance counters
+    GET  /api/telemetry          fleet summary of those counters (JSON)
+    GET  /api/thumbs/<sha1>.bin  thumbnails from --thumbs
+    POST /api/inputlog/request   ask terminals for their input logs
+    POST /api/inputlog           a terminal's input log, saved to --inputlogs
+
+Usage:
+    ./mock_backend.py [--port 5000] [--catalog FILE.json | --products N]
+                      [--thumbs DIR] [--reprice-every SECONDS]
+                      [--inputlogs DIR]
+    ./mock_backend.py --fleet N --mode poll|sse|longpoll|ws
+                      [--duration SECONDS] [--poll-interval SECONDS]
+
+Point BACKEND_URL in terminal/config.py at http://<this host>:5000.
+The telemetry summary is also printed when the server stops.
+
+--fleet runs N simulated terminals against the server for --duration
+seconds while the catalog is repriced every --reprice-every seconds,
+then prints request volume per endpoint and update propagation latency
+(reprice to the terminal's next /api/sync) for the chosen mode.
+
+An input log request changes settings.inputLogRequest; each terminal
+posts its log after its next sync. Replay one with
+./run_headless.py --replay DIR/<terminal>-<time>.json --catalog FILE.json.
+"""
+
+import argparse
+import base64
+import hashlib
+import http.server
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "terminal"))
+
+from telemetry import Histogram  # noqa: E402
+
+LONGPOLL_S = 25       # long-poll wait before answering with the same version
+KEEPALIVE_S = 15      # SSE comment / WebSocket ping interval
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class State:
+    """Everything the mock backend keeps in memory"""
+
+    def __init__(self, catalog, thumbs_dir, inputlog_dir="inputlogs"):
+        self.catalog = catalog
+        self.catalog.setdefault("version", 1)
+        self.thumbs_dir = thumbs_dir
+        self.inputlog_dir = inputlog_dir
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.transactions = 0
+        self.revenue = 0.0
+        self.terminals = {}   # terminal id -> {"reports", "histograms", "counters", "low"}
+        self.requests = {}    # endpoint -> count
+        self.bytes_out = 0
+        self.changed_at = {}  # catalog version -> time.monotonic() of the change
+        self.synced = {}      # terminal id -> catalog version it last fetched
+        self.propagation = Histogram()   # ms from a change to each terminal's sync
+        self._rng = random.Random(3)
+
+    @property
+    def version(self):
+        return self.catalog["version"]
+
+    def count(self, endpoint, sent=0):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.bytes_out += sent
+
+    def bump(self):
+        """Reprice one product and publish a new catalog version"""
+        with self.changed:
+            products = self.catalog.get("products")
+            if products:
+                p = dict(self._rng.choice(products))
+                p["price"] = round(p.get("price", 0) + 0.10, 2)
+                # New list: responses being serialized keep the old snapshot
+                self.catalog = dict(self.catalog, products=[
+                    p if q["id"] == p["id"] else q for q in products])
+            self.catalog["version"] += 1
+            self.changed_at[self.version] = time.monotonic()
+            self.changed.notify_all()
+            return self.version
+
+    def request_inputlogs(self):
+        """Ask every terminal for its input log (seen on their next sync)"""
+        with self.lock:
+            settings = dict(self.catalog.get("settings") or {})
+            settings["inputLogRequest"] = settings.get("inputLogRequest", 0) + 1
+            self.catalog = dict(self.catalog, settings=settings)
+            return settings["inputLogRequest"]
+
+    def save_inputlog(self, trace):
+        terminal = str(trace.get("terminal", "unknown")).replace("/", "_")
+        os.makedirs(self.inputlog_dir, exist_ok=True)
+        path = os.path.join(self.inputlog_dir, f"{terminal}-{int(time.time())}.json")
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return path
+
+    def wait_version(self, since, timeout):
+        """Current version once it differs from `since`, or after `timeout`"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != since, timeout)
+            return self.version
+
+    def sync_payload(self, terminal):
+        with self.lock:
+            catalog = self.catalog
+            if terminal and self.synced.get(terminal) != catalog["version"]:
+                self.synced[terminal] = catalog["version"]
+                changed = self.changed_at.get(catalog["version"])
+                if changed is not None:
+                    self.propagation.add((time.monotonic() - changed) * 1000)
+        return catalog
+
+    def add_telemetry(self, report):
+        terminal = str(report.get("terminal", "unknown"))
+        with self.lock:
+            t = self.terminals.setdefault(terminal, {
+                "reports": 0, "histograms": {}, "counters": {}, "low": {}})
+            t["reports"] += 1
+            for name, d in report.get("histograms", {}).items():
+                h = Histogram.from_dict(d)
+                if name in t["histograms"]:
+                    t["histograms"][name].merge(h)
+                else:
+                    t["histograms"][name] = h
+            for name, n in report.get("counters", {}).items():
+                t["counters"][name] = t["counters"].get(name, 0) + n
+            for name, v in report.get("low", {}).items():
+                if name not in t["low"] or v < t["low"][name]:
+                    t["low"][name] = v
+
+    def summary(self):
+        """Per-terminal and fleet-wide p50/p95/max for every metric"""
+        def describe(h):
+            return {"n": h.n, "mean": round(h.mean(), 2), "p50": round(h.percentile(50), 2),
+                    "p95": round(h.percentile(95), 2), "max": round(h.peak, 2)}
+
+        with self.lock:
+            fleet = {}
+            terminals = {}
+            for terminal, t in self.terminals.items():
+                terminals[terminal] = {
+                    "reports": t["reports"],
+                    "metrics": {name: describe(h) for name, h in t["histograms"].items()},
+                    "counters": dict(t["counters"]),
+                    "low": dict(t["low"]),
+                }
+                for name, h in t["histograms"].items():
+                    fleet.setdefault(name, Histogram()).merge(h)
+            return {
+                "transactions": self.transactions,
+                "revenue": round(self.revenue, 2),
+                "catalog_version": self.version,
+                "requests": dict(self.requests),
+                "bytes_out": self.bytes_out,
+                "propagation_ms": describe(self.propagation),
+                "fleet": {name: describe(h) for name, h in fleet.items()},
+                "terminals": terminals,
+            }
+
+
+def make_handler(state, quiet=False):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            if not quiet:
+                print(f"  {self.command} {self.path} {args[1] if len(args) > 1 else ''}")
+
+        def _json(self, obj, status=200):
+            body = json.dumps(obj).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return len(body)
+
+        def _stream(self, send, keepalive):
+            """Push every catalog version until the terminal goes away"""
+            version = None
+            try:
+                while True:
+                    current = state.wait_version(version, KEEPALIVE_S)
+                    if current != version:
+                        version = current
+                        send(json.dumps({"version": version}).encode())
+                    else:
+                        keepalive()
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self._stream(lambda data: self.wfile.write(b"data: " + data + b"\n\n"),
+                         lambda: self.wfile.write(b": keepalive\n\n"))
+
+        def _websocket(self):
+            key = self.headers.get("Sec-WebSocket-Key", "")
+            accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest())
+            self.send_response(101)
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept.decode())
+            self.end_headers()
+            # Text frames for versions, pings as keepalive; pongs are ignored
+            self._stream(lambda data: self.wfile.write(bytes((0x81, len(data))) + data),
+                         lambda: self.wfile.write(b"\x89\x00"))
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            path = url.path
+            if path == "/api/sync":
+                sent = self._json(state.sync_payload(query.get("terminal")))
+                state.count(path, sent)
+            elif path == "/api/updates":
+                since = query.get("since")
+                version = state.wait_version(int(since) if since else None, LONGPOLL_S)
+                state.count(path, self._json({"version": version}))
+            elif path == "/api/events":
+                state.count(path)
+                self._events()
+            elif path == "/api/ws":
+                state.count(path)
+                self._websocket()
+            elif self.path == "/api/telemetry":
+                self._json(state.summary())
+            elif self.path.startswith("/api/thumbs/") and state.thumbs_dir:
+                name = os.path.basename(self.path)
+                path = os.path.join(state.thumbs_dir, name)
+                if not name.endswith(".bin") or not os.path.isfile(path):
+                    self._json({"error": "not found"}, 404)
+                    return
+                with open(path, "rb") as f:
+                    data = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            try:
+                payload = self._read_json()
+            except ValueError:
+                self._json({"error": "invalid json"}, 400)
+                return
+
+            if self.path == "/api/catalog/bump":
+                self._json({"version": state.bump()})
+            elif self.path == "/api/transactions":
+                with state.lock:
+                    state.transactions += 1
+                    state.revenue += payload.get("total", 0)
+                self._json({"ok": True})
+            elif self.path == "/api/telemetry":
+                state.add_telemetry(payload)
+                self._json({"ok": True})
+            elif self.path == "/api/inputlog/request":
+                self._json({"request": state.request_inputlogs()})
+            elif self.path == "/api/inputlog":
+                path = state.save_inputlog(payload)
+                print(f"  Input log: {len(payload.get('events', []))} events -> {path}")
+                self._json({"ok": True})
+            else:
+                self._json({"error": "not found"}, 404)
+
+    return Handler
+
+
+class Server(http.server.ThreadingHTTPServer):
+    # A simulated fleet connects all at once; streams hold a thread each
+    request_queue_size = 256
+    daemon_threads = True
+
+
+# ---------------------------------------------------------------------------
+# Fleet simulation
+# ---------------------------------------------------------------------------
+
+def _get(base, path):
+    with urllib.request.urlopen(base + path, timeout=LONGPOLL_S + 10) as response:
+        return response.read()
+
+
+def _announcements(base, mode, terminal, stop):
+    """Catalog versions announced to one terminal over `mode`'s channel"""
+    if mode == "longpoll":
+        version = None
+        while not stop.is_set():
+            since = "" if version is None else f"&since={version}"
+            version = json.loads(_get(base, f"/api/updates?terminal={terminal}{since}"))["version"]
+            yield version
+        return
+
+    host, port = urllib.parse.urlsplit(base).netloc.split(":")
+    sock = socket.create_connection((host, int(port)))
+    sock.settimeout(1)
+    path = "/api/events" if mode == "sse" else "/api/ws"
+    headers = "Accept: text/event-stream\r\n"
+    if mode == "ws":
+        key = base64.b64encode(os.urandom(16)).decode()
+        headers = (f"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                   f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n")
+    sock.sendall(f"GET {path}?terminal={terminal} HTTP/1.1\r\nHost: {host}\r\n{headers}\r\n".encode())
+
+    buf = b""
+    in_body = False
+    try:
+        while not stop.is_set():
+            try:
+                data = sock.recv(4096)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+            buf += data
+            if not in_body:
+                end = buf.find(b"\r\n\r\n")
+                if end < 0:
+                    continue
+                buf = buf[end + 4:]
+                in_body = True
+            if mode == "sse":
+                *lines, buf = buf.split(b"\n")
+                for line in lines:
+                    if line.startswith(b"data:"):
+                        yield json.loads(line[5:])["version"]
+            else:
+                while len(buf) >= 2 and len(buf) >= 2 + (buf[1] & 0x7F):
+                    opcode, length = buf[0] & 0x0F, buf[1] & 0x7F
+                    payload, buf = buf[2:2 + length], buf[2 + length:]
+                    if opcode == 1:
+                        yield json.loads(payload)["version"]
+    finally:
+        sock.close()
+
+
+def simulate_terminal(base, terminal, mode, poll_s, stop):
+    """One simulated terminal: syncs on its mode's trigger until `stop`"""
+    # Terminals boot at different times
+    if stop.wait(random.random() * min(poll_s, 5)):
+        return
+
+    if mode == "poll":
+        while True:
+            _get(base, f"/api/sync?terminal={terminal}")
+            if stop.wait(poll_s):
+                return
+
+    synced = None
+    while not stop.is_set():
+        try:
+            for version in _announcements(base, mode, terminal, stop):
+                if version != synced:
+                    _get(base, f"/api/sync?terminal={terminal}")
+                    synced = version
+        except OSError:
+            pass
+        # Channel dropped: reconnect after a pause
+        stop.wait(1)
+
+
+def run_fleet(state, base, args):
+    stop = threading.Event()
+    for i in range(args.fleet):
+        threading.Thread(target=simulate_terminal, daemon=True,
+                         args=(base, f"sim-{i}", args.mode, args.poll_interval, stop)).start()
+
+    # Let the fleet connect and sync once before the first change
+    warmup = min(args.poll_interval, 5) + 1
+    time.sleep(warmup)
+    with state.lock:
+        state.requests = {}
+        state.bytes_out = 0
+
+    end = time.monotonic() + args.duration
+    bumps = 0
+    while time.monotonic() < end:
+        time.sleep(min(args.reprice_every, max(0, end - time.monotonic())))
+        if time.monotonic() < end:
+            state.bump()
+            bumps += 1
+    # Give the last change time to arrive everywhere
+    time.sleep(min(args.poll_interval, 5) if args.mode != "poll" else args.poll_interval)
+    stop.set()
+
+    summary = state.summary()
+    minutes = args.duration / 60
+    print(f"\n  {args.fleet} terminals, mode={args.mode}, {args.duration}s, {bumps} catalog changes")
+    for endpoint, n in sorted(summary["requests"].items()):
+        print(f"    {endpoint:<16} {n:>7} requests  {n / minutes / args.fleet:8.2f}/terminal/min")
+    print(f"    sync bytes sent  {summary['bytes_out']:>7}")
+    m = summary["propagation_ms"]
+    print(f"    propagation      n={m['n']:<6} mean={m['mean']}ms p50={m['p50']}ms "
+          f"p95={m['p95']}ms max={m['max']}ms")
+
+
+def load_catalog(args):
+    if args.catalog:
+        with open(args.catalog) as f:
+            return json.load(f)
+
+    from bench import synthetic_catalog
+    products, categories = synthetic_catalog(args.products, categories=6)
+    return {"products": products, "categories": categories, "settings": {}}
+
+
+def print_summary(summary):
+    print()
+    print(f"  {summary['transactions']} transactions, ${summary['revenue']:.2f}")
+    for terminal, t in sorted(summary["terminals"].items()):
+        print(f"  {terminal}: {t['reports']} reports, counters={t['counters']}, low={t['low']}")
+    for name, m in sorted(summary["fleet"].items()):
+        print(f"    {name:<18} n={m['n']:<6} mean={m['mean']:<9} p50={m['p50']:<8} "
+              f"p95={m['p95']:<8} max={m['max']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--catalog", help="JSON file in the /api/sync format")
+    parser.add_argument("--products", type=int, default=60,
+                        help="Size of the synthetic catalog when no --catalog is given")
+    parser.add_argument("--thumbs", help="Output directory of build_thumbnails.py")
+    parser.add_argument("--inputlogs", default="inputlogs",
+                        help="Directory for input logs posted by terminals")
+    parser.add_argument("--reprice-every", type=float, default=0,
+                        help="Publish a new catalog version every N seconds")
+    parser.add_argument("--fleet", type=int, default=0,
+                        help="Run N simulated terminals, print request/propagation stats, exit")
+    parser.add_argument("--mode", choices=("poll", "sse", "longpoll", "ws"), default="poll",
+                        help="How simulated terminals learn about changes")
+    parser.add_argument("--duration", type=float, default=60,
+                        help="Seconds the fleet simulation runs")
+    parser.add_argument("--poll-interval", type=float, default=30,
+                        help="Simulated terminals' sync interval in poll mode (seconds)")
+    args = parser.parse_args()
+
+    state = State(load_catalog(args), args.thumbs, args.inputlogs)
+    server = Server(("", args.port), make_handler(state, quiet=bool(args.fleet)))
+    print(f"  Mock backend on http://0.0.0.0:{args.port} "
+          f"({len(state.catalog.get('products', []))} products)")
+
+    if args.fleet:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.reprice_every = args.reprice_every or 10
+        run_fleet(state, f"http://127.0.0.1:{args.port}", args)
+        server.shutdown()
+        server.server_close()
+        return 0
+
+    if args.reprice_every:
+        def reprice():
+            while True:
+                time.sleep(args.reprice_every)
+                print(f"  Catalog v{state.bump()}")
+        threading.Thread(target=reprice, daemon=True).start()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    print_summary(state.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Headless Screenshot Regression Runner for Windcave Terminal POS
+
+Renders the scripted scenes in headless/scenes.py at both terminal
+sizes using lv_micropython with an in-memory framebuffer (no SDL
+window), writes PNGs and diffs them against the golden images in
+headless/golden/.
+
+Requires lv_micropython to be built at ~/Desktop/lv_micropython
+(override with the LV_MICROPYTHON environment variable).
+
+Usage:
+    ./run_headless.py                  # render + diff both sizes
+    ./run_headless.py --update         # accept current output as golden
+    ./run_headless.py --size 3.5 cart  # one size, one scene
+    ./run_headless.py --bench          # run headless/benchmarks.py
+    ./run_headless.py --boot           # import cost, source vs .mpy
+    ./run_headless.py --replay inputs.json [--catalog sync.json]
+"""
+
+import argparse
+import array
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import zlib
+
+# Paths
+MICROPYTHON = os.environ.get(
+    "LV_MICROPYTHON",
+    os.path.expanduser("~/Desktop/lv_micropython/ports/unix/build-lvgl/micropython")
+)
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+HEADLESS_DIR = os.path.join(PROJECT_DIR, "headless")
+GOLDEN_DIR = os.path.join(HEADLESS_DIR, "golden")
+OUT_DIR = os.path.join(HEADLESS_DIR, "out")
+
+# Usable LVGL area (28px status bar excluded), matching terminal/config.py
+SIZES = {
+    "3.5": (320, 452),
+    "8": (800, 452)
+}
+
+
+# ---------------------------------------------------------------------------
+# Minimal PNG support (8-bit RGB/RGBA, no external dependencies)
+# ---------------------------------------------------------------------------
+
+def _png_chunk(tag, data):
+    chunk = tag + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk) & 0xFFFFFFFF)
+
+
+def write_png(path, width, height, rgb):
+    """Write packed RGB888 pixels as a PNG"""
+    stride = width * 3
+    raw = b"".join(b"\x00" + rgb[y * stride:(y + 1) * stride] for y in range(height))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_png_chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def read_png(path):
+    """Read an 8-bit RGB/RGBA PNG, returning (width, height, rgb888)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError(f"{path}: not a PNG")
+
+    pos = 8
+    idat = []
+    header = None
+    while pos < len(data):
+        if pos + 8 > len(data):
+            raise ValueError(f"{path}: truncated PNG")
+        length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if tag == b"IHDR" and len(body) == 13:
+            header = struct.unpack(">IIBBBBB", body)
+        elif tag == b"IDAT":
+            idat.append(body)
+        pos += 12 + length
+
+    if header is None or not idat:
+        raise ValueError(f"{path}: truncated PNG (no IHDR or IDAT chunk)")
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or color_type not in (2, 6) or interlace:
+        raise ValueError(f"{path}: only 8-bit non-interlaced RGB/RGBA supported")
+
+    bpp = 3 if color_type == 2 else 4
+    stride = width * bpp
+    raw = zlib.decompress(b"".join(idat))
+    out = bytearray(height * stride)
+    prev = bytearray(stride)
+
+    for y in range(height):
+        ftype = raw[y * (stride + 1)]
+        line = bytearray(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        for x in range(stride if ftype else 0):
+            a = line[x - bpp] if x >= bpp else 0
+            b = prev[x]
+            c = prev[x - bpp] if x >= bpp else 0
+            if ftype == 1:
+                line[x] = (line[x] + a) & 0xFF
+            elif ftype == 2:
+                line[x] = (line[x] + b) & 0xFF
+            elif ftype == 3:
+                line[x] = (line[x] + ((a + b) >> 1)) & 0xFF
+            elif ftype == 4:
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                line[x] = (line[x] + pred) & 0xFF
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+
+    if bpp == 4:
+        del out[3::4]
+    return width, height, bytes(out)
+
+
+_RGB565_LUT = None
+
+
+def rgb565_to_rgb888(raw):
+    """Convert LVGL's little-endian RGB565 framebuffer to RGB888"""
+    global _RGB565_LUT
+    if _RGB565_LUT is None:
+        _RGB565_LUT = [
+            bytes((((v >> 11) << 3) | (v >> 13),
+                   (((v >> 5) & 0x3F) << 2) | ((v >> 9) & 0x03),
+                   ((v & 0x1F) << 3) | ((v >> 2) & 0x07)))
+            for v in range(65536)
+        ]
+    pixels = array.array("H", raw)
+    if sys.byteorder == "big":
+        pixels.byteswap()
+    return b"".join(map(_RGB565_LUT.__getitem__, pixels))
+
+
+def diff_images(actual, expected, tolerance):
+    """Return (differing pixel count, diff image) for two RGB888 buffers"""
+    diff = bytearray(len(actual))
+    count = 0
+    for i in range(0, len(actual), 3):
+        if (abs(actual[i] - expected[i]) > tolerance
+                or abs(actual[i + 1] - expected[i + 1]) > tolerance
+                or abs(actual[i + 2] - expected[i + 2]) > tolerance):
+            count += 1
+            diff[i] = 0xFF
+        else:
+            # Dimmed grayscale of the golden image for context
+            gray = (expected[i] + expected[i + 1] + expected[i + 2]) // 12
+            diff[i] = diff[i + 1] = diff[i + 2] = gray
+    return count, bytes(diff)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def start_size(size, scenes):
+    """Launch one lv_micropython process rendering all scenes for a size"""
+    width, height = SIZES[size]
+    out_dir = os.path.join(OUT_DIR, size)
+    os.makedirs(out_dir, exist_ok=True)
+
+    cmd = [MICROPYTHON, os.path.join(HEADLESS_DIR, "scenes.py"), str(width), str(height), out_dir]
+    cmd.extend(scenes)
+    return subprocess.Popen(cmd, cwd=HEADLESS_DIR, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+
+
+def start_bench(size, names):
+    """Launch one lv_micropython process running headless benchmarks"""
+    width, height = SIZES[size]
+    cmd = [MICROPYTHON, os.path.join(HEADLESS_DIR, "benchmarks.py"), str(width), str(height)]
+    cmd.extend(names)
+    return subprocess.Popen(cmd, cwd=HEADLESS_DIR, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+
+
+def print_results(size, records):
+    for record in records:
+        event = record.pop("event")
+        name = record.pop("bench", "")
+        for key in ("width", "height"):
+            record.pop(key, None)
+        fields = " ".join(f"{k}={v}" for k, v in record.items())
+        if event == "result":
+            label = name
+        elif event == "done":
+            label = f"[{name} total]"
+        else:
+            label = f"[{event}]"
+        print(f"{size:<5} {label:<22} {fields}")
+
+
+def run_benchmarks(sizes, names):
+    """Run headless benchmarks for each size and print their results"""
+    procs = [(size, start_bench(size, names)) for size in sizes]
+    for size, proc in procs:
+        print_results(size, collect(size, proc))
+    return 0
+
+
+def run_replay(sizes, trace, catalog):
+    """Replay a terminal's input log (see headless/replay.py) at each size"""
+    procs = []
+    for size in sizes:
+        width, height = SIZES[size]
+        cmd = [MICROPYTHON, os.path.join(HEADLESS_DIR, "replay.py"), str(width), str(height),
+               os.path.abspath(trace)]
+        if catalog:
+            cmd.append(os.path.abspath(catalog))
+        procs.append((size, subprocess.Popen(cmd, cwd=HEADLESS_DIR, stdout=subprocess.PIPE,
+                                             stderr=subprocess.STDOUT, text=True)))
+    for size, proc in procs:
+        print_results(size, collect(size, proc))
+    return 0
+
+
+def run_boot():
+    """Import time and heap of terminal/ as source and as .mpy bytecode"""
+    import build_mpy
+
+    mpy_cross = build_mpy.find_mpy_cross()
+    if not mpy_cross:
+        print("Error: mpy-cross not found (see build_mpy.py)")
+        return 1
+    mpy_dir = os.path.join(OUT_DIR, "mpy")
+    build_mpy.build(mpy_dir, mpy_cross)
+
+    results = {}
+    for label, path in (("source", build_mpy.TERMINAL_DIR), ("mpy", mpy_dir)):
+        # Large heap: the GC is off while importing to capture the peak
+        cmd = [MICROPYTHON, "-X", "heapsize=8M", os.path.join(HEADLESS_DIR, "boot.py"), path]
+        proc = subprocess.Popen(cmd, cwd=HEADLESS_DIR, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True)
+        for record in collect(label, proc):
+            if record["event"] == "module":
+                results.setdefault(record["module"], {})[label] = record
+            else:
+                results.setdefault("[boot]", {})[label] = record
+
+    print(f"{'module':<12} {'source':>18} {'mpy':>18}")
+    for name, by_label in results.items():
+        cols = []
+        for label in ("source", "mpy"):
+            r = by_label.get(label, {})
+            alloc = r.get("alloc", r.get("peak_alloc", 0))
+            cols.append(f"{r.get('import_us', 0) / 1000:7.1f}ms {alloc // 1024:5d}K")
+        print(f"{name:<12} {cols[0]:>18} {cols[1]:>18}")
+    for label, r in results["[boot]"].items():
+        print(f"{label}: resident after import {r['resident'] // 1024}K")
+    return 0
+
+
+def collect(size, proc):
+    """Parse @@ records from a finished harness process"""
+    output, _ = proc.communicate()
+    records = []
+    for line in output.splitlines():
+        if line.startswith("@@"):
+            records.append(json.loads(line[2:]))
+    if proc.returncode != 0:
+        print(output)
+        raise RuntimeError(f"Harness failed for {size}\" (exit {proc.returncode})")
+    return records
+
+
+def check_frame(size, record, update, tolerance):
+    """Convert one frame to PNG and compare it with its golden image"""
+    width, height = record["width"], record["height"]
+    name = record["scene"]
+
+    with open(record["file"], "rb") as f:
+        rgb = rgb565_to_rgb888(f.read())
+    os.remove(record["file"])
+
+    png_path = os.path.join(OUT_DIR, size, f"{name}.png")
+    write_png(png_path, width, height, rgb)
+
+    golden_path = os.path.join(GOLDEN_DIR, size, f"{name}.png")
+    if update:
+        os.makedirs(os.path.dirname(golden_path), exist_ok=True)
+        shutil.copyfile(png_path, golden_path)
+        return "updated", 0
+
+    if not os.path.exists(golden_path):
+        return "NO GOLDEN", -1
+
+    g_width, g_height, golden = read_png(golden_path)
+    if (g_width, g_height) != (width, height):
+        return "SIZE MISMATCH", -1
+
+    if rgb == golden:
+        return "ok", 0
+
+    count, diff = diff_images(rgb, golden, tolerance)
+    if count:
+        write_png(os.path.join(OUT_DIR, size, f"{name}.diff.png"), width, height, diff)
+        return "FAIL", count
+    return "ok", 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless screenshot regression tests")
+    parser.add_argument("scenes", nargs="*", help="Scene or benchmark names (default: all)")
+    parser.add_argument("--size", choices=sorted(SIZES), action="append",
+                        help="Screen size to render (default: both)")
+    parser.add_argument("--update", action="store_true",
+                        help="Overwrite golden images with the current output")
+    parser.add_argument("--tolerance", type=int, default=0,
+                        help="Per-channel difference allowed before a pixel counts as changed")
+    parser.add_argument("--bench", action="store_true",
+                        help="Run headless/benchmarks.py instead of screenshot scenes")
+    parser.add_argument("--boot", action="store_true",
+                        help="Compare import time and heap of source vs .mpy modules")
+    parser.add_argument("--replay", metavar="TRACE",
+                        help="Replay a terminal's input log dump and time every event")
+    parser.add_argument("--catalog", help="Catalog (/api/sync JSON) the --replay trace was "
+                                          "recorded with")
+    args = parser.parse_args()
+
+    if not os.path.exists(MICROPYTHON):
+        print(f"Error: lv_micropython not found at {MICROPYTHON}")
+        print("Build lv_micropython or set LV_MICROPYTHON")
+        return 1
+
+    if args.boot:
+        return run_boot()
+
+    sizes = args.size or ["3.5", "8"]
+    if args.replay:
+        # The size the trace was recorded at, unless one was given
+        if not args.size:
+            with open(args.replay) as f:
+                screen = json.load(f).get("screen")
+            sizes = [s for s, dims in SIZES.items() if list(dims) == screen] or sizes
+        return run_replay(sizes, args.replay, args.catalog)
+    if args.bench:
+        return run_benchmarks(sizes, args.scenes)
+
+    batch_start = time.perf_counter()
+
+    # Both sizes render in parallel - each needs its own process because
+    # main.py copies the screen size from config at import time.
+    procs = [(size, start_size(size, args.scenes), time.perf_counter()) for size in sizes]
+
+    failures = 0
+    print(f"{'size':<5} {'scene':<18} {'render':>9}  result")
+    for size, proc, started in procs:
+        records = collect(size, proc)
+        proc_ms = (time.perf_counter() - started) * 1000
+
+        for record in records:
+            if record["event"] == "frame":
+                status, count = check_frame(size, record, args.update, args.tolerance)
+                if status not in ("ok", "updated"):
+                    failures += 1
+                detail = f" ({count} px)" if count > 0 else ""
+                print(f"{size:<5} {record['scene']:<18} {record['render_us'] / 1000:>7.2f}ms  {status}{detail}")
+            elif record["event"] == "done":
+                print(f"{size:<5} {'[scenes total]':<18} {record['total_ms']:>7d}ms  (process {proc_ms:.0f}ms)")
+
+    batch_ms = (time.perf_counter() - batch_start) * 1000
+    print(f"\nBatch: {batch_ms:.0f}ms, {failures} failure(s)")
+    if failures:
+        print(f"Output and diff images: {OUT_DIR}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
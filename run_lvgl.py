@@ -66,6 +66,8 @@ print("Screen: {width}x{height}")
     # Now import and run the POS UI components
     try:
         from pos_ui import Theme, Styles, Header, CategoryBar, ProductGrid, CartPanel, CartPanelWide, Notification
+        from records import product_from_json, category_from_json
+        from cart import Cart
 
         # Initialize styles
         Styles.init()
@@ -109,32 +111,22 @@ print("Screen: {width}x{height}")
             {{"id": "cat-2", "name": "Food", "icon": "🍽", "color": "#228B22"}},
             {{"id": "cat-3", "name": "Drinks", "icon": "🥤", "color": "#4169E1"}},
         ]
-        cat_bar.set_categories(categories)
+        cat_bar.set_categories([category_from_json(c) for c in categories])
 
         product_area.set_style_bg_opa(lv.OPA.TRANSP, 0)
         product_area.set_style_border_width(0, 0)
         product_area.set_style_pad_all(8, 0)
 
-        cart_items = []
+        cart_items = Cart()
 
         def on_product_select(product):
-            print(f"Selected: {{product['name']}}")
+            print(f"Selected: {{product.name}}")
             # Add to cart
-            for item in cart_items:
-                if item['id'] == product['id']:
-                    item['qty'] += 1
-                    cart.update(cart_items, sum(i['price']*i['qty'] for i in cart_items) * 1.15)
-                    grid.update_badges(cart_items)
-                    return
-            cart_items.append({{
-                'id': product['id'],
-                'name': product['name'],
-                'price': product['price'],
-                'qty': 1
-            }})
-            cart.update(cart_items, sum(i['price']*i['qty'] for i in cart_items) * 1.15)
-            grid.update_badges(cart_items)
-            Notification(screen, f"Added {{product['name']}}", style="success")
+            line, is_new = cart_items.add(product)
+            cart.update(cart_items.lines, cart_items.subtotal() * 1.15)
+            grid.update_badges(cart_items.product_qty)
+            if is_new:
+                Notification(screen, f"Added {{product.name}}", style="success")
 
         grid = ProductGrid(product_area, btn_size=btn_size, on_select=on_product_select)
         
@@ -147,7 +139,7 @@ print("Screen: {width}x{height}")
             {{"id": "p5", "name": "Mocha", "price": 6.00, "color": "#5C4033"}},
             {{"id": "p6", "name": "Espresso", "price": 4.00, "color": "#2C1810"}},
         ]
-        grid.set_products(products)
+        grid.set_products([product_from_json(p) for p in products])
 
         # Cart panel
         def on_pay():
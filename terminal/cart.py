@@ -0,0 +1,111 @@
+"""
+Windcave Terminal POS - Cart
+Order lines keyed by (product id, modifier mask) so repeated taps merge
+into the same line with a single dict lookup.
+
+Lines copy name and price from the catalog snapshot they were added
+from and record its version. A later snapshot with a different price
+starts a new line instead of repricing units already in the cart.
+
+Every change is passed on to `totals` (pricing.CartTotals), which keeps
+the discounts and tax up to date as it goes.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+from records import CartLine
+from pricing import CartTotals
+
+
+class Cart:
+    """Current order"""
+
+    def __init__(self, rules=None):
+        self.lines = []         # CartLine records in display order
+        self._index = {}        # line key -> line
+        self._latest = {}       # (product id, modifier mask) -> line taps merge into
+        self.product_qty = {}   # product id -> qty across all lines
+        self.totals = CartTotals(rules)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def add(self, product, mask=0, table=None, version=0):
+        """Add one of `product` from catalog `version`, returning (line, is_new_line)"""
+        pid = product.id
+        key = (pid, mask)
+        price = product.price + (table.price(mask) if table else 0)
+        self.product_qty[pid] = self.product_qty.get(pid, 0) + 1
+
+        line = self._latest.get(key)
+        if line is not None and (line.version == version or line.price == price):
+            line.qty += 1
+            self.totals.changed(line, 1)
+            return line, False
+
+        if key in self._index:
+            # Repriced since the existing line was added
+            key = (pid, mask, version)
+        line = CartLine(pid, key, product.name, price,
+                        table.text(mask) if table else "", 1, version)
+        self._index[key] = line
+        self._latest[(pid, mask)] = line
+        self.lines.append(line)
+        self.totals.changed(line, 1)
+        return line, True
+
+    def remove_one(self, key):
+        """Remove one unit from the line with `key`"""
+        line = self._index.get(key)
+        if line is None:
+            return
+
+        line.qty -= 1
+        self.totals.changed(line, -1)
+        pid = line.id
+        self.product_qty[pid] -= 1
+        if self.product_qty[pid] <= 0:
+            del self.product_qty[pid]
+        if line.qty <= 0:
+            del self._index[key]
+            self.lines.remove(line)
+            latest = key[:2]
+            if self._latest.get(latest) is line:
+                del self._latest[latest]
+
+    def increment(self, key):
+        """Add one unit to the existing line with `key`"""
+        line = self._index[key]
+        line.qty += 1
+        self.totals.changed(line, 1)
+        self.product_qty[line.id] = self.product_qty.get(line.id, 0) + 1
+
+    def restore(self, line):
+        """Append a line rebuilt from the cart journal, returning it"""
+        self._index[line.key] = line
+        self._latest[line.key[:2]] = line
+        self.lines.append(line)
+        self.product_qty[line.id] = self.product_qty.get(line.id, 0) + line.qty
+        self.totals.changed(line, line.qty)
+        return line
+
+    def clear(self):
+        self.lines = []
+        self._index = {}
+        self._latest = {}
+        self.product_qty = {}
+        self.totals.reset()
+
+    def reprice(self, rules):
+        """Price the cart under new pricing rules"""
+        self.totals.reprice(self.lines, rules)
+
+    def count(self):
+        return sum(line.qty for line in self.lines)
+
+    def subtotal(self):
+        """Before discounts and tax"""
+        return sum(line.price * line.qty for line in self.lines)
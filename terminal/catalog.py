@@ -0,0 +1,174 @@
+"""
+Windcave Terminal POS - Catalog
+Products and categories from a sync, plus the lookup tables that are
+built once per sync instead of on every tap.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+from records import product_from_json, category_from_json
+from search import SearchIndex
+from pricing import PricingRules
+
+
+class ModifierTable:
+    """Precomputed prices for one product's modifier groups.
+
+    Every option gets one bit in a selection mask, so a selection is a
+    plain int: cheap to hash, compare and store on a cart line. Required
+    groups are single-select (first option preselected), optional groups
+    toggle, matching the web simulator. Masks are packed into 32-bit
+    fields (open tabs, the input log), so options past MAX_OPTIONS are
+    dropped.
+    """
+
+    MAX_OPTIONS = 31
+
+    def __init__(self, groups):
+        self.groups = []      # (name, required, first_bit, option_count)
+        self.names = []       # option name per bit
+        self.prices = []      # option price per bit
+        self.group_of = []    # group index per bit
+        self.group_masks = []
+        self.default_mask = 0
+        self._price_cache = {0: 0}
+        self._text_cache = {0: ""}
+
+        bit = 0
+        for g, group in enumerate(groups):
+            options = group.get('options', [])
+            if bit + len(options) > self.MAX_OPTIONS:
+                print(f"[POS] Modifier group {group.get('name', '')}: "
+                      f"options past {self.MAX_OPTIONS} dropped")
+                options = options[:self.MAX_OPTIONS - bit]
+            required = bool(group.get('required'))
+            self.groups.append((group.get('name', ''), required, bit, len(options)))
+            self.group_masks.append(((1 << len(options)) - 1) << bit)
+            for opt in options:
+                self.names.append(opt.get('name', ''))
+                self.prices.append(opt.get('price', 0) or 0)
+                self.group_of.append(g)
+            if required and options:
+                self.default_mask |= 1 << bit
+            bit += len(options)
+
+    def toggle(self, mask, bit):
+        """Apply a tap on option `bit`, returning (new_mask, price_delta)"""
+        flag = 1 << bit
+        g = self.group_of[bit]
+        if self.groups[g][1]:
+            # Required: single select, swap the current option for this one
+            current = mask & self.group_masks[g]
+            if current == flag:
+                return mask, 0
+            delta = self.prices[bit]
+            if current:
+                delta -= self.prices[self._low_bit(current)]
+            return (mask & ~self.group_masks[g]) | flag, delta
+
+        if mask & flag:
+            return mask & ~flag, -self.prices[bit]
+        return mask | flag, self.prices[bit]
+
+    def price(self, mask):
+        """Total price of the options selected in `mask`"""
+        total = self._price_cache.get(mask)
+        if total is None:
+            total = 0
+            for bit in self._bits(mask):
+                total += self.prices[bit]
+            self._price_cache[mask] = total
+        return total
+
+    def text(self, mask):
+        """Comma separated option names for display on cart lines"""
+        text = self._text_cache.get(mask)
+        if text is None:
+            text = ", ".join(self.names[bit] for bit in self._bits(mask))
+            self._text_cache[mask] = text
+        return text
+
+    def _bits(self, mask):
+        bit = 0
+        while mask:
+            if mask & 1:
+                yield bit
+            mask >>= 1
+            bit += 1
+
+    @staticmethod
+    def _low_bit(mask):
+        bit = 0
+        while not mask & 1:
+            mask >>= 1
+            bit += 1
+        return bit
+
+
+class Catalog:
+    """Products and categories from one sync with their lookup tables
+
+    A catalog is an immutable snapshot: it is built completely before
+    the app swaps it in and is never modified afterwards, so widgets and
+    cart lines built from its Product records always see consistent data.
+    `version` orders snapshots (the backend's, or a local counter).
+    `rules` is the sync's pricing object, compiled into `pricing` with
+    `tax_rate` as the default tax rate.
+    """
+
+    def __init__(self, products=None, categories=None, version=0, rules=None, tax_rate=0.0):
+        self.version = version
+        self.products = products or []    # Product records
+        self.categories = categories or []
+        self.by_id = {}
+        self.modifiers = {}   # product id -> ModifierTable
+        self.barcodes = {}    # barcode / SKU -> product
+        self.by_category = {} # category id -> products, in catalog order
+
+        # Products sharing a modifier template share one table
+        shared = {}
+        for product in self.products:
+            self.by_id[product.id] = product
+            cat_id = product.category_id
+            if cat_id in self.by_category:
+                self.by_category[cat_id].append(product)
+            else:
+                self.by_category[cat_id] = [product]
+
+            if product.sku:
+                self.barcodes[str(product.sku)] = product
+            codes = product.barcode
+            if codes:
+                for code in (codes if isinstance(codes, list) else [codes]):
+                    self.barcodes[str(code)] = product
+
+            groups = product.modifiers
+            if groups:
+                table = shared.get(id(groups))
+                if table is None:
+                    table = shared[id(groups)] = ModifierTable(groups)
+                self.modifiers[product.id] = table
+
+        self.search = SearchIndex(self.products)
+        self.rules = rules
+        self.tax_rate = tax_rate
+        self.pricing = PricingRules(rules, self, tax_rate)
+
+    @classmethod
+    def from_json(cls, products, categories, version=0, tint_over=None, rules=None,
+                  tax_rate=0.0):
+        """Snapshot from sync payload lists - the only place dicts are read.
+
+        tint_over: background to pre-blend tile colors over (fast render
+        profile), or None to leave blending to LVGL
+        """
+        return cls([product_from_json(p, tint_over) for p in products],
+                   [category_from_json(c) for c in categories], version, rules, tax_rate)
+
+    def diff(self, old):
+        """Ids of products that are new or changed since snapshot `old`"""
+        changed = set()
+        for pid, product in self.by_id.items():
+            if old.by_id.get(pid) != product:
+                changed.add(pid)
+        return changed
@@ -14,6 +14,19 @@ BACKEND_URL = "http://192.168.1.100:5000"
 # Sync interval in milliseconds
 SYNC_INTERVAL_MS = 30000
 
+# Push updates: "sse", "longpoll", "ws" or None (interval polling only).
+# The backend announces catalog versions and the terminal syncs only
+# when told to; while the channel is connected, interval polling is
+# replaced by a safety sync every PUSH_RESYNC_MS. If it drops, polling
+# every SYNC_INTERVAL_MS resumes until it reconnects.
+PUSH_CHANNEL = None
+PUSH_RESYNC_MS = 15 * 60 * 1000
+
+# Identifies this terminal in telemetry reports (POST /api/telemetry)
+TERMINAL_ID = "terminal-1"
+# How often performance counters are posted (0 = never)
+TELEMETRY_INTERVAL_MS = 5 * 60 * 1000
+
 # Screen configuration (LVGL usable area - 28px reserved for system status icons)
 #
 # CHU200TxC / MTM300-C (3.5" terminals):
@@ -27,9 +40,115 @@ SYNC_INTERVAL_MS = 30000
 SCREEN_WIDTH = 320
 SCREEN_HEIGHT = 452
 
+# Batch UI updates into one flush per main loop cycle
+# (False = update widgets on every tap, for comparison benchmarks)
+RENDER_BATCHING = True
+
 # Tax rate (0.15 = 15% GST)
 TAX_RATE = 0.15
 
+# Optional LVGL binary fonts on flash (lv_font_conv --format bin)
+# FONT_FILES maps text size -> path; ICON_FONT is an emoji/icon subset
+# used as fallback for them. Built-in Montserrat 14/16/24 are used otherwise.
+FONT_FILES = {}
+ICON_FONT = None
+
+# Maximum products shown for a search (results reuse the product grid)
+SEARCH_MAX_RESULTS = 48
+
+# Product thumbnails (see build_thumbnails.py): flash cache directory,
+# decoded images kept in RAM, and how long the screen must be untouched
+# before thumbnails are downloaded/decoded
+THUMB_DIR = "/thumbs"
+THUMB_CACHE_ITEMS = 16
+THUMB_IDLE_MS = 300
+
+# Memory: garbage is collected in idle gaps (no touch for IDLE_MS)
+# once MEM_IDLE_ALLOC bytes have been allocated; MicroPython's own
+# collection only kicks in after MEM_GC_THRESHOLD. Below MEM_LOW_FREE
+# free bytes caches are shrunk. Heap stats are logged every
+# MEM_LOG_INTERVAL_MS (0 = off).
+IDLE_MS = 150
+MEM_LOW_FREE = 48 * 1024
+MEM_IDLE_ALLOC = 16 * 1024
+MEM_GC_THRESHOLD = 64 * 1024
+MEM_LOG_INTERVAL_MS = 15 * 60 * 1000
+
+# Category pages kept built (including the visible one). Likely next
+# categories are pre-rendered once the screen is idle for
+# PRERENDER_IDLE_MS, so switching to them is a visibility toggle.
+PRERENDER_PAGES = 4
+PRERENDER_IDLE_MS = 250
+
+# Styling profile: "full" (translucent tiles and shadows, as in the web
+# simulator) or "fast" (tile colors pre-blended at sync, outlines instead
+# of shadows - nothing alpha-blended on redraw). "auto" picks by terminal
+# model, identified by its screen size.
+RENDER_PROFILE = "auto"
+RENDER_PROFILE_BY_SCREEN = {
+    (320, 452): "full",   # CHU200TxC / MTM300-C
+    (800, 452): "fast",   # CHU200TW: 2.5x the pixels per full redraw
+}
+
+# Barcode scanner: "uart", "stdin", "udp", None to disable,
+# or "auto" (uart on the terminal, stdin in the simulator)
+SCANNER = "auto"
+SCANNER_UART = 1
+SCANNER_BAUD = 9600
+SCANNER_UDP_PORT = 9100
+
+# Payments: how long to wait for a card and for authorization before
+# giving up, and how long the approved screen stays up.
+# PAYMENT_PROVIDER is "windcave", "simulated", or "auto" (windcave on
+# the terminal, simulated elsewhere). The simulated provider waits
+# PAYMENT_SIM_CARD_MS for a card, then PAYMENT_SIM_AUTH_MS to authorize,
+# and declines every PAYMENT_SIM_DECLINE_EVERY-th payment (0 = never).
+PAYMENT_PROVIDER = "auto"
+PAYMENT_CARD_TIMEOUT_MS = 60000
+PAYMENT_AUTH_TIMEOUT_MS = 30000
+PAYMENT_DONE_MS = 1500
+PAYMENT_SIM_CARD_MS = 1500
+PAYMENT_SIM_AUTH_MS = 800
+PAYMENT_SIM_DECLINE_EVERY = 0
+
+# Cart journal: the order in progress is logged to flash (a few bytes
+# per tap) and restored on boot after a reboot or crash. The log is
+# compacted into a snapshot during idle time once it has
+# CART_JOURNAL_COMPACT records. None disables it.
+CART_JOURNAL_DIR = "/cart"
+CART_JOURNAL_COMPACT = 256
+
+# Open tabs (parked orders, opened from the cart header). Each is kept
+# packed at about 20 bytes per cart line, in RAM and as a file in
+# CART_JOURNAL_DIR so tabs survive a reboot.
+TABS_MAX = 40
+
+# Shift totals for X/Z reports (settings button). Each sale appends a
+# short record to SALES_FILE.log; every SALES_COMPACT sales the totals
+# are written to SALES_FILE during idle time. None keeps them in RAM.
+SALES_FILE = "/sales.json"
+SALES_COMPACT = 50
+
+# Favorites page (first in the category bar): the FAVORITES_SIZE
+# products sold most in the current daypart, with sales decaying by half
+# every FAVORITES_HALF_LIFE_DAYS. FAVORITES_DAYPARTS are the start hours
+# of the dayparts. Scores are saved to FAVORITES_FILE every few minutes
+# during idle time; None keeps them in RAM.
+FAVORITES_SIZE = 20
+FAVORITES_HALF_LIFE_DAYS = 7
+FAVORITES_DAYPARTS = (6, 11, 15, 18)
+FAVORITES_FILE = "/favorites.json"
+
+# Input log: the last INPUT_LOG_EVENTS taps, scans, searches, payments,
+# syncs and slow main loop cycles (over INPUT_LOG_SLOW_MS) in a fixed
+# ring buffer, to replay a reported lag in the headless harness
+# (run_headless.py --replay). Dumped to INPUT_LOG_FILE and posted to
+# /api/inputlog when the backend changes settings.inputLogRequest, or
+# with app.dump_inputs() from the REPL. 0 disables.
+INPUT_LOG_EVENTS = 512
+INPUT_LOG_SLOW_MS = 50
+INPUT_LOG_FILE = "/inputs.json"
+
 # Currency symbol
 CURRENCY = "$"
 
@@ -0,0 +1,132 @@
+"""
+Windcave Terminal POS - Favorites
+The products sold most lately at this time of day, for the Favorites
+page at the front of the category bar.
+
+Each daypart (breakfast, lunch, ... - see FAVORITES_DAYPARTS) keeps a
+score per product: units sold, exponentially decayed with a half-life of
+`half_life_days`. Decaying every score on every sale would be O(products),
+so instead each sale adds `qty * weight`, where the weight doubles every
+half-life: older sales count relatively less, and a sale costs one dict
+update per line. Once the weight gets large all scores are divided by
+it and it starts again from 1 (every 16 half-lives).
+
+Ranking sorts the scores, so it is left to rerank(), which the app calls
+during idle time when a sale, a new daypart or a new catalog made the
+list stale - never on a tap.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+import json
+import os
+import time
+
+_RESCALE_AT = 1 << 16
+# A product's sales in other dayparts count this much, so the page fills
+# up before a daypart has history of its own
+_OTHER_DAYPARTS = 0.1
+
+
+class Favorites:
+    """Decayed per-daypart sales scores and the current ranking"""
+
+    def __init__(self, size=20, half_life_days=7, dayparts=(6, 11, 15, 18),
+                 path=None, save_every_s=600):
+        self.size = size
+        self.half_life_s = half_life_days * 86400
+        self.dayparts = dayparts      # start hour of each daypart
+        self.path = path
+        self.save_every_s = save_every_s
+        self.scores = [{} for _ in dayparts]   # per daypart: product id -> score
+        self.origin = None            # time at which the weight was 1
+        self.ranked = []              # product ids on the page, best first
+        self.stale = True
+        self._ranked_for = None       # (daypart, catalog version) of `ranked`
+        self._unsaved = False
+        self._saved_at = time.time()
+        if path:
+            self._load()
+
+    def daypart(self, hour=None):
+        """Index of the daypart `hour` (default: now) falls in"""
+        if hour is None:
+            hour = time.localtime()[3]
+        part = len(self.dayparts) - 1     # before the first start: the last one
+        for i, start in enumerate(self.dayparts):
+            if hour >= start:
+                part = i
+        return part
+
+    def record(self, items, hour=None, now=None):
+        """Count a sale of `items` ((product id, qty) pairs)"""
+        if now is None:
+            now = time.time()
+        if self.origin is None:
+            self.origin = now
+        weight = 2 ** ((now - self.origin) / self.half_life_s)
+        if weight > _RESCALE_AT:
+            self._rescale(now, weight)
+            weight = 1
+
+        part = self.daypart(hour)
+        scores = self.scores[part]
+        for pid, qty in items:
+            scores[pid] = scores.get(pid, 0) + qty * weight
+        self.stale = True
+        self._unsaved = True
+
+    def _rescale(self, now, weight):
+        for scores in self.scores:
+            for pid in scores:
+                scores[pid] /= weight
+        self.origin = now
+
+    def needs_rerank(self, catalog_version, hour=None):
+        return self.stale or self._ranked_for != (self.daypart(hour), catalog_version)
+
+    def rerank(self, catalog, hour=None):
+        """Recompute the ranking; returns the products for the page"""
+        part = self.daypart(hour)
+        combined = dict(self.scores[part])
+        for i, scores in enumerate(self.scores):
+            if i != part:
+                for pid, score in scores.items():
+                    combined[pid] = combined.get(pid, 0) + score * _OTHER_DAYPARTS
+
+        by_id = catalog.by_id
+        ranked = sorted((pid for pid in combined if pid in by_id),
+                        key=lambda pid: combined[pid], reverse=True)
+        self.ranked = ranked[:self.size]
+        self.stale = False
+        self._ranked_for = (part, catalog.version)
+        return [by_id[pid] for pid in self.ranked]
+
+    # Persistence
+
+    def wants_save(self):
+        return self.path is not None and self._unsaved and \
+            time.time() - self._saved_at >= self.save_every_s
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"origin": self.origin, "scores": self.scores}, f)
+            os.rename(tmp, self.path)
+        except OSError as e:
+            print(f"[POS] Saving favorites failed: {e}")
+        self._unsaved = False
+        self._saved_at = time.time()
+        return True
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            scores = data["scores"]
+            if len(scores) == len(self.dayparts):
+                self.origin = data["origin"]
+                self.scores = scores
+        except (OSError, ValueError, KeyError):
+            pass
@@ -0,0 +1,142 @@
+"""
+Windcave Terminal POS - Fonts
+Resolves fonts once into a module-level table, loads optional binary
+fonts from flash, and keeps text free of glyphs the font can't draw.
+
+Built-in Montserrat fonts in the lv_micropython build: 14, 16, 24.
+Emoji (☕, 🛒, 📶 ...) are not in them; without an icon font loaded
+they are replaced or dropped once when text is set, instead of failing
+a glyph lookup on every redraw.
+"""
+
+import lvgl as lv
+
+_fonts = None       # size -> font
+_default = None
+_icon_font = None
+_loaded = []        # keep binfonts referenced for the app's lifetime
+
+_text_cache = {}    # (text, size) -> renderable text
+_glyph_cache = {}   # (size, codepoint) -> bool
+glyph_misses = {}   # codepoint -> number of distinct texts it was missing from
+
+# Built-in symbol used when an emoji icon can't be drawn
+ICON_FALLBACKS = {
+    "📶": lv.SYMBOL.WIFI,
+    "✓": lv.SYMBOL.OK,
+    "🛒": lv.SYMBOL.LIST,
+    "📦": lv.SYMBOL.DIRECTORY,
+    "🏪": lv.SYMBOL.HOME,
+    "⭐": lv.SYMBOL.CHARGE,
+}
+
+
+def init_fonts(font_files=None, icon_font_file=None):
+    """Build the font table; call once at startup before creating UI.
+
+    font_files maps size -> path of an LVGL binary font (lv_font_conv
+    --format bin) on flash, e.g. {20: "S:fonts/montserrat_20.bin"}.
+    icon_font_file is an emoji/icon subset used as fallback for them.
+    """
+    global _fonts, _default, _icon_font
+
+    _fonts = {
+        12: lv.font_montserrat_14,
+        14: lv.font_montserrat_14,
+        16: lv.font_montserrat_16,
+        18: lv.font_montserrat_16,
+        20: lv.font_montserrat_24,
+        22: lv.font_montserrat_24,
+        24: lv.font_montserrat_24,
+        28: lv.font_montserrat_24,
+        48: lv.font_montserrat_24,
+    }
+    _default = lv.font_montserrat_14
+
+    if icon_font_file:
+        _icon_font = _load(icon_font_file)
+
+    for size, path in (font_files or {}).items():
+        font = _load(path)
+        if font:
+            # Loaded fonts live in RAM, so unlike the built-ins they can
+            # fall back to the icon font for emoji
+            if _icon_font:
+                font.fallback = _icon_font
+            _fonts[size] = font
+
+    _text_cache.clear()
+    _glyph_cache.clear()
+
+
+def _load(path):
+    try:
+        font = lv.binfont_create(path)
+    except Exception as e:
+        print(f"[POS] Font {path} failed to load: {e}")
+        return None
+    if not font:
+        print(f"[POS] Font {path} not found")
+        return None
+    _loaded.append(font)
+    return font
+
+
+def get_font(size):
+    """Get the nearest available font for requested size"""
+    if _fonts is None:
+        init_fonts()
+    return _fonts.get(size, _default)
+
+
+def _has_glyph(size, cp):
+    key = (size, cp)
+    ok = _glyph_cache.get(key)
+    if ok is None:
+        dsc = lv.font_glyph_dsc_t()
+        ok = bool(get_font(size).get_glyph_dsc(dsc, cp, 0))
+        _glyph_cache[key] = ok
+    return ok
+
+
+def safe_text(text, size=14):
+    """Text with glyphs the font can't draw replaced or removed.
+
+    Checked once per distinct text; ASCII is always assumed present.
+    """
+    key = (text, size)
+    out = _text_cache.get(key)
+    if out is not None:
+        return out
+
+    parts = []
+    changed = False
+    for ch in text:
+        cp = ord(ch)
+        if cp < 0x80 or _has_glyph(size, cp):
+            parts.append(ch)
+            continue
+        changed = True
+        glyph_misses[cp] = glyph_misses.get(cp, 0) + 1
+        fallback = ICON_FALLBACKS.get(ch)
+        if fallback:
+            parts.append(fallback)
+
+    out = "".join(parts).strip() if changed else text
+    _text_cache[key] = out
+    return out
+
+
+def trim_text_cache():
+    """Drop checked texts (low memory); they are re-checked on next use"""
+    _text_cache.clear()
+
+
+def font_stats():
+    """Summary for logs: fonts loaded and glyphs that had to be replaced"""
+    return {
+        "loaded": len(_loaded),
+        "icon_font": _icon_font is not None,
+        "texts_checked": len(_text_cache),
+        "glyph_misses": {hex(cp): n for cp, n in glyph_misses.items()},
+    }
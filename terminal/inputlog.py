@@ -0,0 +1,96 @@
+"""
+Windcave Terminal POS - Input Log
+The last few hundred things the cashier did, kept so a reported lag can
+be replayed in the headless harness (headless/replay.py).
+
+Events are recorded at the app's handlers (product tapped, category
+selected, search keystroke, ...), not as raw touches, so a replay doesn't
+depend on widget positions. Sync results and slow frames go in the same
+buffer: a dump shows what the terminal measured next to the taps that
+led up to it.
+
+A fixed ring buffer, allocated up front: per event a ticks_ms stamp, a
+kind byte, one object reference (product id, category id, scanned code,
+query text - objects the app holds anyway) and one integer (modifier
+mask, duration). Recording is a few stores and never allocates; the
+oldest events are overwritten.
+"""
+
+import json
+import time
+from array import array
+
+# Event kinds: index into KINDS, the name used in dumps
+PRODUCT = 0       # arg: product id
+MODIFIERS = 1     # arg: product id, num: modifier mask
+SCAN = 2          # arg: scanned code
+REMOVE = 3        # arg: product id, num: modifier mask of the line
+CATEGORY = 4      # arg: category id (None: All)
+SEARCH = 5        # search opened
+QUERY = 6         # arg: search text
+SEARCH_CLOSE = 7
+PAY = 8           # num: items in the cart
+PAY_CANCEL = 9
+PAID = 10         # arg: payment state, num: ms since PAY
+TAB_NEW = 11
+TAB_SELECT = 12   # arg: tab name, num: tab id
+SETTINGS = 13
+SYNC = 14         # arg: catalog version, num: sync ms (-1: failed)
+SLOW_FRAME = 15   # num: loop cycle ms
+
+KINDS = ("product", "modifiers", "scan", "remove", "category", "search", "query",
+         "search_close", "pay", "pay_cancel", "paid", "tab_new", "tab_select",
+         "settings", "sync", "slow_frame")
+
+
+class InputLog:
+    """Ring buffer of the last `size` input events"""
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.times = array("i", [0] * size)
+        self.kinds = bytearray(size)
+        self.nums = array("i", [0] * size)
+        self.args = [None] * size
+        self.total = 0            # events recorded, including overwritten ones
+
+    def count(self):
+        """Events held (the last `size` recorded)"""
+        return min(self.total, self.size)
+
+    def record(self, kind, arg=None, num=0):
+        i = self.total % self.size
+        self.times[i] = time.ticks_ms()
+        self.kinds[i] = kind
+        self.args[i] = arg
+        self.nums[i] = num
+        self.total += 1
+
+    def events(self):
+        """Recorded events, oldest first, as [ms since the first, kind, arg, num]"""
+        count = self.count()
+        first = self.total - count
+        out = []
+        start = self.times[first % self.size]
+        for n in range(first, self.total):
+            i = n % self.size
+            arg = self.args[i]
+            out.append([time.ticks_diff(self.times[i], start), KINDS[self.kinds[i]],
+                        list(arg) if isinstance(arg, tuple) else arg, self.nums[i]])
+        return out
+
+    def dump(self, **header):
+        """The log as a JSON-ready trace dict; `header` fields are included"""
+        data = dict(header)
+        data["dropped"] = self.total - self.count()
+        data["events"] = self.events()
+        return data
+
+    def save(self, path, **header):
+        try:
+            with open(path, "w") as f:
+                json.dump(self.dump(**header), f)
+        except OSError as e:
+            print(f"[POS] Saving input log failed: {e}")
+            return False
+        return True
@@ -0,0 +1,220 @@
+"""
+Windcave Terminal POS - Cart Journal
+Keeps the order in progress on flash so a reboot or crash mid-order
+doesn't lose it, without rewriting the whole cart on every tap.
+
+Two files in the journal directory:
+- cart.log:  one short text record appended per cart change
+             N[...]  new line (everything needed to rebuild it)
+             +<id>   one more of line <id>
+             -<id>   one less of line <id>
+             C       cart cleared (sale finished)
+             P<tab>  cart parked as tab <tab> (written before the tab file)
+- cart.snap: the whole cart as JSON, written by compact() once the log
+             has grown, after which the log starts over; also names the
+             tab the order was just opened from
+
+Repeat taps cost 3-5 bytes; only a new line writes its name and price.
+New lines are self-contained, so replay doesn't depend on the catalog
+having the same version (or being loaded at all) on boot.
+
+Both files carry a generation number: the snapshot is replaced by
+renaming before the log is reset, and a log whose generation doesn't
+match the snapshot is stale and ignored. A torn last record (power cut
+mid-write) has no newline and is dropped.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+import json
+import os
+
+from records import CartLine
+
+LOG = "/cart.log"
+SNAPSHOT = "/cart.snap"
+
+
+class CartJournal:
+    """Append-only log of cart changes with periodic snapshots"""
+
+    def __init__(self, directory, compact_records=256):
+        self.directory = directory
+        self.compact_records = compact_records
+        self.records = 0          # records in the log since the last snapshot
+        self.bytes_written = 0
+        self.errors = 0
+        self._gen = 0
+        self._next = 0            # next line id
+        self._ids = {}            # line key -> id in the log
+        self._file = None
+
+        try:
+            os.mkdir(directory)
+        except OSError:
+            pass
+
+    # Recording
+
+    def added(self, line, is_new):
+        """One unit of `line` was added (as a new line if `is_new`)"""
+        if is_new:
+            lid = self._next
+            self._next += 1
+            self._ids[line.key] = lid
+            self._append("N" + json.dumps([lid, line.id, list(line.key[1:]), line.name,
+                                           line.price, line.mods, line.version]))
+        else:
+            lid = self._ids.get(line.key)
+            if lid is not None:
+                self._append(f"+{lid}")
+
+    def removed(self, line):
+        """One unit of `line` was removed"""
+        lid = self._ids.get(line.key)
+        if lid is None:
+            return
+        self._append(f"-{lid}")
+        if line.qty <= 0:
+            del self._ids[line.key]
+
+    def cleared(self):
+        """The cart was emptied"""
+        self._ids = {}
+        self._append("C")
+
+    def parked(self, tab_id):
+        """The cart is about to be parked as tab `tab_id` (and emptied)"""
+        self._ids = {}
+        self._append(f"P{tab_id}")
+
+    def _append(self, record):
+        data = (record + "\n").encode()
+        try:
+            if self._file is None:
+                self._file = open(self.directory + LOG, "ab")
+                if self._file.tell() == 0:
+                    self._file.write(f"@{self._gen}\n".encode())
+            self._file.write(data)
+            # littlefs commits the append on flush; nothing else is rewritten
+            self._file.flush()
+        except OSError as e:
+            self.errors += 1
+            if self.errors == 1:
+                print(f"[POS] Cart journal write failed: {e}")
+            return
+        self.records += 1
+        self.bytes_written += len(data)
+
+    # Compaction
+
+    def wants_compact(self):
+        return self.records >= self.compact_records
+
+    def compact(self, cart, tab=None):
+        """Snapshot `cart` and start a new log.
+
+        tab: id of the tab `cart` was just opened from - restore drops
+        that tab if its file is still there
+        """
+        gen = self._gen + 1
+        ids = {}
+        lines = []
+        for lid, line in enumerate(cart.lines):
+            ids[line.key] = lid
+            lines.append([lid, line.id, list(line.key[1:]), line.name, line.price,
+                          line.mods, line.version, line.qty])
+        tmp = self.directory + SNAPSHOT + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"gen": gen, "lines": lines, "tab": tab}, f)
+            os.rename(tmp, self.directory + SNAPSHOT)
+            self._close()
+            # The old log is ignored from here on (generation mismatch)
+            with open(self.directory + LOG, "wb") as f:
+                f.write(f"@{gen}\n".encode())
+        except OSError as e:
+            self.errors += 1
+            print(f"[POS] Cart journal compaction failed: {e}")
+            return False
+        self._gen = gen
+        self._next = len(lines)
+        self._ids = ids
+        self.records = 0
+        return True
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Recovery
+
+    def restore(self, cart, tabs=None):
+        """Rebuild the order in progress into (empty) `cart`; returns records replayed
+
+        tabs: the TabStore, to settle an order left both in a tab and in
+        the journal by a power cut while parking or opening it
+        """
+        by_id = {}
+        snap_gen = 0
+        try:
+            with open(self.directory + SNAPSHOT) as f:
+                snap = json.load(f)
+            snap_gen = snap["gen"]
+            opened = snap.get("tab")
+            if opened is not None and tabs is not None:
+                tabs.forget(opened)
+            for lid, pid, key, name, price, mods, version, qty in snap["lines"]:
+                by_id[lid] = cart.restore(CartLine(pid, tuple([pid] + key), name, price,
+                                                   mods, qty, version))
+        except (OSError, ValueError, KeyError, TypeError):
+            # No snapshot yet (or unreadable): the log alone describes the cart
+            cart.clear()
+            by_id = {}
+            snap_gen = 0
+
+        replayed = 0
+        try:
+            with open(self.directory + LOG, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        records = data.split(b"\n")
+        # The last element is "" after a complete record, or a torn one
+        records.pop()
+        if records and records[0] == f"@{snap_gen}".encode():
+            for record in records[1:]:
+                try:
+                    self._replay(record.decode(), cart, by_id, tabs)
+                except (ValueError, KeyError, TypeError, IndexError):
+                    # Damaged record: skip it rather than lose the order
+                    self.errors += 1
+                    continue
+                replayed += 1
+
+        # Start the next log from what was recovered (this also drops a
+        # torn or stale log)
+        self._gen = snap_gen
+        self.compact(cart)
+        return replayed
+
+    @staticmethod
+    def _replay(record, cart, by_id, tabs=None):
+        op = record[0]
+        if op == "N":
+            lid, pid, key, name, price, mods, version = json.loads(record[1:])
+            by_id[lid] = cart.restore(CartLine(pid, tuple([pid] + key), name, price,
+                                               mods, 1, version))
+        elif op == "+":
+            cart.increment(by_id[int(record[1:])].key)
+        elif op == "-":
+            cart.remove_one(by_id[int(record[1:])].key)
+        elif op == "C":
+            cart.clear()
+            by_id.clear()
+        elif op == "P":
+            # Parked: the order is in the tab if its file was written
+            if tabs is not None and tabs.has(int(record[1:])):
+                cart.clear()
+                by_id.clear()
@@ -7,23 +7,61 @@ web simulator at 1:1 pixel accuracy.
 """
 
 import lvgl as lv
+import json
 import time
 
 # Import configuration
 from config import (
-    BACKEND_URL, SYNC_INTERVAL_MS,
+    BACKEND_URL, SYNC_INTERVAL_MS, PUSH_CHANNEL, PUSH_RESYNC_MS,
     SCREEN_WIDTH, SCREEN_HEIGHT,
-    TAX_RATE, CURRENCY, BUSINESS_NAME
+    TAX_RATE, CURRENCY, BUSINESS_NAME,
+    SEARCH_MAX_RESULTS,
+    SCANNER, SCANNER_UART, SCANNER_BAUD, SCANNER_UDP_PORT,
+    RENDER_BATCHING, RENDER_PROFILE, RENDER_PROFILE_BY_SCREEN, FONT_FILES, ICON_FONT,
+    THUMB_DIR, THUMB_CACHE_ITEMS, THUMB_IDLE_MS,
+    IDLE_MS, MEM_LOW_FREE, MEM_IDLE_ALLOC, MEM_GC_THRESHOLD, MEM_LOG_INTERVAL_MS,
+    TERMINAL_ID, TELEMETRY_INTERVAL_MS,
+    PRERENDER_PAGES, PRERENDER_IDLE_MS,
+    PAYMENT_PROVIDER, PAYMENT_CARD_TIMEOUT_MS, PAYMENT_AUTH_TIMEOUT_MS, PAYMENT_DONE_MS,
+    PAYMENT_SIM_CARD_MS, PAYMENT_SIM_AUTH_MS, PAYMENT_SIM_DECLINE_EVERY,
+    CART_JOURNAL_DIR, CART_JOURNAL_COMPACT, TABS_MAX, SALES_FILE, SALES_COMPACT,
+    FAVORITES_SIZE, FAVORITES_HALF_LIFE_DAYS, FAVORITES_DAYPARTS, FAVORITES_FILE,
+    INPUT_LOG_EVENTS, INPUT_LOG_SLOW_MS, INPUT_LOG_FILE
 )
 
 # Import UI components
 from pos_ui import (
     Theme, Styles,
-    Header, CategoryBar, ProductGrid,
+    Header, CategoryBar, GridPages,
     CartPanel, CartPanelWide, PaymentScreen,
-    Notification
+    ModifierModal, TabsModal, SettingsScreen, SearchPanel, Notification
+)
+from fonts import init_fonts, font_stats, trim_text_cache
+from catalog import Catalog
+from cart import Cart
+from journal import CartJournal
+from tabs import TabStore
+from sales import SalesTotals
+from favorites import Favorites
+import inputlog
+from search import SearchSession
+from scanner import ScanStats, open_scanner
+from thumbs import ThumbCache
+from memory import MemoryManager
+from telemetry import Telemetry
+from push import PushChannel
+from payment import (
+    PaymentSession, SimulatedProvider, WindcaveProvider,
+    AUTHORIZING, APPROVED, DECLINED, TIMEOUT, CANCELLED
+)
+from render import (
+    RenderQueue, DIRTY_CART, DIRTY_BADGES, DIRTY_BADGES_ALL, DIRTY_TOAST
 )
 
+# Page key for search results (categories are keyed by id, "All" by None)
+SEARCH_PAGE = ("search",)
+FAVORITES_PAGE = ("favorites",)
+
 # Try to import Windcave-specific modules
 try:
     from windcave import display_driver, wifi, payment
@@ -49,22 +87,98 @@ class POSApp:
     """Main POS Application"""
 
     def __init__(self):
-        self.products = []
-        self.categories = []
-        self.cart = []
+        self.catalog = Catalog(tax_rate=TAX_RATE)
+        self.cart = Cart(self.catalog.pricing)
+        self.tabs = TabStore(CART_JOURNAL_DIR, TABS_MAX)   # parked orders
+        self.tab_name = None      # tab the current order was opened from
+        self._cart_title = None
+        self.sales = SalesTotals(SALES_FILE, SALES_COMPACT)   # shift totals for X/Z reports
+        self.favorites = Favorites(FAVORITES_SIZE, FAVORITES_HALF_LIFE_DAYS,
+                                   FAVORITES_DAYPARTS, FAVORITES_FILE)
         self.settings = {}
         self.active_category = None
+        self.search_query = ""
+        self.search_session = None
         self.last_sync = 0
+        self._category_use = {}   # (hour, category id) -> selections
+        self._likely = []         # pages worth pre-rendering next
+
+        # UI updates are batched and applied once per loop cycle
+        self.render = RenderQueue(self._apply_render, immediate=not RENDER_BATCHING)
+        self._toast = None
+        self._added = []
+        self._scans_pending = []
+
+        # Field performance counters, posted to the backend periodically
+        self.telemetry = Telemetry()
+        self.last_report = time.ticks_ms()
+        self._tap_us = None
+        self._tap_flushed = False
+
+        # Recent input for replaying a reported lag (headless/replay.py)
+        self.inputs = inputlog.InputLog(INPUT_LOG_EVENTS) if INPUT_LOG_EVENTS else None
+        self._input_request = None   # last settings.inputLogRequest handled
+
+        # Styling profile for this terminal model; the fast one needs tile
+        # colors pre-blended over the screen background at sync
+        profile = RENDER_PROFILE
+        if profile == "auto":
+            profile = RENDER_PROFILE_BY_SCREEN.get((SCREEN_WIDTH, SCREEN_HEIGHT), "full")
+        self.tint_over = Theme.BG_PRIMARY if profile == "fast" else None
 
-        # Initialize display and styles
+        # Initialize display, fonts and styles
         self._init_display()
-        Styles.init()
+        init_fonts(FONT_FILES, ICON_FONT)
+        Styles.init(fast=profile == "fast")
+
+        # Product thumbnails (downloaded and decoded during idle time)
+        self.thumbs = ThumbCache(
+            THUMB_DIR, 115 if SCREEN_WIDTH > 600 else 95,
+            base_url=BACKEND_URL, max_items=THUMB_CACHE_ITEMS,
+            http=requests if HAS_NETWORK else None
+        )
 
         # Build UI
         self._build_ui()
+        self.thumbs.on_ready = self.pages.set_thumb
+        self.thumbs.on_evict = self.pages.drop_thumb
+
+        # Catalog change notifications (interval polling while it is down)
+        self.push = None
+        if PUSH_CHANNEL and HAS_NETWORK and BACKEND_URL:
+            self.push = PushChannel(BACKEND_URL, PUSH_CHANNEL, TERMINAL_ID)
+        self._push_synced = None   # last announced version that was synced
+
+        # Card payments: a state machine polled from the main loop
+        self.payment_provider = self._open_payment_provider()
+        self.payment_session = None
+        self.payment_screen = None
 
         # Load initial data
         self._load_data()
+        print(f"[POS] Fonts: {font_stats()}")
+
+        # Order in progress when the terminal went down
+        self.journal = None
+        self._opened_tab = None   # tab whose file waits for a journal snapshot
+        if CART_JOURNAL_DIR:
+            self.journal = CartJournal(CART_JOURNAL_DIR, CART_JOURNAL_COMPACT)
+            self._restore_cart()
+
+        # Barcode scanner
+        kind = SCANNER
+        if kind == "auto":
+            kind = "stdin" if SIMULATOR else "uart"
+        self.scanner = open_scanner(kind, SCANNER_UART, SCANNER_BAUD, SCANNER_UDP_PORT) if kind else None
+        self.scan_stats = ScanStats()
+
+        # GC runs in idle gaps; caches shed memory below the budget
+        self.memory = MemoryManager(MEM_LOW_FREE, MEM_IDLE_ALLOC,
+                                    threshold=MEM_GC_THRESHOLD,
+                                    log_interval_ms=MEM_LOG_INTERVAL_MS)
+        self.memory.on_low(lambda: self.thumbs.shrink(max(4, self.thumbs.max_items // 2)))
+        self.memory.on_low(trim_text_cache)
+        self.memory.on_low(self.pages.shrink)
 
     def _init_display(self):
         """Initialize LVGL display"""
@@ -84,16 +198,23 @@ class POSApp:
         else:
             self._build_compact()
 
+        # Shared modifier picker (hidden until a product with modifiers is tapped)
+        self.modifier_modal = ModifierModal(self.screen, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.tabs_modal = TabsModal(self.screen, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.settings_screen = SettingsScreen(self.screen, SCREEN_WIDTH, SCREEN_HEIGHT)
+
     def _build_compact(self):
         """Build UI for 3.5" display (320x452 usable area)"""
         # Header (with settings button)
-        self.header = Header(self.screen, 320, 44, on_settings=self._on_settings)
+        self.header = Header(self.screen, 320, 44, on_settings=self._on_settings,
+                             on_search=self._on_search)
         self.header.container.set_pos(0, 0)
 
         # Category bar
         self.category_bar = CategoryBar(
             self.screen, 320, 40,
-            on_select=self._on_category_select
+            on_select=self._on_category_select,
+            favorites_key=FAVORITES_PAGE
         )
         self.category_bar.container.set_pos(0, 44)
 
@@ -106,24 +227,37 @@ class POSApp:
         product_container.set_style_pad_all(8, 0)
         product_container.set_scrollbar_mode(lv.SCROLLBAR_MODE.AUTO)
 
-        self.product_grid = ProductGrid(
-            product_container,
+        self.pages = GridPages(
+            product_container, self._products_for, PRERENDER_PAGES,
             btn_size=95,
-            on_select=self._on_product_select
+            on_select=self._on_product_select,
+            thumbs=self.thumbs
         )
+        self.product_grid = self.pages.show(None)
 
         # Cart panel
         self.cart_panel = CartPanel(
             self.screen, 320, 140,
             on_pay=self._on_pay,
-            on_item_click=self._on_cart_item_click
+            on_item_click=self._on_cart_item_click,
+            on_tabs=self._on_tabs
         )
         self.cart_panel.container.set_pos(0, 312)
 
+        # Search: field over the category bar, reduced keyboard over the cart
+        self.search_panel = SearchPanel(
+            self.screen, 320, 40, 320, 140, compact=True,
+            on_query=self._on_search_query,
+            on_close=self._on_search_close
+        )
+        self.search_panel.bar.set_pos(0, 44)
+        self.search_panel.keyboard.set_pos(0, 312)
+
     def _build_widescreen(self):
         """Build UI for 8" display (800x452 usable area)"""
         # Header (with settings button)
-        self.header = Header(self.screen, 800, 52, on_settings=self._on_settings)
+        self.header = Header(self.screen, 800, 52, on_settings=self._on_settings,
+                             on_search=self._on_search)
         self.header.container.set_pos(0, 0)
 
         # Left panel (products)
@@ -137,7 +271,8 @@ class POSApp:
         # Category bar
         self.category_bar = CategoryBar(
             left_panel, 520, 46,
-            on_select=self._on_category_select
+            on_select=self._on_category_select,
+            favorites_key=FAVORITES_PAGE
         )
         self.category_bar.container.set_pos(0, 0)
 
@@ -150,17 +285,20 @@ class POSApp:
         product_container.set_style_pad_all(12, 0)
         product_container.set_scrollbar_mode(lv.SCROLLBAR_MODE.AUTO)
 
-        self.product_grid = ProductGrid(
-            product_container,
+        self.pages = GridPages(
+            product_container, self._products_for, PRERENDER_PAGES,
             btn_size=115,
-            on_select=self._on_product_select
+            on_select=self._on_product_select,
+            thumbs=self.thumbs
         )
+        self.product_grid = self.pages.show(None)
 
         # Cart panel (right side)
         self.cart_panel = CartPanelWide(
             self.screen, 280, 400,
             on_pay=self._on_pay,
-            on_item_click=self._on_cart_item_click
+            on_item_click=self._on_cart_item_click,
+            on_tabs=self._on_tabs
         )
         self.cart_panel.container.set_pos(520, 52)
         self.cart_panel.container.set_style_radius(0, 0)
@@ -168,6 +306,15 @@ class POSApp:
         self.cart_panel.container.set_style_border_side(lv.BORDER_SIDE.LEFT, 0)
         self.cart_panel.container.set_style_border_color(Theme.hex(Theme.DIVIDER), 0)
 
+        # Search: field over the category bar, full keyboard over the grid
+        self.search_panel = SearchPanel(
+            self.screen, 520, 46, 520, 180,
+            on_query=self._on_search_query,
+            on_close=self._on_search_close
+        )
+        self.search_panel.bar.set_pos(0, 52)
+        self.search_panel.keyboard.set_pos(0, 272)
+
     def _load_data(self):
         """Load products from backend or demo data"""
         if HAS_NETWORK and BACKEND_URL:
@@ -175,43 +322,150 @@ class POSApp:
                 self._sync_with_backend()
             except Exception as e:
                 print(f"[POS] Sync failed: {e}")
+                self.telemetry.count("sync_failed")
                 self._load_demo_data()
         else:
             self._load_demo_data()
 
-        self._update_display()
-
     def _sync_with_backend(self):
-        """Fetch data from backend API"""
-        response = requests.get(f"{BACKEND_URL}/api/sync")
-        if response.status_code == 200:
-            data = response.json()
-            self.products = data.get('products', [])
-            self.categories = data.get('categories', [])
-            self.settings = data.get('settings', {})
-            self.last_sync = time.ticks_ms()
-            print(f"[POS] Synced {len(self.products)} products")
-            Notification(self.screen, "Sync Complete", style="success")
-        else:
-            Notification(self.screen, "Sync Failed", style="error")
+        """Fetch data from backend API and swap in the new catalog"""
+        start = time.ticks_ms()
+        announced = self.push.version if self.push else None
+        response = requests.get(f"{BACKEND_URL}/api/sync?terminal={TERMINAL_ID}")
+        ok = response.status_code == 200
+        body = response.content if ok else None
         response.close()
+        if not ok:
+            self.telemetry.count("sync_failed")
+            if self.inputs:
+                self.inputs.record(inputlog.SYNC, None, -1)
+            self._notify("Sync Failed", style="error")
+            return
+
+        # Build the whole snapshot before touching app state: if parsing
+        # fails half way, the current catalog stays in place untouched
+        data = json.loads(body)
+        catalog = Catalog.from_json(data.get('products', []), data.get('categories', []),
+                                    data.get('version', self.catalog.version + 1),
+                                    self.tint_over, data.get('pricing'), TAX_RATE)
+        self.telemetry.record("sync_bytes", len(body))
+
+        self._swap_catalog(catalog, data.get('settings', {}))
+        self.last_sync = time.ticks_ms()
+        self._push_synced = announced
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        self.telemetry.record("sync_ms", elapsed)
+        if self.inputs:
+            self.inputs.record(inputlog.SYNC, catalog.version, elapsed)
+        print(f"[POS] Synced {len(self.catalog.products)} products (v{catalog.version})")
+        self._notify("Sync Complete", style="success")
+
+    def _swap_catalog(self, catalog, settings=None):
+        """Make `catalog` current and update only the tiles that changed"""
+        old = self.catalog
+        self.catalog = catalog
+        # A payment in progress keeps the total it was started with; the
+        # cart is repriced when it closes
+        if not self.payment_screen:
+            self.cart.reprice(catalog.pricing)
+        if settings is not None:
+            self.settings = settings
+            self._check_input_request()
+        self._sync_thumbs()
+        self._update_display(catalog.diff(old))
+
+    def _report_telemetry(self):
+        """Post this period's counters; they keep accumulating if it fails"""
+        now = time.ticks_ms()
+        self.telemetry.low_water("heap_free", self.memory.period_low())
+        report = self.telemetry.snapshot()
+        report["terminal"] = TERMINAL_ID
+        report["period_ms"] = time.ticks_diff(now, self.last_report)
+        try:
+            response = requests.post(f"{BACKEND_URL}/api/telemetry", json=report)
+            if response.status_code == 200:
+                self.telemetry.reset()
+                self.last_report = now
+            response.close()
+        except Exception as e:
+            print(f"[POS] Telemetry report failed: {e}")
+
+    def _check_input_request(self):
+        """Dump the input log when the backend asks (settings.inputLogRequest changed)"""
+        request = self.settings.get("inputLogRequest", 0)
+        previous = self._input_request
+        self._input_request = request
+        # The first sync after boot only learns the current request
+        if previous is not None and request != previous:
+            self.dump_inputs()
+
+    def dump_inputs(self, post=True):
+        """Save the input log to INPUT_LOG_FILE (and post it to the backend).
+
+        Also meant for the REPL: `app.dump_inputs()` when a lag was seen.
+        """
+        if not self.inputs:
+            return None
+        header = {"terminal": TERMINAL_ID, "catalog_version": self.catalog.version,
+                  "screen": [SCREEN_WIDTH, SCREEN_HEIGHT]}
+        if INPUT_LOG_FILE:
+            self.inputs.save(INPUT_LOG_FILE, **header)
+        if post and HAS_NETWORK and BACKEND_URL:
+            try:
+                response = requests.post(f"{BACKEND_URL}/api/inputlog",
+                                         json=self.inputs.dump(**header))
+                response.close()
+            except Exception as e:
+                print(f"[POS] Input log upload failed: {e}")
+        print(f"[POS] Input log: {self.inputs.count()} events dumped")
+        return INPUT_LOG_FILE
+
+    def _sync_thumbs(self):
+        """Drop thumbnails no longer in the catalog, queue the new ones"""
+        digests = []
+        for product in self.catalog.products:
+            digest = self.thumbs.key_for(product)
+            if digest:
+                digests.append(digest)
+        self.thumbs.prune(set(digests))
+        self.thumbs.prefetch(digests)
 
     def _load_demo_data(self):
         """Load demo data for testing"""
-        self.categories = [
+        coffee_modifiers = [
+            {"name": "Size", "required": True, "options": [
+                {"name": "Regular", "price": 0},
+                {"name": "Large", "price": 1.00},
+            ]},
+            {"name": "Milk", "required": False, "options": [
+                {"name": "Full Cream", "price": 0},
+                {"name": "Skim", "price": 0},
+                {"name": "Oat", "price": 0.80},
+                {"name": "Almond", "price": 0.80},
+                {"name": "Soy", "price": 0.50},
+            ]},
+            {"name": "Extras", "required": False, "options": [
+                {"name": "Extra Shot", "price": 0.50},
+                {"name": "Decaf", "price": 0},
+                {"name": "Vanilla Syrup", "price": 0.50},
+                {"name": "Caramel Syrup", "price": 0.50},
+            ]},
+        ]
+
+        categories = [
             {"id": "cat-1", "name": "Coffee", "icon": "☕", "color": "#8B4513"},
             {"id": "cat-2", "name": "Food", "icon": "🍽", "color": "#228B22"},
             {"id": "cat-3", "name": "Drinks", "icon": "🥤", "color": "#4169E1"},
             {"id": "cat-4", "name": "Desserts", "icon": "🍰", "color": "#FF69B4"},
         ]
 
-        self.products = [
-            {"id": "p1", "name": "Flat White", "price": 5.50, "category_id": "cat-1", "color": "#D4A574"},
-            {"id": "p2", "name": "Cappuccino", "price": 5.50, "category_id": "cat-1", "color": "#C4A484"},
-            {"id": "p3", "name": "Long Black", "price": 5.00, "category_id": "cat-1", "color": "#3C2415"},
-            {"id": "p4", "name": "Latte", "price": 5.50, "category_id": "cat-1", "color": "#E8D4B8"},
-            {"id": "p5", "name": "Mocha", "price": 6.00, "category_id": "cat-1", "color": "#5C4033"},
-            {"id": "p6", "name": "Espresso", "price": 4.00, "category_id": "cat-1", "color": "#2C1810"},
+        products = [
+            {"id": "p1", "name": "Flat White", "price": 5.50, "category_id": "cat-1", "color": "#D4A574", "modifiers": coffee_modifiers},
+            {"id": "p2", "name": "Cappuccino", "price": 5.50, "category_id": "cat-1", "color": "#C4A484", "modifiers": coffee_modifiers},
+            {"id": "p3", "name": "Long Black", "price": 5.00, "category_id": "cat-1", "color": "#3C2415", "modifiers": coffee_modifiers},
+            {"id": "p4", "name": "Latte", "price": 5.50, "category_id": "cat-1", "color": "#E8D4B8", "modifiers": coffee_modifiers},
+            {"id": "p5", "name": "Mocha", "price": 6.00, "category_id": "cat-1", "color": "#5C4033", "modifiers": coffee_modifiers},
+            {"id": "p6", "name": "Espresso", "price": 4.00, "category_id": "cat-1", "color": "#2C1810", "modifiers": coffee_modifiers},
             {"id": "p7", "name": "Avo Toast", "price": 16.00, "category_id": "cat-2", "color": "#568203"},
             {"id": "p8", "name": "Eggs Bene", "price": 22.00, "category_id": "cat-2", "color": "#FFD700"},
             {"id": "p9", "name": "Bacon Eggs", "price": 18.00, "category_id": "cat-2", "color": "#CD853F"},
@@ -223,162 +477,553 @@ class POSApp:
             {"id": "p15", "name": "Brownie", "price": 7.00, "category_id": "cat-4", "color": "#3D2314"},
         ]
 
-        print(f"[POS] Loaded {len(self.products)} demo products")
+        self._swap_catalog(Catalog.from_json(products, categories, self.catalog.version + 1,
+                                             self.tint_over, None, TAX_RATE))
+        print(f"[POS] Loaded {len(products)} demo products")
 
-    def _update_display(self):
-        """Refresh UI with current data"""
-        self.category_bar.set_categories(self.categories)
+    def _update_display(self, changed=None):
+        """Refresh UI with current data
+
+        changed: ids of products that differ from the previous catalog
+        (None rebuilds every page)
+        """
+        self.category_bar.set_categories(self.catalog.categories)
+        # The active category may have been removed by the sync
+        self.active_category = self.category_bar.active_id
+        if changed is None:
+            self.pages.invalidate()
+        else:
+            self.pages.refresh(changed)
         self._filter_products()
-        self._update_cart()
-        
-        # Update badges on initial load/refresh
-        self.product_grid.update_badges(self.cart)
+        self.render.mark(DIRTY_CART)
 
     def _filter_products(self):
-        """Filter products by active category"""
-        if self.active_category:
-            filtered = [p for p in self.products if p.get('category_id') == self.active_category]
+        """Show the page for the active category (or the open search)"""
+        if self.search_query:
+            # Catalog may have changed under an open search - requery
+            self.search_session = SearchSession(self.catalog.search, SEARCH_MAX_RESULTS)
+            self._show_page(SEARCH_PAGE, rebuild=True)
         else:
-            filtered = self.products
+            self._show_page(self.active_category)
+        self._likely = self._likely_categories()
+
+    def _products_for(self, key):
+        """Products on the page for `key`"""
+        if key == SEARCH_PAGE:
+            if self.search_session is None:
+                return []
+            return self.search_session.update(self.search_query)
+        if key == FAVORITES_PAGE:
+            # Looked up by id, so a sync while the page is shown can't
+            # leave it with products from the old catalog
+            by_id = self.catalog.by_id
+            return [by_id[pid] for pid in self.favorites.ranked if pid in by_id]
+        if key is None:
+            return self.catalog.products
+        return self.catalog.by_category.get(key, [])
 
-        self.product_grid.set_products(filtered)
-        # Ensure badges are shown for the new set of products
-        self.product_grid.update_badges(self.cart)
+    def _show_page(self, key, rebuild=False):
+        hits = self.pages.hits
+        start = time.ticks_us()
+        self.product_grid = self.pages.show(key, rebuild)
+        # Badges on a pre-rendered page may be from an older cart
+        self.product_grid.update_badges(self.cart.product_qty)
+        self.telemetry.record("grid_rebuild_us", time.ticks_diff(time.ticks_us(), start))
+
+        if not rebuild:
+            self.telemetry.count("page_hit" if self.pages.hits > hits else "page_miss")
+            shown = self.pages.hits + self.pages.misses
+            if shown % 50 == 0:
+                print(f"[POS] Pages: {self.pages.stats()}")
+
+    def _likely_categories(self):
+        """Categories to pre-render: most used at this hour, then bar neighbours"""
+        ids = [cat_id for _, cat_id in self.category_bar.buttons
+               if cat_id != FAVORITES_PAGE or self.favorites.ranked]
+        active = self.active_category
+        hour = time.localtime()[3]
+
+        used = [(n, cat_id) for (h, cat_id), n in self._category_use.items()
+                if h == hour and cat_id != active and cat_id in ids]
+        used.sort(key=lambda u: u[0], reverse=True)
+        likely = [cat_id for _, cat_id in used[:2]]
+
+        i = ids.index(active) if active in ids else 0
+        for j in (i + 1, i - 1):
+            if 0 <= j < len(ids) and ids[j] not in likely:
+                likely.append(ids[j])
+        # Leave room for the visible page
+        return likely[:max(0, PRERENDER_PAGES - 1)]
+
+    def _update_favorites(self):
+        """Idle step: re-rank the Favorites page, or save the scores"""
+        favorites = self.favorites
+        # Not while the page is on screen - it would reshuffle under a tap
+        if self.active_category != FAVORITES_PAGE and \
+                favorites.needs_rerank(self.catalog.version):
+            start = time.ticks_us()
+            products = favorites.rerank(self.catalog)
+            self.pages.invalidate(FAVORITES_PAGE)
+            self.category_bar.show_favorites(bool(products))
+            self.telemetry.record("favorites_rerank_us",
+                                  time.ticks_diff(time.ticks_us(), start))
+            return True
+        if favorites.wants_save():
+            return favorites.save()
+        return False
+
+    def _cart_total(self):
+        """Cart total after discounts, including tax"""
+        return self.cart.totals.total / 100
 
     def _update_cart(self):
         """Update cart display"""
-        subtotal = sum(item['price'] * item['qty'] for item in self.cart)
-        total = subtotal * (1 + TAX_RATE)
-        self.cart_panel.update(self.cart, total)
+        self.cart_panel.update(self.cart.lines, self._cart_total(),
+                               self.cart.totals.discount / 100)
+
+        title = self.tab_name or ("Current Order" if SCREEN_WIDTH > 600 else "Cart")
+        if self.tabs:
+            title += f" (+{len(self.tabs)} open)"
+        if title != self._cart_title:
+            self._cart_title = title
+            self.cart_panel.set_title(title)
+
+    def _notify(self, text, style="info", duration=2000):
+        """Queue a notification; only the last one per frame is shown"""
+        self._toast = (text, style, duration)
+        self.render.mark(DIRTY_TOAST)
+
+    def _apply_render(self, dirty, ids):
+        """Apply everything marked dirty since the last flush"""
+        if dirty & DIRTY_CART:
+            self._update_cart()
+
+        if dirty & DIRTY_BADGES_ALL:
+            self.product_grid.update_badges(self.cart.product_qty)
+        elif dirty & DIRTY_BADGES:
+            self.product_grid.update_badges(self.cart.product_qty, ids)
+
+        if dirty & DIRTY_TOAST:
+            if self._added:
+                # Coalesce adds from one frame into a single toast
+                count = len(self._added)
+                text = f"Added {self._added[0]}" if count == 1 else f"Added {count} items"
+                Notification(self.screen, text, duration=1500, style="success")
+                self._added = []
+            if self._toast:
+                text, style, duration = self._toast
+                Notification(self.screen, text, duration=duration, style=style)
+                self._toast = None
+
+        # Scans are done once the cart they changed is on screen
+        if self._scans_pending:
+            now = time.ticks_us()
+            for received_us in self._scans_pending:
+                us = time.ticks_diff(now, received_us)
+                self.scan_stats.record(us)
+                self.telemetry.record("scan_us", us)
+                if self.scan_stats.count % 50 == 0:
+                    print(f"[POS] Scan latency: {self.scan_stats.summary()}")
+            self._scans_pending = []
 
     # Event handlers
     def _on_settings(self):
-        """Handle settings button press"""
-        # TODO: Show settings screen
-        print("[POS] Settings button pressed")
-        Notification(self.screen, "Settings not implemented", style="info")
+        """Handle settings button press - shift report (X) and close day (Z)"""
+        if self.inputs:
+            self.inputs.record(inputlog.SETTINGS)
+        self.settings_screen.open(self.sales.report(self.catalog, currency=CURRENCY),
+                                  self._on_close_day)
+
+    def _on_close_day(self):
+        """Z report: final totals for the shift, then start a new one"""
+        text = self.sales.close_day(self.catalog, CURRENCY)
+        print(f"[POS] {text}")
+        return text
+
+    def _on_search(self):
+        """Handle search button press"""
+        if self.inputs:
+            self.inputs.record(inputlog.SEARCH)
+        if self.search_panel.is_open():
+            self.search_panel.close()
+            return
+        self.search_query = ""
+        self.search_session = SearchSession(self.catalog.search, SEARCH_MAX_RESULTS)
+        self.search_panel.open()
+
+    def _on_search_query(self, text):
+        """Handle search field change - one keystroke"""
+        if self.inputs:
+            self.inputs.record(inputlog.QUERY, text)
+        self.search_query = text.strip()
+        if not self.search_query:
+            self._filter_products()
+            return
+        self._show_page(SEARCH_PAGE, rebuild=True)
+
+    def _on_search_close(self):
+        """Leave search mode and restore the category view"""
+        if self.inputs:
+            self.inputs.record(inputlog.SEARCH_CLOSE)
+        self.search_query = ""
+        self.search_session = None
+        self._filter_products()
 
     def _on_category_select(self, category_id):
         """Handle category button press"""
+        if self.inputs:
+            self.inputs.record(inputlog.CATEGORY, category_id)
+        key = (time.localtime()[3], category_id)
+        self._category_use[key] = self._category_use.get(key, 0) + 1
         self.active_category = category_id
         self._filter_products()
 
+    def _restore_cart(self):
+        start = time.ticks_ms()
+        replayed = self.journal.restore(self.cart, self.tabs)
+        if not self.cart:
+            return
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        self.telemetry.record("cart_restore_ms", elapsed)
+        print(f"[POS] Restored order: {self.cart.count()} items, "
+              f"{replayed} records in {elapsed} ms")
+        self.render.mark(DIRTY_CART | DIRTY_BADGES_ALL)
+
     def _on_product_select(self, product):
-        """Handle product tap - add to cart"""
-        # Check if already in cart
-        for item in self.cart:
-            if item['id'] == product['id']:
-                item['qty'] += 1
-                self._update_cart()
-                self.product_grid.update_badges(self.cart)
-                # Brief notification for multi-add
-                # Notification(self.screen, f"+1 {product['name']}", duration=1000, style="success")
-                return
-
-        # Add new item
-        self.cart.append({
-            'id': product['id'],
-            'name': product['name'],
-            'price': product['price'],
-            'qty': 1
-        })
-        self._update_cart()
-        self.product_grid.update_badges(self.cart)
-        Notification(self.screen, f"Added {product['name']}", duration=1500, style="success")
+        """Handle product tap - add to cart (via modifier picker if needed)"""
+        if self.inputs:
+            self.inputs.record(inputlog.PRODUCT, product.id)
+        table = self.catalog.modifiers.get(product.id)
+        if table:
+            self.modifier_modal.open(product, table, self._on_modifiers_confirm)
+            return
+        self._tap()
+        self._add_to_cart(product)
+
+    def _on_modifiers_confirm(self, product, mask):
+        if self.inputs:
+            self.inputs.record(inputlog.MODIFIERS, product.id, mask)
+        self._tap()
+        self._add_to_cart(product, mask)
+
+    def _tap(self):
+        """Start timing tap-to-render for the first tap since the last frame"""
+        if self._tap_us is None:
+            self._tap_us = time.ticks_us()
+
+    def _add_to_cart(self, product, mask=0):
+        """Add one of product (with modifier selection mask) to the cart"""
+        table = self.catalog.modifiers.get(product.id)
+        line, is_new = self.cart.add(product, mask, table, self.catalog.version)
+        if self.journal:
+            self.journal.added(line, is_new)
+        self.render.mark(DIRTY_CART | DIRTY_BADGES, product.id)
+        if is_new:
+            self._added.append(product.name)
+            self.render.mark(DIRTY_TOAST)
+
+    def _on_scan(self, code, received_us):
+        """Handle a scanned barcode - same cart path as a tap, no grid involved"""
+        if self.inputs:
+            self.inputs.record(inputlog.SCAN, code)
+        if self.payment_session:
+            # The amount is already on the reader
+            self._notify("Payment in progress", style="error")
+            return
+
+        product = self.catalog.barcodes.get(code)
+        if product is None:
+            self.scan_stats.misses += 1
+            self._notify(f"Unknown code {code}", style="error")
+            return
+
+        # Scanned items take their default (required) modifiers
+        table = self.catalog.modifiers.get(product.id)
+        self._scans_pending.append(received_us)
+        self._add_to_cart(product, table.default_mask if table else 0)
 
     def _on_cart_item_click(self, item):
         """Handle cart item tap - remove one"""
-        for cart_item in self.cart:
-            if cart_item['id'] == item['id']:
-                cart_item['qty'] -= 1
-                if cart_item['qty'] <= 0:
-                    self.cart.remove(cart_item)
-                break
-        self._update_cart()
-        self.product_grid.update_badges(self.cart)
+        if self.inputs:
+            self.inputs.record(inputlog.REMOVE, item.id, item.key[1])
+        self._tap()
+        self.cart.remove_one(item.key)
+        if self.journal:
+            self.journal.removed(item)
+        self.render.mark(DIRTY_CART | DIRTY_BADGES, item.id)
 
-    def _on_pay(self):
-        """Handle pay button press"""
+    def _on_tabs(self):
+        """Cart header tapped - list open tabs"""
+        if self.payment_session:
+            return
+        self.tabs_modal.open(self.tabs, self._on_tab_select, self._on_tab_new)
+
+    def _park_order(self):
+        """Park the current order as a tab; False if there is no room"""
         if not self.cart:
+            return True
+        if self.tabs.full():
+            self._notify(f"{TABS_MAX} tabs already open", style="error")
+            return False
+        # Journal first: if the power goes before the journal is compacted,
+        # restore drops the order from the cart once its tab file exists
+        if self.journal:
+            self.journal.parked(self.tabs.next_id())
+        self.tabs.park(self.cart, self.tab_name)
+        self._tab_done()
+        self.cart.clear()
+        self.tab_name = None
+        return True
+
+    def _on_tab_new(self):
+        """Park the current order and start an empty one"""
+        if self.inputs:
+            self.inputs.record(inputlog.TAB_NEW)
+        if self._park_order():
+            self._order_switched()
+
+    def _on_tab_select(self, tab):
+        """Switch to a parked tab, parking the current order in its place"""
+        if self.inputs:
+            self.inputs.record(inputlog.TAB_SELECT, tab.name, tab.id)
+        start = time.ticks_us()
+        if not self._park_order():
+            return
+        # The tab file goes only once the journal holds the order
+        self.tabs.open(tab, self.cart, self.catalog, keep_file=bool(self.journal))
+        self.tab_name = tab.name
+        self._order_switched(tab)
+        self.telemetry.record("tab_switch_us", time.ticks_diff(time.ticks_us(), start))
+
+    def _order_switched(self, opened=None):
+        # The journal describes the current order only: start it afresh,
+        # noting the tab it came from in case that tab's file outlives it
+        if self.journal:
+            if opened:
+                self._opened_tab = opened.id
+            if not self._compact_journal():
+                self._notify("Order switch not saved - check storage", style="error")
+        self.render.mark(DIRTY_CART | DIRTY_BADGES_ALL)
+
+    def _compact_journal(self):
+        """Snapshot the cart journal; the opened tab's file goes once that worked"""
+        if not self.journal.compact(self.cart, self._opened_tab):
+            # The tab file stays, so a reboot still finds the order as a tab
+            return False
+        self._tab_done()
+        return True
+
+    def _tab_done(self):
+        """The opened tab's order is saved elsewhere: drop its file"""
+        if self._opened_tab is not None:
+            self.tabs.forget(self._opened_tab)
+            self._opened_tab = None
+
+    def _open_payment_provider(self):
+        kind = PAYMENT_PROVIDER
+        if kind == "auto":
+            kind = "simulated" if SIMULATOR else "windcave"
+        if kind == "windcave" and not SIMULATOR:
+            return WindcaveProvider(payment)
+        # LVGL ticks, so the headless harness can fast-forward payments
+        return SimulatedProvider(PAYMENT_SIM_CARD_MS, PAYMENT_SIM_AUTH_MS,
+                                 PAYMENT_SIM_DECLINE_EVERY, clock=lv.tick_get)
+
+    def _on_pay(self):
+        """Handle pay button press - starts the payment, never waits for it"""
+        if not self.cart or self.payment_session:
             return
+        if self.inputs:
+            self.inputs.record(inputlog.PAY, None, self.cart.count())
 
-        subtotal = sum(item['price'] * item['qty'] for item in self.cart)
-        total = subtotal * (1 + TAX_RATE)
+        total = self._cart_total()
 
+        self.payment_session = PaymentSession(
+            self.payment_provider, total,
+            PAYMENT_CARD_TIMEOUT_MS, PAYMENT_AUTH_TIMEOUT_MS,
+            on_change=self._on_payment_state, clock=lv.tick_get
+        )
+
+        # The bar runs out with the session's own limit (card and
+        # authorization together on Windcave readers)
         self.payment_screen = PaymentScreen(
             self.screen,
             SCREEN_WIDTH, SCREEN_HEIGHT,
             total,
             on_cancel=self._on_payment_cancel,
-            on_complete=self._on_payment_complete
+            timeout_ms=self.payment_session.limit_ms()
         )
+        self.payment_session.start()
 
-        # In production, trigger Windcave payment here
-        if not SIMULATOR:
-            self._process_payment(total)
-        else:
-            # Simulate payment after 3 seconds
-            self._simulate_payment()
+    def _on_payment_state(self, session):
+        """Reflect a payment state change on the overlay"""
+        state = session.state
+        screen = self.payment_screen
+        if session.active:
+            if session.cancel_requested:
+                screen.show_cancelling()
+            elif state == AUTHORIZING:
+                screen.show_authorizing(session.limit_ms(AUTHORIZING))
+            return
 
-    def _simulate_payment(self):
-        """Simulate payment processing (for demo)"""
-        # This would be replaced by actual Windcave payment
-        # For now, auto-complete after delay
-        pass
-
-    def _process_payment(self, amount):
-        """Process payment via Windcave API"""
-        try:
-            result = payment.process(amount)
-            if result.success:
-                self._on_payment_complete()
-            else:
-                print(f"[POS] Payment failed: {result.error}")
-        except Exception as e:
-            print(f"[POS] Payment error: {e}")
+        # Finished - the next pay press starts a new session
+        self.payment_session = None
+        self.telemetry.record("payment_ms", session.elapsed_ms())
+        if self.inputs:
+            self.inputs.record(inputlog.PAID, state, session.elapsed_ms())
+        if state == APPROVED:
+            self._on_payment_complete(session.detail)
+        elif state == DECLINED:
+            self.telemetry.count("payment_declined")
+            screen.show_failed(f"Declined\n{session.detail or ''}")
+        elif state == TIMEOUT:
+            self.telemetry.count("payment_timeout")
+            screen.show_failed("Timed out\nPlease try again")
+        elif state == CANCELLED:
+            self._close_payment()
 
     def _on_payment_cancel(self):
-        """Handle payment cancellation"""
-        pass
+        """Cancel/close pressed - abort the payment in flight, or dismiss a failed one"""
+        if self.inputs:
+            self.inputs.record(inputlog.PAY_CANCEL)
+        if self.payment_session:
+            self.payment_session.cancel()
+        else:
+            self._close_payment()
+
+    def _close_payment(self):
+        if self.payment_screen:
+            self.payment_screen.close()
+            self.payment_screen = None
+        if self.cart.totals.rules is not self.catalog.pricing:
+            # A sync came in during the payment
+            self.cart.reprice(self.catalog.pricing)
+            self.render.mark(DIRTY_CART)
 
-    def _on_payment_complete(self):
+    def _on_payment_complete(self, reference=None):
         """Handle successful payment"""
         # Record transaction
         if HAS_NETWORK and BACKEND_URL:
             try:
+                totals = self.cart.totals
                 transaction = {
-                    "items": self.cart,
-                    "total": sum(item['price'] * item['qty'] for item in self.cart) * (1 + TAX_RATE),
-                    "payment_method": "card"
+                    "items": [line.to_json() for line in self.cart.lines],
+                    "total": self._cart_total(),
+                    "discount": totals.discount / 100,
+                    "tax": totals.tax / 100,
+                    "bundles": totals.applied(),
+                    "catalog_version": self.catalog.version,
+                    "payment_method": "card",
+                    "payment_reference": reference
                 }
                 requests.post(f"{BACKEND_URL}/api/transactions", json=transaction)
             except Exception as e:
                 print(f"[POS] Failed to record transaction: {e}")
 
+        # Shift totals (one short log record; compacted when idle) and
+        # favorites scores (re-ranked when idle)
+        totals = self.cart.totals
+        self.sales.record(self.cart.lines, self.catalog, totals.tax, "card",
+                          discount=totals.discount)
+        self.favorites.record([(line.id, line.qty) for line in self.cart.lines])
+
         # Show success and clear cart
         self.payment_screen.show_success()
-        self.cart = []
-        self.product_grid.update_badges(self.cart)
+        self.cart.clear()
+        self.tab_name = None
+        if self.journal:
+            self.journal.cleared()
+        self._tab_done()
+        self.render.mark(DIRTY_CART | DIRTY_BADGES_ALL)
 
-        # Close after delay
-        # In LVGL, would use lv.timer_t
+        # Back to selling once the approval has been seen
+        timer = lv.timer_create(lambda t: self._close_payment(), PAYMENT_DONE_MS, None)
+        timer.set_repeat_count(1)
 
     def run(self):
         """Main loop"""
         print("[POS] Starting main loop")
 
         while True:
+            cycle_start = time.ticks_ms()
+
             # Handle LVGL tasks
             lv.task_handler()
 
-            # Periodic sync
+            if self._tap_flushed:
+                # The widgets a tap changed were redrawn by that task_handler
+                self.telemetry.record("tap_to_render_us",
+                                      time.ticks_diff(time.ticks_us(), self._tap_us))
+                self._tap_us = None
+                self._tap_flushed = False
+
+            # Barcode scans
+            if self.scanner:
+                self.scanner.poll(self._on_scan)
+
+            # Card payment in progress
+            if self.payment_session:
+                self.payment_session.poll()
+            elif not self.payment_screen and self.cart.totals.tick(self.cart.lines):
+                # A happy hour (or other pricing window) began or ended
+                self.render.mark(DIRTY_CART)
+
+            # One UI update for everything that changed this cycle
+            busy = self.render.flush()
+            if busy and self._tap_us is not None:
+                self._tap_flushed = True
+
+            # Input handling and drawing that took long enough to be felt
+            if self.inputs:
+                cycle_ms = time.ticks_diff(time.ticks_ms(), cycle_start)
+                if cycle_ms > INPUT_LOG_SLOW_MS:
+                    self.inputs.record(inputlog.SLOW_FRAME, None, cycle_ms)
+
+            # Background work only once the screen has been left alone:
+            # GC first, then one pre-rendered page, cart journal compaction,
+            # sales totals compaction, favorites re-rank or save, or
+            # thumbnail per cycle
+            if not busy:
+                inactive = lv.display_get_default().get_inactive_time()
+                # No heap probing while a payment worker may be allocating
+                worked = inactive > IDLE_MS and self.memory.idle(not self.payment_session)
+                if not worked and inactive > PRERENDER_IDLE_MS and not self.search_query:
+                    worked = self.pages.prerender(self._likely)
+                if not worked and inactive > IDLE_MS and self.journal and \
+                        self.journal.wants_compact():
+                    worked = self._compact_journal()
+                if not worked and inactive > IDLE_MS and self.sales.wants_compact():
+                    worked = self.sales.compact()
+                if not worked and inactive > IDLE_MS:
+                    worked = self._update_favorites()
+                if not worked and inactive > THUMB_IDLE_MS and self.thumbs.pending():
+                    self.thumbs.idle_step()
+
+            # Sync when a new catalog version is pushed, or periodically
             if HAS_NETWORK and BACKEND_URL:
-                if time.ticks_diff(time.ticks_ms(), self.last_sync) > SYNC_INTERVAL_MS:
+                pushed = False
+                interval = SYNC_INTERVAL_MS
+                if self.push:
+                    self.push.poll()
+                    if self.push.connected:
+                        interval = PUSH_RESYNC_MS
+                    # Announced but not synced yet; a failed sync retries after 1 s
+                    pushed = self.push.version != self._push_synced and \
+                        time.ticks_diff(time.ticks_ms(), self.last_sync) > 1000
+                    if pushed:
+                        self.telemetry.count("push_updates")
+                if pushed or time.ticks_diff(time.ticks_ms(), self.last_sync) > interval:
                     try:
                         self._sync_with_backend()
-                        self._update_display()
                     except Exception as e:
                         print(f"[POS] Background sync failed: {e}")
+                        self.telemetry.count("sync_failed")
+                        # Retry on the next interval, not every loop cycle
+                        self.last_sync = time.ticks_ms()
+
+                if TELEMETRY_INTERVAL_MS and \
+                        time.ticks_diff(time.ticks_ms(), self.last_report) > TELEMETRY_INTERVAL_MS:
+                    self._report_telemetry()
 
             time.sleep_ms(5)
 
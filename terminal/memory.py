@@ -0,0 +1,172 @@
+"""
+Windcave Terminal POS - Memory Manager
+Moves garbage collection out of event handling and into idle gaps of
+the main loop, tracks heap usage over the trading day and sheds caches
+when free memory drops below the configured budget.
+
+Automatic collection still runs as a safety net, but with the
+threshold raised it rarely fires in the middle of a tap.
+"""
+
+import gc
+import time
+
+
+class MemoryManager:
+    """Idle-time GC, heap watermarks and low-memory hooks
+
+    low_free: free bytes below which caches are shrunk
+    idle_alloc: bytes allocated since the last collection that make an
+        idle collection worthwhile
+    threshold: bytes allocated before MicroPython collects on its own
+        (None leaves the default)
+    probe_max: largest block the fragmentation probe tries to allocate
+    """
+
+    def __init__(self, low_free, idle_alloc, threshold=None, log_interval_ms=0,
+                 probe_max=32768):
+        self.low_free = low_free
+        self.idle_alloc = idle_alloc
+        self.log_interval_ms = log_interval_ms
+        self.probe_max = probe_max
+        self._shrinkers = []
+
+        if threshold and hasattr(gc, "threshold"):
+            gc.threshold(threshold)
+
+        gc.collect()
+        self._last_alloc = gc.mem_alloc()
+        self._last_log = time.ticks_ms()
+
+        self.collections = 0
+        self.shrinks = 0
+        self.pause_max_us = 0
+        self.pause_total_us = 0
+        self.free_min = gc.mem_free()
+        self._period_min = self.free_min
+        self.alloc_max = self._last_alloc
+        self.largest_block = 0
+        self.largest_capped = False   # largest_block is only a lower bound
+        self.history = []   # (ticks_ms, free after collect) - bounded
+
+    def on_low(self, fn):
+        """Register fn() to release memory when free heap is below budget"""
+        self._shrinkers.append(fn)
+
+    def sample(self):
+        """Update watermarks from the current heap; returns free bytes"""
+        free = gc.mem_free()
+        alloc = gc.mem_alloc()
+        if free < self.free_min:
+            self.free_min = free
+        if free < self._period_min:
+            self._period_min = free
+        if alloc > self.alloc_max:
+            self.alloc_max = alloc
+        return free
+
+    def period_low(self):
+        """Lowest free heap seen since the last call (per report period)"""
+        low = self._period_min
+        self._period_min = gc.mem_free()
+        return low
+
+    def idle(self, probe=True):
+        """Called from the main loop when nothing is waiting to be drawn.
+
+        Collects if enough garbage has built up or the heap is low, then
+        sheds caches if it is still below budget. Returns True if it
+        collected (the caller should skip other idle work this cycle).
+        probe=False skips the fragmentation probe in the periodic log -
+        for while something else (a payment worker) may be allocating.
+        """
+        free = self.sample()
+        if gc.mem_alloc() - self._last_alloc < self.idle_alloc and free >= self.low_free:
+            self._maybe_log(probe)
+            return False
+
+        self.collect()
+        if gc.mem_free() < self.low_free:
+            self.shrink()
+        self._maybe_log(probe)
+        return True
+
+    def collect(self):
+        start = time.ticks_us()
+        gc.collect()
+        pause = time.ticks_diff(time.ticks_us(), start)
+
+        self.collections += 1
+        self.pause_total_us += pause
+        if pause > self.pause_max_us:
+            self.pause_max_us = pause
+        self._last_alloc = gc.mem_alloc()
+
+        free = gc.mem_free()
+        self.history.append((time.ticks_ms(), free))
+        if len(self.history) > 64:
+            # Keep every other sample - the trend survives, memory doesn't grow
+            self.history = self.history[::2]
+        return pause
+
+    def shrink(self):
+        """Ask every registered cache to release memory, then collect"""
+        self.shrinks += 1
+        print(f"[POS] Low memory ({gc.mem_free()} free), shrinking caches")
+        for fn in self._shrinkers:
+            fn()
+        self.collect()
+
+    def probe_largest_block(self, limit=None):
+        """Approximate the largest allocatable block (a power of two).
+
+        Fragmentation shows up as a large free total but no large block.
+        Probes double from 1 KB up to `limit` (default probe_max) and never
+        take more than half the free heap, so other allocations still fit
+        meanwhile; a probe that reaches the cap leaves `largest_capped`
+        set. Failed allocations trigger a collection of their own, so only
+        call this when idle.
+        """
+        cap = min(limit or self.probe_max, gc.mem_free() // 2)
+        largest = 0
+        size = 1024
+        while size <= cap:
+            try:
+                block = bytearray(size)
+            except MemoryError:
+                break
+            del block
+            largest = size
+            size *= 2
+        gc.collect()
+        self.largest_block = largest
+        self.largest_capped = size > cap
+        return largest
+
+    def stats(self):
+        free = gc.mem_free()
+        return {
+            "free": free,
+            "alloc": gc.mem_alloc(),
+            "free_min": self.free_min,
+            "alloc_max": self.alloc_max,
+            "largest_block": self.largest_block,
+            "largest_capped": self.largest_capped,
+            "fragmentation": round(1 - self.largest_block / free, 2)
+            if self.largest_block and not self.largest_capped else None,
+            "collections": self.collections,
+            "pause_max_us": self.pause_max_us,
+            "pause_avg_us": self.pause_total_us // self.collections if self.collections else 0,
+            "shrinks": self.shrinks,
+        }
+
+    def _maybe_log(self, probe=True):
+        if not self.log_interval_ms:
+            return
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self._last_log) < self.log_interval_ms:
+            return
+        self._last_log = now
+        if probe:
+            self.probe_largest_block()
+        print(f"[POS] Memory: {self.stats()}")
@@ -0,0 +1,236 @@
+"""
+Windcave Terminal POS - Payments
+Card payments as a state machine polled from the main loop, so the UI
+keeps drawing (and the cancel button keeps working) while the reader
+waits for a card and the acquirer authorizes it.
+
+    idle -> awaiting_card -> authorizing -> approved
+                                         -> declined
+              (any active state)         -> timeout / cancelled
+
+Providers are non-blocking: start() begins a payment, poll() reports
+its progress, cancel() tries to abort it. SimulatedProvider fakes the
+reader and acquirer with configurable latency; WindcaveProvider runs
+the blocking hardware call on a worker thread.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+import time
+
+IDLE = "idle"
+AWAITING_CARD = "awaiting_card"
+AUTHORIZING = "authorizing"
+APPROVED = "approved"
+DECLINED = "declined"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+ACTIVE = (AWAITING_CARD, AUTHORIZING)
+FINAL = (APPROVED, DECLINED, TIMEOUT, CANCELLED)
+
+
+class SimulatedProvider:
+    """Card reader + acquirer stand-in with fixed latencies
+
+    card_ms: time until the customer presents a card
+    auth_ms: authorization round trip after that
+    decline_every: decline every n-th payment (0 = approve all)
+    """
+
+    def __init__(self, card_ms=1500, auth_ms=800, decline_every=0, clock=time.ticks_ms):
+        self.card_ms = card_ms
+        self.auth_ms = auth_ms
+        self.decline_every = decline_every
+        self.clock = clock
+        self.count = 0
+        self._started = None
+
+    def start(self, amount):
+        self.count += 1
+        self._started = self.clock()
+
+    def poll(self):
+        """(state, detail) of the payment in flight"""
+        if self._started is None:
+            return CANCELLED, None
+        elapsed = time.ticks_diff(self.clock(), self._started)
+        if elapsed < self.card_ms:
+            return AWAITING_CARD, None
+        if elapsed < self.card_ms + self.auth_ms:
+            return AUTHORIZING, None
+        self._started = None
+        if self.decline_every and self.count % self.decline_every == 0:
+            return DECLINED, "Declined by issuer"
+        return APPROVED, f"SIM{self.count:06d}"
+
+    def cancel(self):
+        """Abort the payment; True if it will not complete"""
+        self._started = None
+        return True
+
+
+class WindcaveProvider:
+    """Runs the blocking `payment.process(amount)` on a worker thread
+
+    The reader API gives no progress until it returns, so the payment
+    stays in awaiting_card until then - card read and authorization
+    together (`card_and_auth`). Cancelling relies on the module's
+    cancel() when it has one; without it the payment runs to completion
+    and an approval that arrives after a cancel request still stands.
+    Only one payment runs at a time: start() refuses while the worker is
+    still busy with the previous one.
+    """
+
+    card_and_auth = True
+
+    def __init__(self, payment):
+        self.payment = payment
+        self._result = None
+        self._running = False
+        try:
+            import _thread
+            self._thread = _thread
+        except ImportError:
+            self._thread = None
+
+    def start(self, amount):
+        if self._running:
+            raise RuntimeError("Previous payment still in progress")
+        self._result = None
+        self._running = True
+        if self._thread:
+            self._thread.start_new_thread(self._process, (amount,))
+        else:
+            # No threads on this port: blocks like before, but the state
+            # machine and UI flow stay the same
+            self._process(amount)
+
+    def _process(self, amount):
+        # Worker thread: no LVGL calls here, the main loop polls the result
+        try:
+            result = self.payment.process(amount)
+            if result.success:
+                self._result = (APPROVED, getattr(result, "reference", None))
+            else:
+                self._result = (DECLINED, result.error)
+        except Exception as e:
+            self._result = (DECLINED, str(e))
+        self._running = False
+
+    def poll(self):
+        if self._running:
+            return AWAITING_CARD, None
+        return self._result or (CANCELLED, None)
+
+    def cancel(self):
+        cancel = getattr(self.payment, "cancel", None)
+        if cancel is None:
+            return False
+        try:
+            return bool(cancel())
+        except Exception as e:
+            print(f"[POS] Payment cancel failed: {e}")
+            return False
+
+
+class PaymentSession:
+    """One payment attempt, advanced by poll() from the main loop
+
+    on_change(session) is called on every state change. A cancel the
+    provider cannot honour - the cashier's or a timeout's - leaves the
+    session running with cancel_requested set; it ends cancelled (or
+    timed out) unless the card was approved, which still completes the
+    sale.
+    """
+
+    def __init__(self, provider, amount, card_timeout_ms, auth_timeout_ms,
+                 on_change=None, clock=time.ticks_ms):
+        self.provider = provider
+        self.amount = amount
+        self.card_timeout_ms = card_timeout_ms
+        self.auth_timeout_ms = auth_timeout_ms
+        self.on_change = on_change
+        self.clock = clock
+        self.state = IDLE
+        self.detail = None
+        self.cancel_requested = False
+        self.timed_out = False
+        self.started = None
+        self.entered = None     # clock() when the current state began
+
+    @property
+    def active(self):
+        return self.state in ACTIVE
+
+    @property
+    def done(self):
+        return self.state in FINAL
+
+    def limit_ms(self, state=AWAITING_CARD):
+        """Time allowed in `state` before the session times out (0 for none)"""
+        if state == AUTHORIZING:
+            return self.auth_timeout_ms
+        if getattr(self.provider, "card_and_auth", False):
+            return self.card_timeout_ms + self.auth_timeout_ms
+        return self.card_timeout_ms
+
+    def elapsed_ms(self):
+        return time.ticks_diff(self.clock(), self.started) if self.started is not None else 0
+
+    def start(self):
+        self.started = self.clock()
+        try:
+            self.provider.start(self.amount)
+        except RuntimeError as e:
+            self._enter(DECLINED, str(e))
+            return
+        self._enter(AWAITING_CARD)
+
+    def poll(self):
+        """Advance from the provider's progress; True if the state changed"""
+        if not self.active:
+            return False
+
+        state, detail = self.provider.poll()
+        if state == CANCELLED and not self.cancel_requested:
+            # Provider lost the payment without being asked to stop
+            state, detail = DECLINED, detail or "Payment aborted"
+        elif state != APPROVED and state in FINAL and self.cancel_requested:
+            state = TIMEOUT if self.timed_out else CANCELLED
+        if state != self.state:
+            self._enter(state, detail)
+            return True
+
+        if self.cancel_requested:
+            # Waiting for the provider's real outcome
+            return False
+        limit = self.limit_ms(state)
+        if limit and time.ticks_diff(self.clock(), self.entered) > limit:
+            self.timed_out = True
+            self.cancel_requested = True
+            if self.provider.cancel():
+                self._enter(TIMEOUT)
+            elif self.on_change:
+                # Still running - it may yet be approved
+                self.on_change(self)
+            return True
+        return False
+
+    def cancel(self):
+        """Cashier pressed cancel"""
+        if not self.active:
+            return
+        self.cancel_requested = True
+        if self.provider.cancel():
+            self._enter(CANCELLED)
+        elif self.on_change:
+            # Still running - let the UI show that cancelling is pending
+            self.on_change(self)
+
+    def _enter(self, state, detail=None):
+        self.state = state
+        self.detail = detail
+        self.entered = self.clock()
+        if self.on_change:
+            self.on_change(self)
@@ -5,25 +5,8 @@ MicroPython + LVGL UI widgets and styling
 
 import lvgl as lv
 
-
-def get_font(size):
-    """Get the nearest available font for requested size.
-
-    Available fonts in lv_micropython build: 14, 16, 24
-    Maps other sizes to nearest available.
-    """
-    font_map = {
-        12: lv.font_montserrat_14,
-        14: lv.font_montserrat_14,
-        16: lv.font_montserrat_16,
-        18: lv.font_montserrat_16,
-        20: lv.font_montserrat_24,
-        22: lv.font_montserrat_24,
-        24: lv.font_montserrat_24,
-        28: lv.font_montserrat_24,
-        48: lv.font_montserrat_24,
-    }
-    return font_map.get(size, lv.font_montserrat_14)
+from fonts import get_font, safe_text
+from records import blend
 
 
 class Theme:
@@ -69,52 +52,90 @@ class Theme:
 
 
 class Styles:
-    """Reusable LVGL styles"""
+    """Reusable LVGL styles
+
+    fast: render profile without per-frame alpha blending - shadows
+    become opaque borders/outlines and product tiles use colors
+    pre-blended at sync (see records.product_from_json).
+    """
 
     _initialized = False
+    fast = False
+    # Animations are LVGL style transitions: LVGL steps them itself, no
+    # Python runs per frame. The fast profile switches states instantly.
+    PRESS_MS = 80
+    FADE_MS = 150
     card = None
     btn = None
     btn_pressed = None
     category = None
     category_active = None
     cart_item = None
+    pay_glow = None
+    bar_indicator = None
+    toast = None
+    toast_hidden = None
+    _transitions = {}   # LVGL keeps pointers to these - hold them here
 
     @classmethod
-    def init(cls):
-        if cls._initialized:
+    def _style(cls, name):
+        # Re-initializing (profile switch) resets the existing style in
+        # place, so widgets still using it never see a freed style
+        style = getattr(cls, name, None)
+        if style is None:
+            style = lv.style_t()
+            style.init()
+        else:
+            style.reset()
+        setattr(cls, name, style)
+        return style
+
+    @classmethod
+    def init(cls, fast=False):
+        if cls._initialized and cls.fast == fast:
             return
+        cls.fast = fast
 
         # Card style
-        cls.card = lv.style_t()
-        cls.card.init()
+        cls._style("card")
         cls.card.set_bg_color(Theme.hex(Theme.BG_CARD))
         cls.card.set_bg_opa(lv.OPA.COVER)
         cls.card.set_radius(12)
-        cls.card.set_border_width(0)
-        cls.card.set_shadow_width(8)
-        cls.card.set_shadow_opa(lv.OPA._30)
-        cls.card.set_shadow_color(lv.color_hex(0x000000))
+        if fast:
+            cls.card.set_border_width(1)
+            cls.card.set_border_color(Theme.hex(Theme.DIVIDER))
+        else:
+            cls.card.set_border_width(0)
+            cls.card.set_shadow_width(8)
+            cls.card.set_shadow_opa(lv.OPA._30)
+            cls.card.set_shadow_color(lv.color_hex(0x000000))
         cls.card.set_pad_all(8)
 
         # Button style
-        cls.btn = lv.style_t()
-        cls.btn.init()
+        cls._style("btn")
         cls.btn.set_bg_color(Theme.hex(Theme.BG_CARD))
         cls.btn.set_radius(8)
         cls.btn.set_border_width(0)
-        cls.btn.set_shadow_width(4)
-        cls.btn.set_shadow_opa(lv.OPA._20)
+        if fast:
+            # Override any theme shadow too
+            cls.btn.set_shadow_width(0)
+        else:
+            cls.btn.set_shadow_width(4)
+            cls.btn.set_shadow_opa(lv.OPA._20)
 
         # Button pressed
-        cls.btn_pressed = lv.style_t()
-        cls.btn_pressed.init()
+        cls._style("btn_pressed")
         cls.btn_pressed.set_bg_color(Theme.hex(Theme.ACCENT))
         cls.btn_pressed.set_transform_width(-2)
         cls.btn_pressed.set_transform_height(-2)
+        if not fast:
+            press = cls._transition("press", [lv.STYLE.BG_COLOR, lv.STYLE.TRANSFORM_WIDTH,
+                                              lv.STYLE.TRANSFORM_HEIGHT, 0], cls.PRESS_MS)
+            cls.btn.set_transition(press)
+            cls.btn_pressed.set_transition(press)
 
         # Category button
-        cls.category = lv.style_t()
-        cls.category.init()
+        cls._style("category")
         cls.category.set_bg_color(Theme.hex(Theme.BG_SECONDARY))
         cls.category.set_radius(20)
         cls.category.set_pad_hor(16)
@@ -123,25 +144,20 @@ class Styles:
         cls.category.set_border_color(Theme.hex(Theme.DIVIDER))
 
         # Category active
-        cls.category_active = lv.style_t()
-        cls.category_active.init()
+        cls._style("category_active")
         cls.category_active.set_bg_color(Theme.hex(Theme.ACCENT))
         cls.category_active.set_border_width(0)
-        cls.category_active.set_shadow_width(15)
-        cls.category_active.set_shadow_color(Theme.hex(Theme.ACCENT))
-        cls.category_active.set_shadow_opa(lv.OPA._40)
+        cls._glow(cls.category_active, Theme.ACCENT, 15, lv.OPA._40)
 
         # Cart item
-        cls.cart_item = lv.style_t()
-        cls.cart_item.init()
+        cls._style("cart_item")
         cls.cart_item.set_bg_color(Theme.hex(Theme.BG_SECONDARY))
         cls.cart_item.set_radius(8)
         cls.cart_item.set_pad_all(12)
         cls.cart_item.set_border_width(0)
 
         # Cart item row (Widescreen)
-        cls.cart_item_row = lv.style_t()
-        cls.cart_item_row.init()
+        cls._style("cart_item_row")
         cls.cart_item_row.set_bg_color(Theme.hex(Theme.BG_CARD))
         cls.cart_item_row.set_radius(8)
         cls.cart_item_row.set_pad_all(8)
@@ -149,8 +165,7 @@ class Styles:
         cls.cart_item_row.set_margin_bottom(8)
 
         # Secondary button (Cash, Split)
-        cls.btn_secondary = lv.style_t()
-        cls.btn_secondary.init()
+        cls._style("btn_secondary")
         cls.btn_secondary.set_bg_color(Theme.hex(Theme.BG_SECONDARY))
         cls.btn_secondary.set_radius(10)
         cls.btn_secondary.set_border_width(1)
@@ -158,8 +173,7 @@ class Styles:
         cls.btn_secondary.set_pad_all(0)
 
         # Tool button (Widescreen - Icon + Text)
-        cls.tool_btn = lv.style_t()
-        cls.tool_btn.init()
+        cls._style("tool_btn")
         cls.tool_btn.set_bg_color(Theme.hex(Theme.BG_SECONDARY))
         cls.tool_btn.set_radius(8)
         cls.tool_btn.set_border_width(1)
@@ -167,20 +181,87 @@ class Styles:
         cls.tool_btn.set_pad_all(8)
 
         # Text Tool button (Small, no border)
-        cls.text_tool_btn = lv.style_t()
-        cls.text_tool_btn.init()
+        cls._style("text_tool_btn")
         cls.text_tool_btn.set_bg_opa(lv.OPA.TRANSP)
         cls.text_tool_btn.set_border_width(0)
         cls.text_tool_btn.set_pad_all(4)
         cls.text_tool_btn.set_text_color(Theme.hex(Theme.TEXT_SECONDARY))
 
+        # Charge button glow
+        cls._style("pay_glow")
+        cls._glow(cls.pay_glow, Theme.ACCENT_GREEN, 20, lv.OPA._30)
+
+        # Payment progress bar fill
+        cls._style("bar_indicator")
+        cls.bar_indicator.set_bg_opa(lv.OPA.COVER)
+        cls.bar_indicator.set_bg_color(Theme.hex(Theme.ACCENT))
+        cls.bar_indicator.set_bg_grad_color(Theme.hex(Theme.ACCENT_GREEN))
+        cls.bar_indicator.set_bg_grad_dir(lv.GRAD_DIR.HOR)
+
+        # Toast: shown from toast_hidden (STATE.USER_1) and back, fading
+        # unless fast (a fading widget is blended as a layer)
+        cls._style("toast")
+        cls._style("toast_hidden")
+        cls.toast_hidden.set_opa(lv.OPA.TRANSP)
+        if not fast:
+            fade = cls._transition("fade", [lv.STYLE.OPA, 0], cls.FADE_MS)
+            cls.toast.set_transition(fade)
+            cls.toast_hidden.set_transition(fade)
+
         cls._initialized = True
 
+    @classmethod
+    def _transition(cls, name, props, ms):
+        dsc = lv.style_transition_dsc_t()
+        dsc.init(props, lv.anim_t.path_ease_out, ms, 0, None)
+        cls._transitions[name] = (dsc, props)
+        return dsc
+
+    @classmethod
+    def _glow(cls, style, color, width, opa):
+        """Soft colored shadow, or in the fast profile a 2px opaque outline
+        in the color the shadow would have blended to next to the widget"""
+        if cls.fast:
+            style.set_shadow_width(0)
+            style.set_outline_width(2)
+            style.set_outline_pad(0)
+            style.set_outline_color(lv.color_hex(blend(color, Theme.BG_PRIMARY, opa)))
+        else:
+            style.set_shadow_width(width)
+            style.set_shadow_color(lv.color_hex(color))
+            style.set_shadow_opa(opa)
+
+
+def child_of(container, obj):
+    """The direct child of `container` that is or contains `obj`, or None"""
+    while obj is not None:
+        parent = obj.get_parent()
+        if parent == container:
+            return obj
+        obj = parent
+    return None
+
+
+def delegate_clicks(container, on_child):
+    """Route taps on any child of `container` to on_child(index).
+
+    One callback on the container serves every child, including ones
+    created or rebound later: children only need EVENT_BUBBLE, and their
+    position in the container identifies them. The binding keeps
+    lv_obj user_data for itself, so the child index is the lookup key.
+    """
+    def on_click(event):
+        child = child_of(container, event.get_target_obj())
+        if child is not None:
+            on_child(child.get_index())
+
+    container.add_event_cb(on_click, lv.EVENT.CLICKED, None)
+
 
 class Header:
     """Terminal header bar"""
 
-    def __init__(self, parent, width, height, on_settings=None):
+    def __init__(self, parent, width, height, on_settings=None, on_search=None):
         self.on_settings = on_settings
 
         self.container = lv.obj(parent)
@@ -214,6 +295,22 @@ class Header:
         if on_settings:
             self.settings_btn.add_event_cb(lambda e: on_settings(), lv.EVENT.CLICKED, None)
 
+        # Search button
+        if on_search:
+            self.search_btn = lv.button(self.container)
+            self.search_btn.set_size(36, 40)
+            self.search_btn.set_style_bg_opa(lv.OPA.TRANSP, 0)
+            self.search_btn.set_style_border_width(0, 0)
+            self.search_btn.set_style_shadow_width(0, 0)
+            self.search_btn.align(lv.ALIGN.RIGHT_MID, -108, 0)
+
+            search_icon = lv.label(self.search_btn)
+            search_icon.set_text(lv.SYMBOL.KEYBOARD)
+            search_icon.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+            search_icon.center()
+
+            self.search_btn.add_event_cb(lambda e: on_search(), lv.EVENT.CLICKED, None)
+
         # Status LED (Wifi Icon)
         self.status = lv.label(self.container)
         self.status.set_text(lv.SYMBOL.WIFI)
@@ -235,12 +332,22 @@ class Header:
 
 
 class CategoryBar:
-    """Horizontal scrolling category selector"""
+    """Horizontal scrolling category selector
 
-    def __init__(self, parent, width, height, on_select=None):
+    Buttons are kept across syncs: set_categories diffs the new list
+    against the existing buttons by id, so an unchanged list touches no
+    widgets and the selection and scroll position survive.
+
+    With a favorites_key, a Favorites button comes first; it stays hidden
+    until show_favorites(True).
+    """
+
+    def __init__(self, parent, width, height, on_select=None, favorites_key=None):
         self.on_select = on_select
-        self.buttons = []
+        self.buttons = []    # (button, category id) in bar order, fixed ones first
+        self.texts = {}      # category id -> label text shown
         self.active_id = None
+        self.checked = None
 
         self.container = lv.obj(parent)
         self.container.set_size(width, height)
@@ -252,61 +359,124 @@ class CategoryBar:
         self.container.set_style_pad_column(8, 0)
         self.container.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
         self.container.set_scroll_dir(lv.DIR.HOR)
+        delegate_clicks(self.container, self._on_click)
+
+        if favorites_key is not None:
+            self.favorites = self._add_button(favorites_key, safe_text("⭐ Favorites"))
+            self.favorites.add_flag(lv.obj.FLAG.HIDDEN)
+            self.buttons.append((self.favorites, favorites_key))
+        else:
+            self.favorites = None
 
         # Add "All" button
-        self._add_button("All", "🏪", None, is_all=True)
+        self.all_btn = self._add_button(None, safe_text("🏪 All"))
+        self.buttons.append((self.all_btn, None))
+        self.fixed = len(self.buttons)
+        self._select(self.all_btn, None)
 
-    def _add_button(self, name, icon, cat_id, is_all=False):
+    def _add_button(self, cat_id, text):
         btn = lv.button(self.container)
         btn.set_size(lv.SIZE_CONTENT, 44)  # Increased touch target
         btn.add_style(Styles.category, 0)
         btn.add_style(Styles.category_active, lv.STATE.CHECKED)
-        btn.add_flag(lv.obj.FLAG.CHECKABLE)
-
-        if is_all:
-            btn.add_state(lv.STATE.CHECKED)
-            self.active_id = None
+        btn.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
 
         label = lv.label(btn)
-        label.set_text(f"{icon} {name}")
+        label.set_text(text)
         label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
         label.center()
 
-        btn.add_event_cb(lambda e: self._on_click(e, cat_id), lv.EVENT.CLICKED, None)
-        self.buttons.append((btn, cat_id))
-
+        self.texts[cat_id] = text
         return btn
 
-    def _on_click(self, event, cat_id):
-        btn = event.get_target()
-
-        # Uncheck all others
-        for b, _ in self.buttons:
-            if b != btn:
-                b.clear_state(lv.STATE.CHECKED)
-
+    def _select(self, btn, cat_id):
+        # CHECKED is managed here rather than by FLAG.CHECKABLE, so a tap
+        # on the active category doesn't toggle it off
+        if self.checked is not None and self.checked is not btn:
+            self.checked.remove_state(lv.STATE.CHECKED)
+        btn.add_state(lv.STATE.CHECKED)
+        self.checked = btn
         self.active_id = cat_id
+
+    def _on_click(self, index):
+        btn, cat_id = self.buttons[index]
+        self._select(btn, cat_id)
         if self.on_select:
             self.on_select(cat_id)
 
-    def set_categories(self, categories):
-        # Clear existing (except "All")
-        for btn, _ in self.buttons[1:]:
-            btn.delete()
-        self.buttons = self.buttons[:1]
+    def show_favorites(self, visible):
+        """Show or hide the Favorites button (hiding it selects "All")"""
+        btn = self.favorites
+        if btn is None or visible != btn.has_flag(lv.obj.FLAG.HIDDEN):
+            return
+        if visible:
+            btn.remove_flag(lv.obj.FLAG.HIDDEN)
+        else:
+            btn.add_flag(lv.obj.FLAG.HIDDEN)
+            if btn is self.checked:
+                self._select(self.all_btn, None)
 
-        # Add new categories
-        for cat in categories:
-            self._add_button(cat['name'], cat.get('icon', '📦'), cat['id'])
+    def set_categories(self, categories):
+        """Update the bar to `categories`, changing only what differs.
+
+        If the active category is gone, "All" becomes active (check
+        active_id afterwards).
+        """
+        fixed = self.fixed
+        existing = {cat_id: btn for btn, cat_id in self.buttons[fixed:]}
+        wanted = set(cat.id for cat in categories)
+
+        for btn, cat_id in self.buttons[fixed:]:
+            if cat_id not in wanted:
+                if btn is self.checked:
+                    self._select(self.all_btn, None)
+                btn.delete()
+                del self.texts[cat_id]
+
+        buttons = self.buttons[:fixed]
+        for i, cat in enumerate(categories):
+            cat_id = cat.id
+            text = safe_text(f"{cat.icon} {cat.name}")
+            btn = existing.get(cat_id)
+            if btn is None:
+                btn = self._add_button(cat_id, text)
+            elif self.texts[cat_id] != text:
+                btn.get_child(0).set_text(text)
+                self.texts[cat_id] = text
+            # Children order is the tap index, so it must match the list
+            if btn.get_index() != i + fixed:
+                btn.move_to_index(i + fixed)
+            buttons.append((btn, cat_id))
+        self.buttons = buttons
 
 
 class ProductGrid:
-    """Grid of product buttons"""
+    """Grid of product buttons
+
+    Buttons are recycled: set_products rebinds existing buttons to the new
+    products and only creates buttons when the grid grows. Surplus buttons
+    are hidden rather than deleted.
+
+    With a ThumbCache, tiles show the product thumbnail if it is already
+    decoded in RAM; otherwise the tile keeps its color. request() asks the
+    cache for the images of the tiles in view, and set_thumb() fills them
+    in once loaded. drop_thumb() puts the color back when the cache evicts
+    an image, so tiles out of view never hold it in RAM.
+    """
+
+    GAP = 8              # pixels between tiles
 
-    def __init__(self, parent, btn_size=95, on_select=None):
+    def __init__(self, parent, btn_size=95, on_select=None, thumbs=None):
         self.btn_size = btn_size
         self.on_select = on_select
+        self.thumbs = thumbs
         self.buttons = []
+        self.slots = []      # (name label, price label, badge, image) per button
+        self.products = []   # product bound to each visible button
+        self.badges = {}
+        self.waiting = {}    # thumbnail digest -> button indices waiting for it
+        self.keys = []       # thumbnail digest of each button's product, or None
+        self.showing = set() # indices of buttons with their image set
 
         self.container = lv.obj(parent)
         self.container.set_size(lv.pct(100), lv.SIZE_CONTENT)
@@ -315,27 +485,22 @@ class ProductGrid:
         self.container.set_style_pad_all(0, 0)
         self.container.set_flex_flow(lv.FLEX_FLOW.ROW_WRAP)
         self.container.set_flex_align(lv.FLEX_ALIGN.START, lv.FLEX_ALIGN.START, lv.FLEX_ALIGN.START)
-        self.container.set_style_pad_row(8, 0)
-        self.container.set_style_pad_column(8, 0)
+        self.container.set_style_pad_row(self.GAP, 0)
+        self.container.set_style_pad_column(self.GAP, 0)
         self.container.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        delegate_clicks(self.container, self._on_click)
 
-    def _create_product_button(self, product):
+    def _create_product_button(self):
         btn = lv.button(self.container)
+        btn.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
         btn.set_size(self.btn_size, self.btn_size)
         btn.add_style(Styles.btn, 0)
         btn.add_style(Styles.btn_pressed, lv.STATE.PRESSED)
 
-        # "Modern Soft" Look: Tinted background
-        if product.get('color'):
-            color = int(product['color'].replace('#', ''), 16)
-            btn.set_style_bg_color(lv.color_hex(color), 0)
-            btn.set_style_bg_opa(lv.OPA._20, 0) # 20% opacity
-            # Soft matching border
-            btn.set_style_border_width(1, 0)
-            btn.set_style_border_color(lv.color_hex(color), 0)
-            btn.set_style_border_opa(lv.OPA._30, 0) # 30% opacity border
-        else:
-            btn.set_style_bg_color(Theme.hex(Theme.BG_CARD), 0)
+        # Thumbnail (behind the labels, hidden until an image is bound)
+        image = lv.image(btn)
+        image.align(lv.ALIGN.CENTER, 0, 0)
+        image.add_flag(lv.obj.FLAG.HIDDEN)
 
         # Name container
         name_bg = lv.obj(btn)
@@ -348,7 +513,6 @@ class ProductGrid:
 
         # Name
         name = lv.label(name_bg)
-        name.set_text(product['name'])
         name.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0) # White
         name.set_style_text_font(get_font(12), 0)
         name.set_long_mode(0)
@@ -364,7 +528,6 @@ class ProductGrid:
 
         # Price
         price = lv.label(price_bg)
-        price.set_text(f"${product['price']:.2f}")
         price.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
         price.set_style_text_font(get_font(16), 0)
         price.align(lv.ALIGN.RIGHT_MID, -4, 0)
@@ -381,38 +544,153 @@ class ProductGrid:
         badge.set_style_text_align(lv.TEXT_ALIGN.CENTER, 0)
         badge.align(lv.ALIGN.TOP_RIGHT, 4, -4)
         badge.add_flag(lv.obj.FLAG.HIDDEN)
-        
-        # Store reference to badge in the button object for easy access
-        # Note: In MicroPython LVGL, we can attach attributes to objects if we wrap them or use user_data
-        # For simplicity, we'll store a map in the class instance
-        self.badges[product['id']] = badge
 
-        btn.add_event_cb(lambda e: self._on_click(product), lv.EVENT.CLICKED, None)
         self.buttons.append(btn)
+        self.slots.append((name, price, badge, image))
+        self.keys.append(None)
 
         return btn
 
-    def _on_click(self, product):
-        if self.on_select:
-            self.on_select(product)
+    def _bind(self, i, product):
+        """Show `product` on button `i`"""
+        btn = self.buttons[i]
+        name, price, badge, image = self.slots[i]
+
+        # "Modern Soft" Look: Tinted background
+        color = product.color
+        if product.tile is not None:
+            # Same look from opaque colors pre-blended at sync (fast profile)
+            btn.set_style_bg_color(lv.color_hex(product.tile), 0)
+            btn.set_style_bg_opa(lv.OPA.COVER, 0)
+            btn.set_style_border_width(1, 0)
+            btn.set_style_border_color(lv.color_hex(product.tile_border), 0)
+            btn.set_style_border_opa(lv.OPA.COVER, 0)
+        elif color is not None:
+            btn.set_style_bg_color(lv.color_hex(color), 0)
+            btn.set_style_bg_opa(lv.OPA._20, 0) # 20% opacity
+            # Soft matching border
+            btn.set_style_border_width(1, 0)
+            btn.set_style_border_color(lv.color_hex(color), 0)
+            btn.set_style_border_opa(lv.OPA._30, 0) # 30% opacity border
+        else:
+            btn.set_style_bg_color(Theme.hex(Theme.BG_CARD), 0)
+            btn.set_style_bg_opa(lv.OPA.COVER, 0)
+            btn.set_style_border_width(0, 0)
+
+        name.set_text(product.name)
+        price.set_text(f"${product.price:.2f}")
+        badge.add_flag(lv.obj.FLAG.HIDDEN)
+
+        # Only an image already in RAM is shown; request() loads the rest
+        dsc = None
+        digest = self.thumbs.key_for(product) if self.thumbs else None
+        self.keys[i] = digest
+        if digest:
+            dsc = self.thumbs.get(digest, load=False)
+            if dsc is None:
+                self.waiting.setdefault(digest, []).append(i)
+        if dsc is not None:
+            image.set_src(dsc)
+            image.remove_flag(lv.obj.FLAG.HIDDEN)
+            self.showing.add(i)
+        else:
+            image.add_flag(lv.obj.FLAG.HIDDEN)
+            self.showing.discard(i)
+
+        self.badges[product.id] = badge
+        btn.remove_flag(lv.obj.FLAG.HIDDEN)
+
+    def _on_click(self, index):
+        # Buttons map to products by position, so rebinding a button
+        # to another product needs no new callback
+        if self.on_select and index < len(self.products):
+            self.on_select(self.products[index])
 
     def set_products(self, products):
-        # Clear existing
-        for btn in self.buttons:
-            btn.delete()
-        self.buttons = []
+        self.products = list(products)
         self.badges = {} # Reset badge map
+        self.waiting = {}
+
+        while len(self.buttons) < len(self.products):
+            self._create_product_button()
+
+        for i, product in enumerate(self.products):
+            self._bind(i, product)
+
+        # Hide buttons left over from a longer list
+        for i in range(len(self.products), len(self.buttons)):
+            self.buttons[i].add_flag(lv.obj.FLAG.HIDDEN)
+            self.keys[i] = None
+            if i in self.showing:
+                self.showing.discard(i)
+                self.slots[i][3].add_flag(lv.obj.FLAG.HIDDEN)
+
+    def update(self, products, changed):
+        """Rebind only the tiles whose product id is in `changed`.
+
+        Only possible when `products` has the same ids in the same order
+        as the bound list; returns False otherwise (use set_products).
+        """
+        if len(products) != len(self.products):
+            return False
+        for old, new in zip(self.products, products):
+            if old.id != new.id:
+                return False
+
+        self.products = list(products)
+        for i, product in enumerate(self.products):
+            if product.id in changed:
+                self._bind(i, product)
+        return True
+
+    def request(self, first, last):
+        """Load the images of buttons first..last-1 (in view); returns their digests"""
+        digests = set()
+        for i in range(first, min(last, len(self.products))):
+            digest = self.keys[i]
+            if not digest:
+                continue
+            digests.add(digest)
+            if i not in self.showing:
+                dsc = self.thumbs.get(digest)
+                if dsc is not None:
+                    self.set_thumb(digest, dsc)
+        return digests
+
+    def set_thumb(self, digest, dsc):
+        """Thumbnail finished loading - show it on the tiles waiting for it"""
+        for i in self.waiting.pop(digest, ()):
+            # The button may have been rebound since it started waiting
+            if self.keys[i] != digest:
+                continue
+            image = self.slots[i][3]
+            image.set_src(dsc)
+            image.remove_flag(lv.obj.FLAG.HIDDEN)
+            self.showing.add(i)
+
+    def drop_thumb(self, digest):
+        """Thumbnail is being evicted - back to the tile color until requested again"""
+        for i in list(self.showing):
+            if self.keys[i] == digest:
+                image = self.slots[i][3]
+                image.add_flag(lv.obj.FLAG.HIDDEN)
+                image.set_src(None)
+                self.showing.discard(i)
+                self.waiting.setdefault(digest, []).append(i)
+
+    def update_badges(self, cart_map, ids=None):
+        """Update active quantity badges on product buttons
+
+        cart_map maps product_id -> qty summed over all cart lines
+        (a product with different modifiers can be on several lines).
+        If ids is given only those products' badges are touched.
+        """
+        if ids is None:
+            badges = self.badges.items()
+        else:
+            badges = [(i, self.badges[i]) for i in ids if i in self.badges]
 
-        # Add new products
-        for product in products:
-            self._create_product_button(product)
-
-    def update_badges(self, cart):
-        """Update active quantity badges on product buttons"""
-        # Create a map of product_id -> qty
-        cart_map = {item['id']: item['qty'] for item in cart}
-        
-        for prod_id, badge in self.badges.items():
+        for prod_id, badge in badges:
             if prod_id in cart_map:
                 badge.set_text(str(cart_map[prod_id]))
                 if badge.has_flag(lv.obj.FLAG.HIDDEN):
@@ -421,11 +699,287 @@ class ProductGrid:
                 badge.add_flag(lv.obj.FLAG.HIDDEN)
 
 
+class GridPages:
+    """Product grid pages keyed by category, switched by visibility
+
+    Every page is a ProductGrid in the same scroll container and only the
+    active one is shown. Pages for categories likely to be opened next are
+    built ahead of time by prerender(), so switching to them just toggles
+    HIDDEN. At most max_pages exist; the least recently used page is
+    deleted to make room. invalidate() marks all pages stale after a
+    catalog change - they are rebuilt when next shown.
+
+    Thumbnails are requested and pinned only for the tiles in view on the
+    active page (again whenever it stops scrolling); other pages keep
+    whatever images are still decoded and show tile colors otherwise.
+
+    products_for(key) returns the products for a page.
+    """
+
+    def __init__(self, parent, products_for, max_pages=3, btn_size=95,
+                 on_select=None, thumbs=None):
+        self.parent = parent
+        self.products_for = products_for
+        self.max_pages = max_pages
+        self.btn_size = btn_size
+        self.on_select = on_select
+        self.thumbs = thumbs
+
+        self.pages = {}      # key -> [grid, version, last use]
+        self.active = None
+        self.version = 0
+        self._clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.prerendered = 0
+        self.evictions = 0
+
+        if thumbs:
+            parent.add_event_cb(lambda e: self._pin(), lv.EVENT.SCROLL_END, None)
+
+    def show(self, key, rebuild=False):
+        """Make the page for `key` visible and return its grid.
+
+        rebuild=True rebinds it even if fresh (search results), and is
+        not counted towards the hit rate.
+        """
+        page = self.pages.get(key)
+        fresh = page is not None and page[1] == self.version
+        if not rebuild:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if page is None:
+            page = self._new_page(key, ())
+        if rebuild or not fresh:
+            page[0].set_products(self.products_for(key))
+            page[1] = self.version
+
+        grid = page[0]
+        self._clock += 1
+        page[2] = self._clock
+        if grid is not self.active:
+            if self.active is not None:
+                self.active.container.add_flag(lv.obj.FLAG.HIDDEN)
+            grid.container.remove_flag(lv.obj.FLAG.HIDDEN)
+            self.active = grid
+            self.parent.scroll_to_y(0, lv.ANIM.OFF)
+        self._pin()
+        return grid
+
+    def prerender(self, keys):
+        """Build the first page in `keys` that is missing or stale.
+
+        Only evicts pages not in `keys`. Returns True if it built one
+        (call again on the next idle cycle for the rest).
+        """
+        for key in keys:
+            page = self.pages.get(key)
+            if page is not None and page[1] == self.version:
+                continue
+            if page is None:
+                page = self._new_page(key, keys)
+                if page is None:
+                    return False
+            page[0].set_products(self.products_for(key))
+            page[1] = self.version
+            self.prerendered += 1
+            return True
+        return False
+
+    def invalidate(self, key=None):
+        """Mark every page (or only the page for `key`) stale"""
+        if key is None:
+            self.version += 1
+        elif key in self.pages:
+            self.pages[key][1] = -1
+
+    def refresh(self, changed):
+        """Catalog swapped: patch pages in place where possible.
+
+        Fresh pages whose product list kept the same ids only rebind the
+        tiles in `changed`; the rest go stale and rebuild when shown.
+        """
+        self.version += 1
+        for key, page in self.pages.items():
+            if page[1] == self.version - 1 and page[0].update(self.products_for(key), changed):
+                page[1] = self.version
+        self._pin()
+
+    def shrink(self):
+        """Delete every page except the visible one (low memory)"""
+        for key in list(self.pages):
+            if self.pages[key][0] is not self.active:
+                self._delete(key)
+        self._pin()
+
+    def set_thumb(self, digest, dsc):
+        for grid, _, _ in self.pages.values():
+            grid.set_thumb(digest, dsc)
+
+    def drop_thumb(self, digest):
+        for grid, _, _ in self.pages.values():
+            grid.drop_thumb(digest)
+
+    def stats(self):
+        shown = self.hits + self.misses
+        return {
+            "pages": len(self.pages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / shown, 2) if shown else None,
+            "prerendered": self.prerendered,
+            "evictions": self.evictions,
+        }
+
+    def _new_page(self, key, keep):
+        while len(self.pages) >= self.max_pages:
+            oldest = None
+            for k, page in self.pages.items():
+                if page[0] is self.active or k in keep:
+                    continue
+                if oldest is None or page[2] < self.pages[oldest][2]:
+                    oldest = k
+            if oldest is None:
+                if keep:
+                    return None
+                break
+            self._delete(oldest)
+
+        grid = ProductGrid(self.parent, btn_size=self.btn_size,
+                           on_select=self.on_select, thumbs=self.thumbs)
+        grid.container.add_flag(lv.obj.FLAG.HIDDEN)
+        page = self.pages[key] = [grid, -1, 0]
+        return page
+
+    def _delete(self, key):
+        grid = self.pages.pop(key)[0]
+        grid.container.delete()
+        self.evictions += 1
+
+    def _pin(self):
+        # Load the images in view and keep them from eviction; tiles
+        # elsewhere give theirs up through drop_thumb()
+        if not self.thumbs:
+            return
+        grid = self.active
+        if grid is None:
+            self.thumbs.pinned = set()
+            return
+        width = self.parent.get_content_width()
+        if width <= 0:
+            # Not laid out yet (first page at startup)
+            self.parent.update_layout()
+            width = self.parent.get_content_width()
+        step = self.btn_size + grid.GAP
+        cols = max(1, (width + grid.GAP) // step)
+        top = self.parent.get_scroll_y()
+        first = max(0, top // step) * cols
+        last = ((top + self.parent.get_content_height()) // step + 1) * cols
+        self.thumbs.pinned = grid.request(first, last)
+
+
+class SearchPanel:
+    """Search field with on-screen keyboard
+
+    The field replaces the category bar and the keyboard slides over the
+    bottom of the screen; results are shown in the regular ProductGrid.
+    Compact screens get a reduced letters/digits keyboard.
+    """
+
+    COMPACT_MAP = [
+        "1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "\n",
+        "q", "w", "e", "r", "t", "y", "u", "i", "o", "p", "\n",
+        "a", "s", "d", "f", "g", "h", "j", "k", "l", "\n",
+        "z", "x", "c", "v", "b", "n", "m", " ", lv.SYMBOL.BACKSPACE, ""
+    ]
+    COMPACT_CTRL = [1] * 10 + [1] * 10 + [1] * 9 + [1] * 7 + [2, 2]
+
+    def __init__(self, parent, width, height, kb_width, kb_height,
+                 compact=False, on_query=None, on_close=None):
+        self.on_query = on_query
+        self.on_close = on_close
+
+        # Field bar
+        self.bar = lv.obj(parent)
+        self.bar.set_size(width, height)
+        self.bar.set_style_bg_color(Theme.hex(Theme.BG_PRIMARY), 0)
+        self.bar.set_style_border_width(0, 0)
+        self.bar.set_style_radius(0, 0)
+        self.bar.set_style_pad_all(4, 0)
+        self.bar.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        self.bar.add_flag(lv.obj.FLAG.HIDDEN)
+
+        self.field = lv.textarea(self.bar)
+        self.field.set_size(width - 8 - 44, height - 8)
+        self.field.align(lv.ALIGN.LEFT_MID, 0, 0)
+        self.field.set_one_line(True)
+        self.field.set_placeholder_text("Search name or SKU")
+        self.field.set_style_bg_color(Theme.hex(Theme.BG_SECONDARY), 0)
+        self.field.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        self.field.set_style_border_color(Theme.hex(Theme.DIVIDER), 0)
+        self.field.set_style_radius(20, 0)
+        self.field.add_event_cb(self._on_change, lv.EVENT.VALUE_CHANGED, None)
+
+        close_btn = lv.button(self.bar)
+        close_btn.set_size(40, height - 8)
+        close_btn.align(lv.ALIGN.RIGHT_MID, 0, 0)
+        close_btn.set_style_bg_opa(lv.OPA.TRANSP, 0)
+        close_btn.set_style_shadow_width(0, 0)
+        close_btn.add_event_cb(lambda e: self.close(), lv.EVENT.CLICKED, None)
+
+        close_icon = lv.label(close_btn)
+        close_icon.set_text(lv.SYMBOL.CLOSE)
+        close_icon.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+        close_icon.center()
+
+        # Keyboard
+        self.keyboard = lv.keyboard(parent)
+        self.keyboard.set_size(kb_width, kb_height)
+        self.keyboard.set_textarea(self.field)
+        if compact:
+            self.keyboard.set_map(lv.keyboard.MODE.USER_1, self.COMPACT_MAP, self.COMPACT_CTRL)
+            self.keyboard.set_mode(lv.keyboard.MODE.USER_1)
+        self.keyboard.add_event_cb(lambda e: self.close(), lv.EVENT.READY, None)
+        self.keyboard.add_event_cb(lambda e: self.close(), lv.EVENT.CANCEL, None)
+        self.keyboard.add_flag(lv.obj.FLAG.HIDDEN)
+
+    def is_open(self):
+        return not self.bar.has_flag(lv.obj.FLAG.HIDDEN)
+
+    def open(self):
+        self.field.set_text("")
+        self.bar.remove_flag(lv.obj.FLAG.HIDDEN)
+        self.keyboard.remove_flag(lv.obj.FLAG.HIDDEN)
+        self.bar.move_foreground()
+        self.keyboard.move_foreground()
+
+    def close(self):
+        if not self.is_open():
+            return
+        self.bar.add_flag(lv.obj.FLAG.HIDDEN)
+        self.keyboard.add_flag(lv.obj.FLAG.HIDDEN)
+        if self.on_close:
+            self.on_close()
+
+    def _on_change(self, event):
+        if self.on_query and self.is_open():
+            self.on_query(self.field.get_text())
+
+
 class Notification:
-    """Transient toast notification (simplified for lv_micropython compatibility)"""
+    """Transient toast notification
+
+    Fades in and out through Styles.toast transitions; the only Python
+    call after creation is the timer that starts the fade out.
+    """
 
     def __init__(self, parent, text, duration=2000, style="info"):
         self.container = lv.obj(parent)
+        self.container.add_style(Styles.toast, 0)
+        self.container.add_style(Styles.toast_hidden, lv.STATE.USER_1)
         self.container.set_style_bg_color(Theme.hex(Theme.BG_CARD), 0)
         self.container.set_style_border_width(2, 0)
         self.container.set_style_radius(20, 0)
@@ -450,7 +1004,11 @@ class Notification:
         label.set_style_text_font(get_font(14), 0)
         label.center()
 
-        # Use timer to auto-delete (if available)
+        # Fade in: leaving USER_1 starts the transition from transparent
+        self.container.add_state(lv.STATE.USER_1)
+        self.container.remove_state(lv.STATE.USER_1)
+
+        # Use timer to fade out and delete (if available)
         try:
             timer = lv.timer_create(lambda t: self._close(), duration, None)
             timer.set_repeat_count(1)
@@ -459,18 +1017,28 @@ class Notification:
 
     def _close(self):
         try:
-            self.container.delete()
+            self.container.add_state(lv.STATE.USER_1)
+            # LVGL deletes it once the fade is over
+            self.container.delete_delayed(0 if Styles.fast else Styles.FADE_MS)
         except:
             pass
 
 
 class CartPanel:
-    """Cart display panel for compact layout (3.5" screens)"""
+    """Cart display panel for compact layout (3.5" screens)
+
+    Chips are recycled like product buttons: update() rebinds existing
+    chips to the cart's lines and hides the rest, so switching to another
+    open tab doesn't rebuild the panel.
+    """
 
-    def __init__(self, parent, width, height, on_pay=None, on_item_click=None):
+    def __init__(self, parent, width, height, on_pay=None, on_item_click=None, on_tabs=None):
         self.on_pay = on_pay
         self.on_item_click = on_item_click
         self.cart = []
+        self.lines = []   # cart line bound to each visible chip
+        self.chips = []   # (chip, label), pooled
+        self.on_tabs = on_tabs
 
         self.container = lv.obj(parent)
         self.container.set_size(width, height)
@@ -490,11 +1058,14 @@ class CartPanel:
         header.set_style_pad_all(0, 0)
         header.align(lv.ALIGN.TOP_LEFT, 0, 0)
         header.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        if self.on_tabs:
+            # The header opens the open tabs list
+            header.add_event_cb(lambda e: self.on_tabs(), lv.EVENT.CLICKED, None)
 
-        cart_label = lv.label(header)
-        cart_label.set_text("Cart")
-        cart_label.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
-        cart_label.align(lv.ALIGN.LEFT_MID, 0, 0)
+        self.title_label = lv.label(header)
+        self.title_label.set_text("Cart")
+        self.title_label.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+        self.title_label.align(lv.ALIGN.LEFT_MID, 0, 0)
 
         self.count_label = lv.label(header)
         self.count_label.set_text("0 items")
@@ -512,6 +1083,25 @@ class CartPanel:
         self.items_container.set_style_pad_column(4, 0)
         self.items_container.set_scroll_dir(lv.DIR.HOR)
         self.items_container.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        delegate_clicks(self.items_container, self._on_item_click)
+
+        # Empty cart placeholder: the first child, chips follow it
+        self.empty = lv.obj(self.items_container)
+        self.empty.set_size(lv.pct(100), lv.pct(100))
+        self.empty.set_style_bg_opa(lv.OPA.TRANSP, 0)
+        self.empty.set_style_border_width(0, 0)
+        self.empty.set_flex_flow(lv.FLEX_FLOW.ROW)
+        self.empty.set_flex_align(lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER)
+        self.empty.set_style_pad_gap(8, 0)
+
+        icon = lv.label(self.empty)
+        icon.set_text(safe_text("🛒", 16))
+        icon.set_style_text_font(get_font(16), 0)
+        icon.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+
+        empty = lv.label(self.empty)
+        empty.set_text("Tap items to add")
+        empty.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
 
         # Divider
         divider = lv.obj(self.container)
@@ -548,10 +1138,7 @@ class CartPanel:
         self.pay_btn.set_style_bg_color(Theme.hex(Theme.ACCENT_GREEN), 0)
         self.pay_btn.set_style_radius(10, 0)
         self.pay_btn.add_event_cb(self._on_pay_click, lv.EVENT.CLICKED, None)
-        # Glow
-        self.pay_btn.set_style_shadow_width(20, 0)
-        self.pay_btn.set_style_shadow_color(Theme.hex(Theme.ACCENT_GREEN), 0)
-        self.pay_btn.set_style_shadow_opa(lv.OPA._30, 0)
+        self.pay_btn.add_style(Styles.pay_glow, 0)
 
         pay_label = lv.label(self.pay_btn)
         pay_label.set_text("Charge Card")
@@ -563,64 +1150,75 @@ class CartPanel:
         if self.cart and self.on_pay:
             self.on_pay()
 
-    def update(self, cart, total):
+    def _on_item_click(self, index):
+        # Chips follow the placeholder in cart line order
+        if self.on_item_click and 0 < index <= len(self.lines):
+            self.on_item_click(self.lines[index - 1])
+
+    def set_title(self, text):
+        self.title_label.set_text(text)
+
+    def update(self, cart, total, discount=0):
         self.cart = cart
+        self.lines = list(cart)
 
-        # Update count
-        count = sum(item['qty'] for item in cart)
-        self.count_label.set_text(f"{count} item{'s' if count != 1 else ''}")
+        # Update count (and what pricing rules took off)
+        count = sum(item.qty for item in cart)
+        text = f"{count} item{'s' if count != 1 else ''}"
+        if discount:
+            text += f", ${discount:.2f} off"
+        self.count_label.set_text(text)
 
         # Update total
         self.total_label.set_text(f"${total:.2f}")
 
         # Update items
-        self.items_container.clean()
-
-        if not cart:
-            empty_cont = lv.obj(self.items_container)
-            empty_cont.set_size(lv.pct(100), lv.pct(100))
-            empty_cont.set_style_bg_opa(lv.OPA.TRANSP, 0)
-            empty_cont.set_style_border_width(0, 0)
-            empty_cont.set_flex_flow(lv.FLEX_FLOW.ROW)
-            empty_cont.set_flex_align(lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER)
-            empty_cont.set_style_pad_gap(8, 0)
-            
-            icon = lv.label(empty_cont)
-            icon.set_text("🛒") # Or lv.SYMBOL.CART if available
-            icon.set_style_text_font(get_font(16), 0)
-            icon.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
-            
-            empty = lv.label(empty_cont)
-            empty.set_text("Tap items to add")
-            empty.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+        if self.lines:
+            self.empty.add_flag(lv.obj.FLAG.HIDDEN)
         else:
-            for item in cart:
-                self._create_chip(item)
-
-    def _create_chip(self, item):
+            self.empty.remove_flag(lv.obj.FLAG.HIDDEN)
+        while len(self.chips) < len(self.lines):
+            self._create_chip()
+        for i, item in enumerate(self.lines):
+            self._bind_chip(i, item)
+        for chip, _ in self.chips[len(self.lines):]:
+            chip.add_flag(lv.obj.FLAG.HIDDEN)
+
+    def _create_chip(self):
         chip = lv.button(self.items_container)
+        chip.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
         chip.set_size(lv.SIZE_CONTENT, 32)
         chip.set_style_bg_color(Theme.hex(Theme.BG_SECONDARY), 0)
         chip.set_style_radius(16, 0)
         chip.set_style_pad_hor(12, 0)
 
-        text = f"{item['qty']}x {item['name'][:10]}" if item['qty'] > 1 else item['name'][:12]
         label = lv.label(chip)
-        label.set_text(text)
         label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
         label.set_style_text_font(get_font(12), 0)
+        self.chips.append((chip, label))
 
-        if self.on_item_click:
-            chip.add_event_cb(lambda e: self.on_item_click(item), lv.EVENT.CLICKED, None)
+    def _bind_chip(self, i, item):
+        chip, label = self.chips[i]
+        text = f"{item.qty}x {item.name[:10]}" if item.qty > 1 else item.name[:12]
+        if item.mods:
+            text += "*"
+        label.set_text(text)
+        chip.remove_flag(lv.obj.FLAG.HIDDEN)
 
 
 class CartPanelWide:
-    """Cart display panel for widescreen layout (8" screens)"""
+    """Cart display panel for widescreen layout (8" screens)
 
-    def __init__(self, parent, width, height, on_pay=None, on_item_click=None):
+    Rows are pooled and rebound like CartPanel's chips.
+    """
+
+    def __init__(self, parent, width, height, on_pay=None, on_item_click=None, on_tabs=None):
         self.on_pay = on_pay
         self.on_item_click = on_item_click
+        self.on_tabs = on_tabs
         self.cart = []
+        self.lines = []   # cart line bound to each visible row
+        self.rows = []    # (row, qty, name, mods, price), pooled
 
         self.container = lv.obj(parent)
         self.container.set_size(width, height)
@@ -640,12 +1238,14 @@ class CartPanelWide:
         header.set_style_border_width(0, 0)
         header.set_style_pad_all(0, 0)
         header.align(lv.ALIGN.TOP_LEFT, 0, 0)
+        if self.on_tabs:
+            header.add_event_cb(lambda e: self.on_tabs(), lv.EVENT.CLICKED, None)
 
-        cart_label = lv.label(header)
-        cart_label.set_text("Current Order")
-        cart_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
-        cart_label.set_style_text_font(get_font(18), 0)
-        cart_label.align(lv.ALIGN.LEFT_TOP, 0, 0)
+        self.title_label = lv.label(header)
+        self.title_label.set_text("Current Order")
+        self.title_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        self.title_label.set_style_text_font(get_font(18), 0)
+        self.title_label.align(lv.ALIGN.LEFT_TOP, 0, 0)
 
         self.count_label = lv.label(header)
         self.count_label.set_text("0 items")
@@ -666,6 +1266,28 @@ class CartPanelWide:
         self.items_container.set_flex_flow(lv.FLEX_FLOW.COLUMN)
         self.items_container.set_style_pad_row(8, 0)
         self.items_container.set_scrollbar_mode(lv.SCROLLBAR_MODE.AUTO)
+        delegate_clicks(self.items_container, self._on_item_click)
+
+        # Empty cart placeholder: the first child, rows follow it
+        self.empty = lv.obj(self.items_container)
+        self.empty.set_size(lv.pct(100), lv.pct(100))
+        self.empty.set_style_bg_opa(lv.OPA.TRANSP, 0)
+        self.empty.set_style_border_width(0, 0)
+        self.empty.center()
+        self.empty.set_flex_flow(lv.FLEX_FLOW.COLUMN)
+        self.empty.set_flex_align(lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER)
+        self.empty.set_style_pad_gap(10, 0)
+
+        icon = lv.label(self.empty)
+        icon.set_text(safe_text("🛒", 28))
+        icon.set_style_text_font(get_font(28), 0)
+        icon.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+        icon.set_style_text_opa(lv.OPA._50, 0)
+
+        empty = lv.label(self.empty)
+        empty.set_text("Tap items to add\nto order")
+        empty.set_style_text_align(lv.TEXT_ALIGN.CENTER, 0)
+        empty.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
 
         # Footer (Totals + Pay) - Fixed at bottom of container
         self.footer = lv.obj(self.container)
@@ -729,10 +1351,7 @@ class CartPanelWide:
         self.pay_btn.set_style_bg_color(Theme.hex(Theme.ACCENT_GREEN), 0)
         self.pay_btn.set_style_radius(8, 0)
         self.pay_btn.add_event_cb(self._on_pay_click, lv.EVENT.CLICKED, None)
-        # Glow
-        self.pay_btn.set_style_shadow_width(20, 0)
-        self.pay_btn.set_style_shadow_color(Theme.hex(Theme.ACCENT_GREEN), 0)
-        self.pay_btn.set_style_shadow_opa(lv.OPA._30, 0)
+        self.pay_btn.add_style(Styles.pay_glow, 0)
 
         pay_label = lv.label(self.pay_btn)
         pay_label.set_text("Charge Card")
@@ -744,46 +1363,46 @@ class CartPanelWide:
         if self.cart and self.on_pay:
             self.on_pay()
 
-    def update(self, cart, total):
+    def _on_item_click(self, index):
+        # Rows follow the placeholder in cart line order
+        if self.on_item_click and 0 < index <= len(self.lines):
+            self.on_item_click(self.lines[index - 1])
+
+    def set_title(self, text):
+        self.title_label.set_text(text)
+
+    def update(self, cart, total, discount=0):
         self.cart = cart
-        
+        self.lines = list(cart)
+
         # Update labels
-        count = sum(item['qty'] for item in cart)
-        self.count_label.set_text(f"{count} items")
+        count = sum(item.qty for item in cart)
+        if discount:
+            self.count_label.set_text(f"{count} items, ${discount:.2f} off")
+        else:
+            self.count_label.set_text(f"{count} items")
         self.total_label.set_text(f"${total:.2f}")
 
         # Update List
-        self.items_container.clean()
-        
-        if not cart:
-            empty_cont = lv.obj(self.items_container)
-            empty_cont.set_size(lv.pct(100), lv.pct(100))
-            empty_cont.set_style_bg_opa(lv.OPA.TRANSP, 0)
-            empty_cont.set_style_border_width(0, 0)
-            empty_cont.center()
-            empty_cont.set_flex_flow(lv.FLEX_FLOW.COLUMN)
-            empty_cont.set_flex_align(lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER, lv.FLEX_ALIGN.CENTER)
-            empty_cont.set_style_pad_gap(10, 0)
-
-            icon = lv.label(empty_cont)
-            icon.set_text("🛒")
-            icon.set_style_text_font(get_font(28), 0)
-            icon.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
-            icon.set_style_text_opa(lv.OPA._50, 0)
-
-            empty = lv.label(empty_cont)
-            empty.set_text("Tap items to add\nto order")
-            empty.set_style_text_align(lv.TEXT_ALIGN.CENTER, 0)
-            empty.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+        if self.lines:
+            self.empty.add_flag(lv.obj.FLAG.HIDDEN)
         else:
-            for item in cart:
-                self._create_row(item)
-
-    def _create_row(self, item):
+            self.empty.remove_flag(lv.obj.FLAG.HIDDEN)
+        while len(self.rows) < len(self.lines):
+            self._create_row()
+        for i, item in enumerate(self.lines):
+            self._bind_row(i, item)
+        for slot in self.rows[len(self.lines):]:
+            slot[0].add_flag(lv.obj.FLAG.HIDDEN)
+
+    def _create_row(self):
         row = lv.obj(self.items_container)
         row.set_size(lv.pct(100), 52)
         row.add_style(Styles.cart_item_row, 0)
         row.remove_flag(lv.obj.FLAG.SCROLLABLE)
+        # Only the remove button reacts; its tap bubbles through the row
+        row.remove_flag(lv.obj.FLAG.CLICKABLE)
+        row.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
 
         # Qty Circle
         qty_bg = lv.obj(row)
@@ -794,45 +1413,502 @@ class CartPanelWide:
         qty_bg.align(lv.ALIGN.LEFT_MID, 0, 0)
         
         qty_lbl = lv.label(qty_bg)
-        qty_lbl.set_text(str(item['qty']))
         qty_lbl.set_style_text_color(Theme.hex(Theme.BG_PRIMARY), 0)
         qty_lbl.center()
 
         # Name
         name_lbl = lv.label(row)
-        name_lbl.set_text(item['name'])
         name_lbl.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
         name_lbl.set_width(120)
         name_lbl.set_long_mode(lv.LABEL_LONG_MODE.DOTS)
-        name_lbl.align(lv.ALIGN.LEFT_MID, 36, 0)
+
+        # Modifiers (under name, hidden when there are none)
+        mods_lbl = lv.label(row)
+        mods_lbl.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+        mods_lbl.set_style_text_font(get_font(12), 0)
+        mods_lbl.set_width(120)
+        mods_lbl.set_long_mode(lv.LABEL_LONG_MODE.DOTS)
+        mods_lbl.align(lv.ALIGN.LEFT_MID, 36, 10)
 
         # Price
         price_lbl = lv.label(row)
-        price_lbl.set_text(f"${(item['price'] * item['qty']):.2f}")
         price_lbl.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
         price_lbl.align(lv.ALIGN.RIGHT_MID, -40, 0)
 
         # Remove Button (X)
         del_btn = lv.button(row)
         del_btn.set_size(30, 30)
-        del_btn.set_style_bg_color(Theme.hex(Theme.DANGER), 0)
-        del_btn.set_style_bg_opa(lv.OPA._20, 0)
+        if Styles.fast:
+            # Opaque equivalent of 20% DANGER over the row; no theme shadow
+            del_btn.set_style_bg_color(lv.color_hex(blend(Theme.DANGER, Theme.BG_CARD, 51)), 0)
+            del_btn.set_style_shadow_width(0, 0)
+        else:
+            del_btn.set_style_bg_color(Theme.hex(Theme.DANGER), 0)
+            del_btn.set_style_bg_opa(lv.OPA._20, 0)
         del_btn.set_style_radius(15, 0)
         del_btn.align(lv.ALIGN.RIGHT_MID, 0, 0)
-        del_btn.add_event_cb(lambda e: self.on_item_click(item) if self.on_item_click else None, lv.EVENT.CLICKED, None)
+        del_btn.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
 
         x_lbl = lv.label(del_btn)
         x_lbl.set_text("x") # or lv.SYMBOL.CLOSE
         x_lbl.set_style_text_color(Theme.hex(Theme.DANGER), 0)
         x_lbl.center()
 
+        self.rows.append((row, qty_lbl, name_lbl, mods_lbl, price_lbl))
+
+    def _bind_row(self, i, item):
+        row, qty_lbl, name_lbl, mods_lbl, price_lbl = self.rows[i]
+        qty_lbl.set_text(str(item.qty))
+        name_lbl.set_text(item.name)
+        name_lbl.align(lv.ALIGN.LEFT_MID, 36, -8 if item.mods else 0)
+        if item.mods:
+            mods_lbl.set_text(item.mods)
+            mods_lbl.remove_flag(lv.obj.FLAG.HIDDEN)
+        else:
+            mods_lbl.add_flag(lv.obj.FLAG.HIDDEN)
+        price_lbl.set_text(f"${(item.price * item.qty):.2f}")
+        row.remove_flag(lv.obj.FLAG.HIDDEN)
+
+
+class ModifierModal:
+    """Modifier picker overlay, built once and reused for every product.
+
+    Sections and option buttons are pooled: opening the modal for another
+    product rebinds existing widgets and only creates new ones when a
+    product needs more than any previous one did. Taps update the running
+    price from the product's ModifierTable instead of re-rendering.
+    """
+
+    def __init__(self, parent, width, height):
+        self.product = None
+        self.table = None
+        self.mask = 0
+        self.price = 0
+        self.on_confirm = None
+        self.sections = []   # (section, title_label, [option buttons])
+
+        self.overlay = lv.obj(parent)
+        self.overlay.set_size(width, height)
+        self.overlay.set_style_bg_color(lv.color_hex(0x000000), 0)
+        self.overlay.set_style_bg_opa(lv.OPA._80, 0)
+        self.overlay.set_style_border_width(0, 0)
+        self.overlay.set_style_radius(0, 0)
+        self.overlay.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        self.overlay.add_flag(lv.obj.FLAG.HIDDEN)
+
+        card = lv.obj(self.overlay)
+        card.set_size(min(360, width - 20), height - 40)
+        card.center()
+        card.add_style(Styles.card, 0)
+        card.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+
+        # Header: product name + running price
+        self.name_label = lv.label(card)
+        self.name_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        self.name_label.set_style_text_font(get_font(18), 0)
+        self.name_label.align(lv.ALIGN.TOP_LEFT, 4, 4)
+
+        self.price_label = lv.label(card)
+        self.price_label.set_style_text_color(Theme.hex(Theme.ACCENT), 0)
+        self.price_label.set_style_text_font(get_font(18), 0)
+        self.price_label.align(lv.ALIGN.TOP_RIGHT, -4, 4)
+
+        # Scrollable list of modifier sections
+        self.body = lv.obj(card)
+        self.body.set_size(lv.pct(100), height - 40 - 16 - 36 - 52)
+        self.body.set_pos(0, 36)
+        self.body.set_style_bg_opa(lv.OPA.TRANSP, 0)
+        self.body.set_style_border_width(0, 0)
+        self.body.set_style_pad_all(0, 0)
+        self.body.set_flex_flow(lv.FLEX_FLOW.COLUMN)
+        self.body.set_style_pad_row(8, 0)
+        self.body.set_scrollbar_mode(lv.SCROLLBAR_MODE.AUTO)
+        self.body.add_event_cb(self._on_body_click, lv.EVENT.CLICKED, None)
+
+        # Actions
+        self.cancel_btn = lv.button(card)
+        self.cancel_btn.set_size(lv.pct(48), 44)
+        self.cancel_btn.align(lv.ALIGN.BOTTOM_LEFT, 0, 0)
+        self.cancel_btn.add_style(Styles.btn_secondary, 0)
+        self.cancel_btn.add_event_cb(lambda e: self.close(), lv.EVENT.CLICKED, None)
+
+        cancel_label = lv.label(self.cancel_btn)
+        cancel_label.set_text("Cancel")
+        cancel_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        cancel_label.center()
+
+        self.add_btn = lv.button(card)
+        self.add_btn.set_size(lv.pct(48), 44)
+        self.add_btn.align(lv.ALIGN.BOTTOM_RIGHT, 0, 0)
+        self.add_btn.set_style_bg_color(Theme.hex(Theme.ACCENT_GREEN), 0)
+        self.add_btn.set_style_radius(10, 0)
+        self.add_btn.add_event_cb(lambda e: self._on_add(), lv.EVENT.CLICKED, None)
+
+        add_label = lv.label(self.add_btn)
+        add_label.set_text("Add to Order")
+        add_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        add_label.center()
+
+    def _section(self, g):
+        """Get pooled section `g`, creating it on first use"""
+        while len(self.sections) <= g:
+            section = lv.obj(self.body)
+            section.set_size(lv.pct(100), lv.SIZE_CONTENT)
+            section.set_style_bg_opa(lv.OPA.TRANSP, 0)
+            section.set_style_border_width(0, 0)
+            section.set_style_pad_all(0, 0)
+            section.set_flex_flow(lv.FLEX_FLOW.ROW_WRAP)
+            section.set_style_pad_gap(6, 0)
+            section.remove_flag(lv.obj.FLAG.SCROLLABLE)
+            section.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
+
+            title = lv.label(section)
+            title.set_width(lv.pct(100))
+            title.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+            title.set_style_text_font(get_font(12), 0)
+
+            self.sections.append((section, title, []))
+        return self.sections[g]
+
+    def _option(self, g, o):
+        """Get pooled option button `o` of section `g`"""
+        section, _, options = self._section(g)
+        while len(options) <= o:
+            btn = lv.button(section)
+            btn.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
+            btn.set_size(lv.SIZE_CONTENT, 40)
+            btn.add_style(Styles.btn_secondary, 0)
+            btn.add_style(Styles.category_active, lv.STATE.CHECKED)
+            btn.set_style_pad_hor(10, 0)
+
+            label = lv.label(btn)
+            label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+            label.set_style_text_font(get_font(12), 0)
+            label.set_style_text_align(lv.TEXT_ALIGN.CENTER, 0)
+            label.center()
+
+            options.append(btn)
+        return options[o]
+
+    def open(self, product, table, on_confirm):
+        """Show the modal for `product`; on_confirm(product, mask) on add"""
+        self.product = product
+        self.table = table
+        self.on_confirm = on_confirm
+        self.mask = table.default_mask
+        self.price = product.price + table.price(self.mask)
+
+        self.name_label.set_text(product.name)
+        self._update_price()
+
+        for g, (name, required, first_bit, count) in enumerate(table.groups):
+            section, title, _ = self._section(g)
+            section.remove_flag(lv.obj.FLAG.HIDDEN)
+            title.set_text(f"{name}  (Required)" if required else name)
+
+            for o in range(count):
+                bit = first_bit + o
+                btn = self._option(g, o)
+                btn.remove_flag(lv.obj.FLAG.HIDDEN)
+                price = table.prices[bit]
+                text = table.names[bit]
+                btn.get_child(0).set_text(f"{text}\n+${price:.2f}" if price > 0 else text)
+                if self.mask & (1 << bit):
+                    btn.add_state(lv.STATE.CHECKED)
+                else:
+                    btn.remove_state(lv.STATE.CHECKED)
+
+            # Hide pooled buttons this product doesn't use
+            for btn in self.sections[g][2][count:]:
+                btn.add_flag(lv.obj.FLAG.HIDDEN)
+
+        for section, _, _ in self.sections[len(table.groups):]:
+            section.add_flag(lv.obj.FLAG.HIDDEN)
+
+        self.body.scroll_to_y(0, lv.ANIM.OFF)
+        self.overlay.remove_flag(lv.obj.FLAG.HIDDEN)
+        self.overlay.move_foreground()
+
+    def close(self):
+        self.overlay.add_flag(lv.obj.FLAG.HIDDEN)
+        self.product = None
+
+    def _on_body_click(self, event):
+        # One handler for every option: section and button positions give
+        # the group and option (index 0 in a section is its title)
+        target = event.get_target_obj()
+        section = child_of(self.body, target)
+        btn = child_of(section, target) if section is not None else None
+        if btn is not None and btn.get_index() > 0:
+            self._on_option(section.get_index(), btn.get_index() - 1)
+
+    def _on_option(self, g, o):
+        table = self.table
+        name, required, first_bit, count = table.groups[g]
+        old_mask = self.mask
+        self.mask, delta = table.toggle(old_mask, first_bit + o)
+        self.price += delta
+
+        # Only the buttons whose state changed in this group are touched
+        changed = (old_mask ^ self.mask) >> first_bit
+        options = self.sections[g][2]
+        i = 0
+        while changed and i < count:
+            if changed & 1:
+                if self.mask & (1 << (first_bit + i)):
+                    options[i].add_state(lv.STATE.CHECKED)
+                else:
+                    options[i].remove_state(lv.STATE.CHECKED)
+            changed >>= 1
+            i += 1
+
+        self._update_price()
+
+    def _update_price(self):
+        self.price_label.set_text(f"${self.price:.2f}")
+
+    def _on_add(self):
+        product, mask, on_confirm = self.product, self.mask, self.on_confirm
+        self.close()
+        if on_confirm and product:
+            on_confirm(product, mask)
+
+
+class TabsModal:
+    """Open tabs list, built once; tab buttons are pooled and rebound"""
+
+    def __init__(self, parent, width, height):
+        self.tabs = []
+        self.on_select = None
+        self.on_new = None
+        self.buttons = []   # (button, name label, summary label)
+
+        self.overlay = lv.obj(parent)
+        self.overlay.set_size(width, height)
+        self.overlay.set_style_bg_color(lv.color_hex(0x000000), 0)
+        self.overlay.set_style_bg_opa(lv.OPA._80, 0)
+        self.overlay.set_style_border_width(0, 0)
+        self.overlay.set_style_radius(0, 0)
+        self.overlay.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        self.overlay.add_flag(lv.obj.FLAG.HIDDEN)
+
+        card = lv.obj(self.overlay)
+        card.set_size(min(360, width - 20), height - 40)
+        card.center()
+        card.add_style(Styles.card, 0)
+        card.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+
+        self.title = lv.label(card)
+        self.title.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        self.title.set_style_text_font(get_font(18), 0)
+        self.title.align(lv.ALIGN.TOP_LEFT, 4, 4)
+
+        # Scrollable list of tabs
+        self.body = lv.obj(card)
+        self.body.set_size(lv.pct(100), height - 40 - 16 - 36 - 52)
+        self.body.set_pos(0, 36)
+        self.body.set_style_bg_opa(lv.OPA.TRANSP, 0)
+        self.body.set_style_border_width(0, 0)
+        self.body.set_style_pad_all(0, 0)
+        self.body.set_flex_flow(lv.FLEX_FLOW.COLUMN)
+        self.body.set_style_pad_row(6, 0)
+        self.body.set_scrollbar_mode(lv.SCROLLBAR_MODE.AUTO)
+        delegate_clicks(self.body, self._on_tab_click)
+
+        # Actions
+        self.close_btn = lv.button(card)
+        self.close_btn.set_size(lv.pct(48), 44)
+        self.close_btn.align(lv.ALIGN.BOTTOM_LEFT, 0, 0)
+        self.close_btn.add_style(Styles.btn_secondary, 0)
+        self.close_btn.add_event_cb(lambda e: self.close(), lv.EVENT.CLICKED, None)
+
+        close_label = lv.label(self.close_btn)
+        close_label.set_text("Close")
+        close_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        close_label.center()
+
+        self.new_btn = lv.button(card)
+        self.new_btn.set_size(lv.pct(48), 44)
+        self.new_btn.align(lv.ALIGN.BOTTOM_RIGHT, 0, 0)
+        self.new_btn.set_style_bg_color(Theme.hex(Theme.ACCENT), 0)
+        self.new_btn.set_style_radius(10, 0)
+        self.new_btn.add_event_cb(lambda e: self._on_new(), lv.EVENT.CLICKED, None)
+
+        new_label = lv.label(self.new_btn)
+        new_label.set_text("New Order")
+        new_label.set_style_text_color(Theme.hex(Theme.BG_PRIMARY), 0)
+        new_label.center()
+
+    def _button(self, i):
+        """Get pooled tab button `i`"""
+        while len(self.buttons) <= i:
+            btn = lv.button(self.body)
+            btn.add_flag(lv.obj.FLAG.EVENT_BUBBLE)
+            btn.set_size(lv.pct(100), 44)
+            btn.add_style(Styles.btn_secondary, 0)
+
+            name = lv.label(btn)
+            name.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+            name.align(lv.ALIGN.LEFT_MID, 0, 0)
+
+            summary = lv.label(btn)
+            summary.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+            summary.set_style_text_font(get_font(12), 0)
+            summary.align(lv.ALIGN.RIGHT_MID, 0, 0)
+
+            self.buttons.append((btn, name, summary))
+        return self.buttons[i]
+
+    def is_open(self):
+        return not self.overlay.has_flag(lv.obj.FLAG.HIDDEN)
+
+    def open(self, tabs, on_select, on_new):
+        """Show `tabs` (Tab records); on_select(tab) on a tap, on_new() for New Order"""
+        self.tabs = list(tabs)
+        self.on_select = on_select
+        self.on_new = on_new
+
+        self.title.set_text(f"Open Tabs ({len(self.tabs)})")
+        for i, tab in enumerate(self.tabs):
+            btn, name, summary = self._button(i)
+            name.set_text(tab.name)
+            summary.set_text(f"{tab.count} items  ${tab.total:.2f}")
+            btn.remove_flag(lv.obj.FLAG.HIDDEN)
+        for btn, _, _ in self.buttons[len(self.tabs):]:
+            btn.add_flag(lv.obj.FLAG.HIDDEN)
+
+        self.body.scroll_to_y(0, lv.ANIM.OFF)
+        self.overlay.remove_flag(lv.obj.FLAG.HIDDEN)
+        self.overlay.move_foreground()
+
+    def close(self):
+        self.overlay.add_flag(lv.obj.FLAG.HIDDEN)
+        self.tabs = []
+
+    def _on_tab_click(self, index):
+        if index < len(self.tabs) and self.on_select:
+            tab = self.tabs[index]
+            self.close()
+            self.on_select(tab)
+
+    def _on_new(self):
+        on_new = self.on_new
+        self.close()
+        if on_new:
+            on_new()
+
+
+class SettingsScreen:
+    """Settings overlay with the shift report (built once, text rebound)
+
+    Closing the day takes two taps: the first one arms the button.
+    """
+
+    def __init__(self, parent, width, height):
+        self.on_close_day = None
+        self._armed = False
+
+        self.overlay = lv.obj(parent)
+        self.overlay.set_size(width, height)
+        self.overlay.set_style_bg_color(lv.color_hex(0x000000), 0)
+        self.overlay.set_style_bg_opa(lv.OPA._80, 0)
+        self.overlay.set_style_border_width(0, 0)
+        self.overlay.set_style_radius(0, 0)
+        self.overlay.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        self.overlay.add_flag(lv.obj.FLAG.HIDDEN)
+
+        card = lv.obj(self.overlay)
+        card.set_size(min(360, width - 20), height - 40)
+        card.center()
+        card.add_style(Styles.card, 0)
+        card.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+
+        title = lv.label(card)
+        title.set_text("Shift Report")
+        title.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        title.set_style_text_font(get_font(18), 0)
+        title.align(lv.ALIGN.TOP_LEFT, 4, 4)
+
+        # Scrollable report text
+        self.body = lv.obj(card)
+        self.body.set_size(lv.pct(100), height - 40 - 16 - 36 - 52)
+        self.body.set_pos(0, 36)
+        self.body.set_style_bg_color(Theme.hex(Theme.BG_SECONDARY), 0)
+        self.body.set_style_border_width(0, 0)
+        self.body.set_style_radius(8, 0)
+        self.body.set_style_pad_all(8, 0)
+        self.body.set_scrollbar_mode(lv.SCROLLBAR_MODE.AUTO)
+
+        self.report = lv.label(self.body)
+        self.report.set_width(lv.pct(100))
+        self.report.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        self.report.set_style_text_font(get_font(12), 0)
+
+        # Actions
+        self.close_btn = lv.button(card)
+        self.close_btn.set_size(lv.pct(48), 44)
+        self.close_btn.align(lv.ALIGN.BOTTOM_LEFT, 0, 0)
+        self.close_btn.add_style(Styles.btn_secondary, 0)
+        self.close_btn.add_event_cb(lambda e: self.close(), lv.EVENT.CLICKED, None)
+
+        close_label = lv.label(self.close_btn)
+        close_label.set_text("Close")
+        close_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        close_label.center()
+
+        self.z_btn = lv.button(card)
+        self.z_btn.set_size(lv.pct(48), 44)
+        self.z_btn.align(lv.ALIGN.BOTTOM_RIGHT, 0, 0)
+        self.z_btn.set_style_bg_color(Theme.hex(Theme.DANGER), 0)
+        self.z_btn.set_style_radius(10, 0)
+        self.z_btn.add_event_cb(lambda e: self._on_z(), lv.EVENT.CLICKED, None)
+
+        self.z_label = lv.label(self.z_btn)
+        self.z_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        self.z_label.center()
+
+    def is_open(self):
+        return not self.overlay.has_flag(lv.obj.FLAG.HIDDEN)
+
+    def open(self, report_text, on_close_day):
+        """Show `report_text`; on_close_day() returns the Z report text"""
+        self.on_close_day = on_close_day
+        self.show_report(report_text)
+        self.overlay.remove_flag(lv.obj.FLAG.HIDDEN)
+        self.overlay.move_foreground()
+
+    def show_report(self, text):
+        self.report.set_text(text)
+        self.body.scroll_to_y(0, lv.ANIM.OFF)
+        self._arm(False)
+
+    def close(self):
+        self.overlay.add_flag(lv.obj.FLAG.HIDDEN)
+        self.report.set_text("")
+
+    def _arm(self, armed):
+        self._armed = armed
+        self.z_label.set_text("Tap to confirm" if armed else "Close Day (Z)")
+
+    def _on_z(self):
+        if not self._armed:
+            self._arm(True)
+            return
+        if self.on_close_day:
+            self.show_report(self.on_close_day())
+
 
 class PaymentScreen:
-    """Payment processing overlay"""
+    """Payment overlay, updated from the payment state machine
+
+    The bar counts down the time the payment session allows in its
+    current state (animated by LVGL itself, no Python per frame). The button calls on_cancel(): the app aborts the
+    payment, or after a decline or timeout (button reads CLOSE) closes
+    the overlay.
+    """
 
-    def __init__(self, parent, width, height, amount, on_cancel=None, on_complete=None):
+    def __init__(self, parent, width, height, amount, on_cancel=None, timeout_ms=0):
         self.on_cancel = on_cancel
-        self.on_complete = on_complete
         self.amount = amount
 
         # Overlay
@@ -852,10 +1928,10 @@ class PaymentScreen:
         card.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
 
         # Icon
-        icon = lv.label(card)
-        icon.set_text("📶")
-        icon.set_style_text_font(get_font(48), 0)
-        icon.align(lv.ALIGN.TOP_MID, 0, 20)
+        self.icon = lv.label(card)
+        self.icon.set_text(safe_text("📶", 48))
+        self.icon.set_style_text_font(get_font(48), 0)
+        self.icon.align(lv.ALIGN.TOP_MID, 0, 20)
 
         # Amount
         amt = lv.label(card)
@@ -865,62 +1941,74 @@ class PaymentScreen:
         amt.align(lv.ALIGN.TOP_MID, 0, 90)
 
         # Instructions
-        instruction = lv.label(card)
-        instruction.set_text("Tap, insert or swipe\nyour card")
-        instruction.set_style_text_align(lv.TEXT_ALIGN.CENTER, 0)
-        instruction.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
-        instruction.align(lv.ALIGN.CENTER, 0, 20)
+        self.instruction = lv.label(card)
+        self.instruction.set_text("Tap, insert or swipe\nyour card")
+        self.instruction.set_style_text_align(lv.TEXT_ALIGN.CENTER, 0)
+        self.instruction.set_style_text_color(Theme.hex(Theme.TEXT_SECONDARY), 0)
+        self.instruction.align(lv.ALIGN.CENTER, 0, 20)
 
         # Progress Bar
         self.bar = lv.bar(card)
         self.bar.set_size(lv.pct(80), 6)
         self.bar.align(lv.ALIGN.CENTER, 0, 60)
         self.bar.set_range(0, 100)
-        self.bar.set_value(0, lv.ANIM.OFF)
+        self.bar.set_value(100, lv.ANIM.OFF)
         self.bar.set_style_bg_color(Theme.hex(Theme.BG_SECONDARY), 0)
         self.bar.set_style_bg_opa(lv.OPA.COVER, 0)
-        
-        # Style the indicator (fill)
-        style_indic = lv.style_t()
-        style_indic.init()
-        style_indic.set_bg_opa(lv.OPA.COVER)
-        style_indic.set_bg_color(Theme.hex(Theme.ACCENT))
-        style_indic.set_bg_grad_color(Theme.hex(Theme.ACCENT_GREEN))
-        style_indic.set_bg_grad_dir(lv.GRAD_DIR.HOR)
-        self.bar.add_style(style_indic, lv.PART.INDICATOR)
-
-        # Animate the bar
-        anim = lv.anim_t()
-        anim.init()
-        anim.set_var(self.bar)
-        anim.set_values(0, 100)
-        anim.set_time(2000) # 2 seconds
-        anim.set_path_cb(lv.anim_t.path_linear)
-        anim.set_custom_exec_cb(lambda a, v: self.bar.set_value(v, lv.ANIM.OFF))
-        lv.anim_start(anim)
+        # Shared fill style - nothing allocated per payment
+        self.bar.add_style(Styles.bar_indicator, lv.PART.INDICATOR)
+
+        # Count down the time left to present a card
+        self._count_down(timeout_ms)
 
         # Cancel button
-        cancel_btn = lv.button(card)
-        cancel_btn.set_size(lv.pct(80), 44)
-        cancel_btn.align(lv.ALIGN.BOTTOM_MID, 0, -16)
-        cancel_btn.set_style_bg_color(Theme.hex(Theme.DANGER), 0)
-        cancel_btn.set_style_radius(10, 0)
-
-        cancel_label = lv.label(cancel_btn)
-        cancel_label.set_text("CANCEL")
-        cancel_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
-        cancel_label.center()
+        self.cancel_btn = lv.button(card)
+        self.cancel_btn.set_size(lv.pct(80), 44)
+        self.cancel_btn.align(lv.ALIGN.BOTTOM_MID, 0, -16)
+        self.cancel_btn.set_style_bg_color(Theme.hex(Theme.DANGER), 0)
+        self.cancel_btn.set_style_radius(10, 0)
 
-        cancel_btn.add_event_cb(self._on_cancel, lv.EVENT.CLICKED, None)
+        self.cancel_label = lv.label(self.cancel_btn)
+        self.cancel_label.set_text("CANCEL")
+        self.cancel_label.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
+        self.cancel_label.center()
+
+        self.cancel_btn.add_event_cb(self._on_cancel, lv.EVENT.CLICKED, None)
 
     def _on_cancel(self, event):
-        self.close()
         if self.on_cancel:
             self.on_cancel()
 
     def close(self):
         self.overlay.delete()
 
+    def _count_down(self, timeout_ms):
+        """Refill the bar and empty it over `timeout_ms` (stays full for 0)"""
+        self.bar.set_style_anim_duration(0, 0)
+        self.bar.set_value(100, lv.ANIM.OFF)
+        if timeout_ms:
+            self.bar.set_style_anim_duration(timeout_ms, 0)
+            self.bar.set_value(0, lv.ANIM.ON)
+
+    def show_authorizing(self, timeout_ms=0):
+        self.icon.set_text(safe_text("⏳", 48))
+        self.instruction.set_text("Authorizing...")
+        self._count_down(timeout_ms)
+
+    def show_cancelling(self):
+        self.instruction.set_text("Cancelling...")
+        self.cancel_btn.add_state(lv.STATE.DISABLED)
+
+    def show_failed(self, text):
+        """Declined or timed out - the button now just closes the overlay"""
+        self.icon.set_text(safe_text("✕", 48))
+        self.instruction.set_text(text)
+        self.instruction.set_style_text_color(Theme.hex(Theme.DANGER), 0)
+        self.bar.add_flag(lv.obj.FLAG.HIDDEN)
+        self.cancel_btn.remove_state(lv.STATE.DISABLED)
+        self.cancel_btn.set_style_bg_color(Theme.hex(Theme.BG_SECONDARY), 0)
+        self.cancel_label.set_text("CLOSE")
+
     def show_success(self):
         """Transform to success state"""
         self.overlay.set_style_bg_color(Theme.hex(Theme.ACCENT_GREEN), 0)
@@ -929,7 +2017,7 @@ class PaymentScreen:
 
         # Success icon
         icon = lv.label(self.overlay)
-        icon.set_text("✓")
+        icon.set_text(safe_text("✓", 48))
         icon.set_style_text_font(get_font(48), 0)
         icon.set_style_text_color(Theme.hex(Theme.TEXT_PRIMARY), 0)
         icon.align(lv.ALIGN.CENTER, 0, -40)
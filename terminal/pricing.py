@@ -0,0 +1,495 @@
+"""
+Windcave Terminal POS - Pricing Rules
+Discounts, happy hours, bundle deals and per-category tax rates from the
+`pricing` object of the sync payload:
+
+    {"tax": {"default": 0.15, "categories": {"cat-3": 0.0}},
+     "rules": [
+       {"id": "hh", "name": "Happy Hour", "type": "percent", "value": 20,
+        "categories": ["cat-3"], "days": [0, 1, 2, 3, 4],
+        "from": "15:00", "to": "17:00"},
+       {"id": "cake", "type": "amount", "value": 1.00, "products": ["p13"]},
+       {"id": "combo", "name": "Coffee & Cake", "type": "bundle", "price": 12.00,
+        "items": [{"categories": ["cat-1"]}, {"categories": ["cat-4"], "qty": 1}]}]}
+
+"percent" and "amount" rules take a share or a fixed amount off every
+unit of their products (listed, or in listed categories; all products if
+neither is given) - the best one applies, they don't stack. A "bundle"
+sells one unit set of its items for `price`, valued at what their cart
+lines charge (modifiers stay charged on top). `days` (0 = Monday) and
+`from`/`to` limit any rule to a weekly time window.
+
+Rules are compiled once per sync (PricingRules, part of the catalog
+snapshot) into tables keyed by product id: its tax rate, the unit
+discounts that can apply to it, and the group of bundles it takes part
+in - bundles sharing products form one group, as they compete for the
+same units. The week is cut into segments at every window edge and the
+best unit discount of each product is tabulated per segment, the first
+time that segment is current.
+
+CartTotals keeps a cart's subtotal, discount and tax as running integer
+cents. A line change costs a table lookup for the line, plus refilling
+the bundles of the changed product's group; other lines and rules are
+not looked at. Only a new catalog or a window opening or closing
+reprices the whole cart.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+import time
+
+from records import cents
+
+PERCENT = "percent"
+AMOUNT = "amount"
+BUNDLE = "bundle"
+
+_DAY = 1440                 # minutes
+_WEEK = 7 * _DAY
+_NO_DISCOUNT = (0, 0)
+
+
+def _minute(text):
+    hours, minutes = text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _windows(rule):
+    """Minute-of-week [start, end) ranges a rule is active in, None for always"""
+    days = rule.get("days")
+    start = rule.get("from")
+    end = rule.get("to")
+    if days is None and start is None and end is None:
+        return None
+    start = _minute(start) if start else 0
+    end = _minute(end) if end else _DAY
+    if end <= start:
+        end += _DAY          # past midnight
+    windows = []
+    for day in (range(7) if days is None else days):
+        a = int(day) % 7 * _DAY + start
+        b = a + end - start
+        if b > _WEEK:
+            windows.append((a, _WEEK))
+            windows.append((0, b - _WEEK))
+        else:
+            windows.append((a, b))
+    return windows
+
+
+def _active(windows, minute):
+    if windows is None:
+        return True
+    for start, end in windows:
+        if start <= minute < end:
+            return True
+    return False
+
+
+def _off(unit, percent, amount):
+    """Cents off one unit costing `unit` cents - never more than the unit"""
+    off = int(round(unit * percent / 100)) if percent else amount
+    return off if off < unit else unit
+
+
+def minute_of_week(now):
+    """(minute of the week, seconds into it) at time `now`"""
+    t = time.localtime(now)
+    return t[6] * _DAY + t[3] * 60 + t[4], t[5]
+
+
+class PricingRules:
+    """Rules from one sync compiled into per-product tables"""
+
+    def __init__(self, payload=None, catalog=None, tax_rate=0.0):
+        payload = payload or {}
+        products = catalog.products if catalog else []
+        self.by_category = catalog.by_category if catalog else {}
+        self.by_id = catalog.by_id if catalog else {}
+        self.modifiers = catalog.modifiers if catalog else {}
+
+        tax = payload.get("tax") or {}
+        self.default_rate = tax.get("default", tax_rate)
+        self.tax_of = {}      # product id -> tax rate, where not the default
+        rates = tax.get("categories") or {}
+        if rates:
+            for product in products:
+                rate = rates.get(product.category_id)
+                if rate is not None and rate != self.default_rate:
+                    self.tax_of[product.id] = rate
+
+        self.units = {}       # product id -> [(windows, percent, amount cents)]
+        self.bundles = []     # (name, price cents, windows, slots)
+        self.group_of = {}    # product id -> index of its bundle group
+        self.groups = []      # bundle indexes per group, in rule order
+        self.edges = []       # sorted minutes of the week where a window opens or closes
+        self.skipped = 0
+        self._prices = {}     # product id -> catalog price in cents (rule choice, slot order)
+        self._tables = {}     # segment -> table(), built when first current
+
+        edges = set()
+        for rule in payload.get("rules") or ():
+            try:
+                windows = _windows(rule)
+                kind = rule.get("type")
+                if kind == BUNDLE:
+                    self._compile_bundle(rule, windows)
+                elif kind in (PERCENT, AMOUNT):
+                    self._compile_unit(rule, kind, windows)
+                else:
+                    raise ValueError(f"unknown type {kind}")
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                print(f"[POS] Skipping pricing rule {rule.get('id') if isinstance(rule, dict) else rule}: {e}")
+                self.skipped += 1
+                continue
+            for start, end in windows or ():
+                edges.add(start)
+                edges.add(end % _WEEK)
+        self.edges = sorted(edges)
+        self._group_bundles()
+
+    def _targets(self, spec):
+        """Product ids a rule or bundle item names, each once"""
+        ids = []
+        seen = set()
+        for cat_id in spec.get("categories") or ():
+            for product in self.by_category.get(cat_id, ()):
+                if product.id not in seen:
+                    seen.add(product.id)
+                    ids.append(product.id)
+        for pid in spec.get("products") or ():
+            if pid in self.by_id and pid not in seen:
+                seen.add(pid)
+                ids.append(pid)
+        for pid in ids:
+            if pid not in self._prices:
+                self._prices[pid] = cents(self.by_id[pid].price)
+        return ids
+
+    def _compile_unit(self, rule, kind, windows):
+        value = float(rule["value"])
+        entry = (windows, value, 0) if kind == PERCENT else (windows, 0, cents(value))
+        if rule.get("products") or rule.get("categories"):
+            ids = self._targets(rule)
+        else:
+            ids = list(self.by_id)
+            for pid in ids:
+                if pid not in self._prices:
+                    self._prices[pid] = cents(self.by_id[pid].price)
+        units = self.units
+        for pid in ids:
+            if pid in units:
+                units[pid].append(entry)
+            else:
+                units[pid] = [entry]
+
+    def _compile_bundle(self, rule, windows):
+        slots = []
+        for item in rule["items"]:
+            ids = self._targets(item)
+            if not ids:
+                raise ValueError("item matches no products")
+            # Dearest first, so a bundle saves as much as it can
+            prices = self._prices
+            ids.sort(key=lambda pid: -prices[pid])
+            slots.append((int(item.get("qty", 1)), ids, {pid: i for i, pid in enumerate(ids)}))
+        self.bundles.append((rule.get("name") or rule.get("id", ""), cents(rule["price"]),
+                             windows, slots))
+
+    def _group_bundles(self):
+        """Group bundles that share products"""
+        members = []          # product ids per group; None once merged away
+        groups = []
+        group_of = {}
+        for b, (_, _, _, slots) in enumerate(self.bundles):
+            ids = set()
+            for _, slot_ids, _ in slots:
+                ids.update(slot_ids)
+            found = sorted(set(group_of[pid] for pid in ids if pid in group_of))
+            if found:
+                g = found[0]
+                for other in found[1:]:
+                    groups[g].extend(groups[other])
+                    ids.update(members[other])
+                    groups[other] = members[other] = None
+                groups[g].append(b)
+                groups[g].sort()
+                members[g].update(ids)
+            else:
+                g = len(groups)
+                groups.append([b])
+                members.append(ids)
+            for pid in members[g]:
+                group_of[pid] = g
+
+        # Renumber without the merged-away groups
+        self.groups = []
+        for g, bundles in enumerate(groups):
+            if bundles is not None:
+                for pid in members[g]:
+                    self.group_of[pid] = len(self.groups)
+                self.groups.append(bundles)
+
+    def segment(self, minute):
+        """Index of the part of the week between two window edges `minute` falls in"""
+        seg = 0
+        for edge in self.edges:
+            if minute < edge:
+                break
+            seg += 1
+        # After the last edge is the same segment as before the first
+        return 0 if seg == len(self.edges) else seg
+
+    def next_edge(self, minute):
+        """Minutes from `minute` to the next window edge (None without windows)"""
+        if not self.edges:
+            return None
+        for edge in self.edges:
+            if edge > minute:
+                return edge - minute
+        return self.edges[0] + _WEEK - minute
+
+    def surcharge(self, pid, mask):
+        """Cents of a cart line's unit price that its modifiers add"""
+        table = self.modifiers.get(pid)
+        return cents(table.price(mask)) if table and mask else 0
+
+    def table(self, minute):
+        """Lookup tables for the segment `minute` is in: product id ->
+        (percent, amount) of its best unit discount, and whether each
+        bundle is on"""
+        seg = self.segment(minute)
+        table = self._tables.get(seg)
+        if table is not None:
+            return table
+
+        discounts = {}
+        prices = self._prices
+        for pid, entries in self.units.items():
+            price = prices[pid]
+            best = None
+            best_off = 0
+            for windows, percent, amount in entries:
+                if _active(windows, minute):
+                    off = _off(price, percent, amount)
+                    if off > best_off:
+                        best = (percent, amount)
+                        best_off = off
+            if best:
+                discounts[pid] = best
+
+        active = [_active(bundle[2], minute) for bundle in self.bundles]
+        table = self._tables[seg] = (discounts, active)
+        return table
+
+
+_NO_RULES = PricingRules()
+
+
+class CartTotals:
+    """Running totals of one cart, in cents, under a PricingRules"""
+
+    def __init__(self, rules=None):
+        self.rules = rules or _NO_RULES
+        self._until = None
+        self._table(time.time())
+        self.reset()
+
+    def reset(self):
+        self.subtotal = 0     # before discounts and tax
+        self.discount = 0     # unit discounts and bundle savings
+        self.tax = 0
+        self.qty = {}         # product id -> units in the cart
+        self._net = {}        # tax rate -> cents after unit discounts
+        self._saved = {}      # tax rate -> bundle savings
+        self._groups = {}     # bundle group -> (saving, savings by tax rate, applied)
+        self._values = {}     # bundle product id -> {unit value in a bundle: units}
+
+    @property
+    def total(self):
+        return self.subtotal - self.discount + self.tax
+
+    def _table(self, now):
+        minute, second = minute_of_week(now)
+        self._discounts, self._bundles_on = self.rules.table(minute)
+        ahead = self.rules.next_edge(minute)
+        self._until = None if ahead is None else now - second + ahead * 60
+
+    def changed(self, line, dqty):
+        """`dqty` units were added to `line` (taken off if negative)"""
+        pid = line.id
+        rules = self.rules
+        unit = cents(line.price)
+        percent, amount = self._discounts.get(pid, _NO_DISCOUNT)
+        net = unit - _off(unit, percent, amount) if percent or amount else unit
+        rate = rules.tax_of.get(pid, rules.default_rate)
+        self.subtotal += unit * dqty
+        self.discount += (unit - net) * dqty
+        self._net[rate] = self._net.get(rate, 0) + net * dqty
+
+        qty = self.qty.get(pid, 0) + dqty
+        if qty > 0:
+            self.qty[pid] = qty
+        else:
+            self.qty.pop(pid, None)
+        group = rules.group_of.get(pid)
+        if group is not None:
+            # A bundle covers the item at what this line charges for it
+            # after unit discounts; modifiers stay charged on top
+            base = unit - rules.surcharge(pid, line.key[1])
+            if base < 0:
+                base = 0
+            value = base - _off(base, percent, amount) if percent or amount else base
+            values = self._values.get(pid)
+            if values is None:
+                values = self._values[pid] = {}
+            count = values.get(value, 0) + dqty
+            if count > 0:
+                values[value] = count
+            else:
+                values.pop(value, None)
+            self._fill(group)
+        self._update_tax()
+
+    def reprice(self, lines, rules=None, now=None):
+        """Price every line again (new rules, or a time window changed)"""
+        if rules is not None:
+            self.rules = rules
+        self._table(time.time() if now is None else now)
+        self.reset()
+        for line in lines:
+            self.changed(line, line.qty)
+
+    def tick(self, lines, now=None):
+        """Reprice `lines` if a time window opened or closed; True if it did"""
+        if self._until is None:
+            return False
+        if now is None:
+            now = time.time()
+        if now < self._until:
+            return False
+        old = self._discounts, self._bundles_on
+        self._table(now)
+        if (self._discounts, self._bundles_on) == old:
+            return False
+        self.reprice(lines, now=now)
+        return True
+
+    def applied(self):
+        """(bundle name, times) for the bundles in the cart"""
+        out = []
+        for _, _, applied in self._groups.values():
+            out.extend(applied)
+        return out
+
+    def _fill(self, g):
+        """Fit the group's bundles to the cart again, in rule order"""
+        old = self._groups.pop(g, None)
+        if old:
+            self.discount -= old[0]
+            for rate, saved in old[1].items():
+                self._saved[rate] -= saved
+
+        rules = self.rules
+        qty = self.qty
+        taken = {}            # product id -> units already in a bundle
+        saving = 0
+        value_by_rate = {}
+        applied = []
+        for b in rules.groups[g]:
+            if not self._bundles_on[b]:
+                continue
+            name, price, _, slots = rules.bundles[b]
+            # Only products in the cart can fill a slot
+            present = []
+            for n, ids, rank in slots:
+                if len(ids) <= len(qty):
+                    ids = [pid for pid in ids if pid in qty]
+                else:
+                    ids = sorted((pid for pid in qty if pid in rank), key=rank.get)
+                if not ids:
+                    break
+                present.append((n, ids))
+            else:
+                times = 0
+                while True:
+                    used = self._take(present, taken)
+                    if used is None:
+                        break
+                    value = 0
+                    parts = []
+                    for pid, n in used.items():
+                        part = self._value(pid, taken.get(pid, 0), n)
+                        parts.append((pid, n, part))
+                        value += part
+                    # Units are taken dearest first: later sets save less
+                    if value <= price:
+                        break
+                    for pid, n, part in parts:
+                        taken[pid] = taken.get(pid, 0) + n
+                        rate = rules.tax_of.get(pid, rules.default_rate)
+                        value_by_rate[rate] = value_by_rate.get(rate, 0) + part
+                    saving += value - price
+                    times += 1
+                if times:
+                    applied.append((name, times))
+
+        if not saving:
+            return
+        # Bundle savings lower the taxable amount in proportion to the
+        # value each tax rate contributed
+        by_rate = {}
+        value = sum(value_by_rate.values())
+        rest = saving
+        for rate, part in value_by_rate.items():
+            share = saving * part // value
+            by_rate[rate] = share
+            rest -= share
+        by_rate[rate] += rest
+        for rate, saved in by_rate.items():
+            self._saved[rate] = self._saved.get(rate, 0) + saved
+        self.discount += saving
+        self._groups[g] = (saving, by_rate, applied)
+
+    def _value(self, pid, start, n):
+        """Cents `n` units of `pid` are worth in a bundle, skipping the
+        `start` dearest (already in one)"""
+        values = self._values[pid]
+        total = 0
+        for value in sorted(values, reverse=True):
+            count = values[value]
+            if start >= count:
+                start -= count
+                continue
+            k = count - start if count - start < n else n
+            total += value * k
+            n -= k
+            start = 0
+            if not n:
+                break
+        return total
+
+    def _take(self, slots, taken):
+        """Units ({product id: n}) for one more set of a bundle, or None"""
+        qty = self.qty
+        used = {}
+        for n, ids in slots:
+            for pid in ids:
+                have = qty[pid] - taken.get(pid, 0) - used.get(pid, 0)
+                if have > 0:
+                    k = have if have < n else n
+                    used[pid] = used.get(pid, 0) + k
+                    n -= k
+                    if not n:
+                        break
+            if n:
+                return None
+        return used
+
+    def _update_tax(self):
+        saved = self._saved
+        tax = 0
+        for rate, net in self._net.items():
+            if rate:
+                tax += int(round((net - saved.get(rate, 0)) * rate))
+        self.tax = tax
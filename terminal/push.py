@@ -0,0 +1,296 @@
+"""
+Windcave Terminal POS - Push Updates
+Catalog change notifications from the backend over one persistent
+connection, polled non-blocking from the main loop like the scanner.
+
+Channels:
+- sse:      GET /api/events, a text/event-stream with one `data:` line
+            per catalog version
+- longpoll: GET /api/updates?since=V, answered as soon as the version
+            moves past V (or after the server's wait times out)
+- ws:       WebSocket /api/ws, one text frame per catalog version
+
+Every channel announces the current version right after connecting,
+so updates missed while disconnected are caught on reconnect. The
+channel only says *that* the catalog changed; the app fetches
+/api/sync itself. While the channel is down the app falls back to
+interval polling and the channel reconnects with backoff.
+
+Responses are read raw, so the backend must not use chunked encoding
+on these endpoints (answer as HTTP/1.0 or with Connection: close).
+"""
+
+import json
+import time
+
+try:
+    import socket
+    import select
+except ImportError:
+    socket = None
+
+try:
+    import ubinascii as binascii
+except ImportError:
+    import binascii
+
+try:
+    import os
+    _urandom = os.urandom
+except (ImportError, AttributeError):
+    _urandom = None
+
+_IN_PROGRESS = (115, 119)   # EINPROGRESS on unix / lwIP
+_AGAIN = 11                 # EAGAIN: nothing to read yet
+
+# Connection states
+CLOSED = 0
+CONNECTING = 1
+HEADERS = 2
+OPEN = 3
+
+
+class PushChannel:
+    """Non-blocking client for one push channel kind ("sse", "longpoll", "ws")
+
+    poll() never blocks; it returns the newest announced catalog version
+    (once per announcement) or None.
+    """
+
+    BACKOFF_MIN_MS = 1000
+    BACKOFF_MAX_MS = 30000
+
+    def __init__(self, base_url, kind="sse", terminal_id="", idle_timeout_ms=45000):
+        self.kind = kind
+        self.terminal_id = terminal_id
+        self.idle_timeout_ms = idle_timeout_ms
+        self.host, self.port = self._parse(base_url)
+        self._addr = None
+        self.sock = None
+        self.state = CLOSED
+        self.version = None       # last version announced
+        self.connects = 0
+        self.drops = 0
+        self._buf = b""
+        self._backoff = 0
+        self._retry_at = time.ticks_ms()
+        self._last_rx = 0
+        self._up = False          # reached the server and not dropped since
+
+    @staticmethod
+    def _parse(url):
+        rest = url.split("://", 1)[-1].split("/", 1)[0]
+        if ":" in rest:
+            host, port = rest.rsplit(":", 1)
+            return host, int(port)
+        return rest, 80
+
+    @property
+    def connected(self):
+        """True while updates can arrive (including between long-polls)"""
+        return self._up
+
+    def poll(self):
+        now = time.ticks_ms()
+        if self.state == CLOSED:
+            if time.ticks_diff(now, self._retry_at) >= 0:
+                self._connect()
+            return None
+
+        if self.state == CONNECTING:
+            if self._writable():
+                self._send_request()
+            elif time.ticks_diff(now, self._last_rx) > 5000:
+                self._drop()
+            return None
+
+        try:
+            data = self.sock.recv(1024)
+        except OSError as e:
+            # Nothing to read yet - or a dead link nobody told us about
+            if e.args[0] != _AGAIN or \
+                    time.ticks_diff(now, self._last_rx) > self.idle_timeout_ms:
+                self._drop()
+            return None
+
+        if not data:
+            # Server closed: the normal end of a long-poll reply
+            return self._finish()
+        self._last_rx = now
+        self._buf += data
+
+        if self.state == HEADERS:
+            end = self._buf.find(b"\r\n\r\n")
+            if end < 0:
+                return None
+            status = self._buf[:self._buf.find(b"\r\n")].split(b" ")
+            if len(status) < 2 or status[1] not in (b"200", b"101"):
+                self._drop()
+                return None
+            self._buf = self._buf[end + 4:]
+            self.state = OPEN
+            self._up = True
+            self._backoff = 0
+
+        if self.kind == "sse":
+            return self._read_sse()
+        if self.kind == "ws":
+            return self._read_ws()
+        return None   # long-poll body is read when the server closes
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.state = CLOSED
+        self._buf = b""
+
+    # Connection handling
+
+    def _connect(self):
+        if socket is None:
+            return
+        try:
+            if self._addr is None:
+                # DNS is blocking - resolved once and cached
+                self._addr = socket.getaddrinfo(self.host, self.port)[0][-1]
+            self.sock = socket.socket()
+            self.sock.setblocking(False)
+            try:
+                self.sock.connect(self._addr)
+            except OSError as e:
+                if e.args[0] not in _IN_PROGRESS:
+                    raise
+        except OSError as e:
+            print(f"[POS] Push connect failed: {e}")
+            self._drop()
+            return
+        self.state = CONNECTING
+        self._last_rx = time.ticks_ms()
+
+    def _writable(self):
+        p = select.poll()
+        p.register(self.sock, select.POLLOUT)
+        for _, ev in p.poll(0):
+            if ev & (select.POLLERR | select.POLLHUP):
+                self._drop()
+                return False
+            return True
+        return False
+
+    def _send_request(self):
+        query = f"terminal={self.terminal_id}"
+        headers = ""
+        if self.kind == "sse":
+            path = "/api/events"
+            headers = "Accept: text/event-stream\r\n"
+        elif self.kind == "ws":
+            path = "/api/ws"
+            key = binascii.b2a_base64(self._random(16)).strip().decode()
+            headers = ("Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                       f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n")
+        else:
+            path = "/api/updates"
+            if self.version is not None:
+                query += f"&since={self.version}"
+        request = (f"GET {path}?{query} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                   f"{headers}\r\n")
+        try:
+            self.sock.send(request.encode())
+        except OSError:
+            self._drop()
+            return
+        self.state = HEADERS
+        self.connects += 1
+        self._last_rx = time.ticks_ms()
+
+    def _drop(self):
+        """Connection lost or refused: reconnect after an increasing delay"""
+        if self._up:
+            self.drops += 1
+        self._up = False
+        self.close()
+        self._backoff = min(self.BACKOFF_MAX_MS, max(self.BACKOFF_MIN_MS, self._backoff * 2))
+        self._retry_at = time.ticks_add(time.ticks_ms(), self._backoff)
+
+    def _finish(self):
+        """Server closed the connection"""
+        if self.kind == "longpoll" and self.state == OPEN:
+            version = self._announce(self._buf)
+            # Answered: ask again straight away
+            self.close()
+            return version
+        self._drop()
+        return None
+
+    def _announce(self, payload):
+        try:
+            version = json.loads(payload).get("version")
+        except (ValueError, AttributeError):
+            return None
+        if version is None or version == self.version:
+            return None
+        self.version = version
+        return version
+
+    # Framing
+
+    def _read_sse(self):
+        version = None
+        while True:
+            end = self._buf.find(b"\n")
+            if end < 0:
+                return version
+            line = self._buf[:end].strip()
+            self._buf = self._buf[end + 1:]
+            # Comment lines (":") are keepalives
+            if line.startswith(b"data:"):
+                version = self._announce(line[5:]) or version
+
+    def _read_ws(self):
+        version = None
+        while len(self._buf) >= 2:
+            opcode = self._buf[0] & 0x0F
+            length = self._buf[1] & 0x7F
+            start = 2
+            if length == 126:
+                if len(self._buf) < 4:
+                    break
+                length = (self._buf[2] << 8) | self._buf[3]
+                start = 4
+            elif length == 127:
+                # Never sent for a version number
+                self._drop()
+                return None
+            if len(self._buf) < start + length:
+                break
+            payload = self._buf[start:start + length]
+            self._buf = self._buf[start + length:]
+
+            if opcode == 1:
+                version = self._announce(payload) or version
+            elif opcode == 9:
+                self._send_frame(0xA, payload)    # pong
+            elif opcode == 8:
+                self._drop()
+                return version
+        return version
+
+    def _send_frame(self, opcode, payload):
+        # Client frames must be masked
+        mask = self._random(4)
+        masked = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+        try:
+            self.sock.send(bytes((0x80 | opcode, 0x80 | len(payload))) + mask + masked)
+        except OSError:
+            self._drop()
+
+    @staticmethod
+    def _random(n):
+        if _urandom:
+            return _urandom(n)
+        t = time.ticks_us()
+        return bytes((t >> (i * 3)) & 0xFF for i in range(n))
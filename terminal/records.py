@@ -0,0 +1,95 @@
+"""
+Windcave Terminal POS - Records
+Compact record types for products, categories and cart lines.
+
+Sync payloads are converted once, when a catalog snapshot is built;
+everything after that uses attribute access instead of string-keyed
+dict lookups. Products and categories are namedtuples - tuple-backed
+and immutable like the snapshot they belong to, on CPython and
+MicroPython alike. Cart lines change (qty) so they are a small class
+with __slots__ (honoured by CPython; MicroPython accepts and ignores it).
+
+For the fast render profile tile colors are pre-blended here too: the
+20% tint and 30% border LVGL would otherwise alpha-blend on every
+redraw become opaque colors computed once per sync.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+try:
+    from collections import namedtuple
+except ImportError:
+    from ucollections import namedtuple
+
+Product = namedtuple("Product", (
+    "id", "name", "price", "category_id",
+    "color",      # 0xRRGGBB int or None (parsed from "#RRGGBB" once)
+    "sku", "barcode", "modifiers", "thumb",
+    "tile", "tile_border"))   # opaque pre-blended tile colors or None
+
+Category = namedtuple("Category", ("id", "name", "icon", "color"))
+
+
+def _color(value):
+    if not value:
+        return None
+    return int(value.replace('#', ''), 16)
+
+
+def blend(color, bg, opa):
+    """0xRRGGBB of `color` drawn at opacity opa (0-255) over `bg`"""
+    out = 0
+    for shift in (16, 8, 0):
+        fg_c = (color >> shift) & 0xFF
+        bg_c = (bg >> shift) & 0xFF
+        out |= ((fg_c * opa + bg_c * (255 - opa)) // 255) << shift
+    return out
+
+
+def cents(amount):
+    """Integer cents of a price in dollars (totals are kept in cents)"""
+    return int(round(amount * 100))
+
+
+def product_from_json(d, tint_over=None):
+    """Product record; with tint_over (a background color) the tile colors
+    are pre-blended over it"""
+    color = _color(d.get('color'))
+    tile = tile_border = None
+    if color is not None and tint_over is not None:
+        # Same result as bg_opa 20% / border_opa 30% (see ProductGrid._bind)
+        tile = blend(color, tint_over, 51)
+        tile_border = blend(color, tile, 76)
+    return Product(
+        d['id'], d.get('name', ''), d.get('price', 0) or 0, d.get('category_id'),
+        color, d.get('sku'), d.get('barcode'),
+        d.get('modifiers'), d.get('thumb'), tile, tile_border)
+
+
+def category_from_json(d):
+    return Category(d['id'], d.get('name', ''), d.get('icon', '📦'), _color(d.get('color')))
+
+
+class CartLine:
+    """One cart line: a product + modifier selection at a snapshot's price"""
+
+    __slots__ = ("id", "key", "name", "price", "mods", "qty", "version")
+
+    def __init__(self, id, key, name, price, mods="", qty=1, version=0):
+        self.id = id
+        self.key = key
+        self.name = name
+        self.price = price
+        self.mods = mods
+        self.qty = qty
+        self.version = version
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "price": self.price,
+            "mods": self.mods,
+            "qty": self.qty,
+            "catalog_version": self.version,
+        }
@@ -0,0 +1,50 @@
+"""
+Windcave Terminal POS - Render Batching
+State changes mark parts of the UI dirty; the main loop applies all of
+them in one flush per task_handler cycle, so five taps between two
+frames cost one cart re-render instead of five.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+# Dirty flags
+DIRTY_CART = 1          # cart panel lines + totals
+DIRTY_BADGES = 2        # badges for the product ids marked
+DIRTY_BADGES_ALL = 4    # every badge on the grid
+DIRTY_TOAST = 8         # pending notification
+
+
+class RenderQueue:
+    """Accumulates dirty flags and ids until the next flush.
+
+    `apply(dirty, ids)` does the actual widget updates. With
+    immediate=True every mark flushes straight away (the old
+    one-update-per-mutation behaviour, kept for benchmarking).
+    """
+
+    def __init__(self, apply, immediate=False):
+        self.apply = apply
+        self.immediate = immediate
+        self.dirty = 0
+        self.ids = set()
+        self.flushes = 0
+        self.marks = 0
+
+    def mark(self, flags, item=None):
+        self.dirty |= flags
+        self.marks += 1
+        if item is not None:
+            self.ids.add(item)
+        if self.immediate:
+            self.flush()
+
+    def flush(self):
+        """Apply pending changes; returns True if anything was dirty"""
+        if not self.dirty:
+            return False
+        dirty, ids = self.dirty, self.ids
+        self.dirty = 0
+        self.ids = set()
+        self.flushes += 1
+        self.apply(dirty, ids)
+        return True
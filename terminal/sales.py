@@ -0,0 +1,254 @@
+"""
+Windcave Terminal POS - Sales Totals
+Running shift totals for X/Z reports, updated once per completed sale.
+
+Every amount is an integer number of cents, and each counter is a
+[count, cents] pair per product, category, hour of day or payment
+method, so memory is bounded by the catalog, not by how many sales were
+made. A report reads the counters directly - O(products) - instead of
+replaying transactions.
+
+Persisted like the cart journal: each sale appends one short record
+(its lines as product, category, qty, cents) to PATH.log, and once
+`compact_every` sales have been logged the totals are written to PATH
+as a snapshot during idle time and the log starts over. The snapshot is
+written to a temporary file and renamed, and both carry a generation
+number so a log left over from before a snapshot is ignored on load.
+A Z report whose snapshot can't be written goes into the log as a Z
+record instead, which resets the totals when the log is replayed.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+import json
+import os
+import time
+
+from records import cents
+
+
+def money(amount_cents, currency="$"):
+    sign = "-" if amount_cents < 0 else ""
+    amount_cents = abs(amount_cents)
+    return f"{sign}{currency}{amount_cents // 100}.{amount_cents % 100:02d}"
+
+
+def _bump(table, key, count, amount):
+    entry = table.get(key)
+    if entry is None:
+        table[key] = [count, amount]
+    else:
+        entry[0] += count
+        entry[1] += amount
+
+
+class SalesTotals:
+    """Counters for the current shift (since the last Z report)"""
+
+    def __init__(self, path=None, compact_every=50):
+        self.path = path
+        self.compact_every = compact_every
+        self.logged = 0           # sales in the log since the last snapshot
+        self._retry_at = 0        # `logged` at which a failed compaction is retried
+        self._gen = 0
+        self.reset()
+        self.z_number = 1         # number of the next Z report
+        if path:
+            self._load()
+
+    def reset(self):
+        self.opened = time.time()
+        self.sales = 0
+        self.units = 0
+        self.gross = 0            # cents, after discounts, tax included
+        self.tax = 0
+        self.discount = 0
+        self.products = {}        # product id -> [units, cents before discounts and tax]
+        self.categories = {}      # category id -> [units, cents before discounts and tax]
+        self.methods = {}         # payment method -> [sales, cents]
+        self.hours = [[0, 0] for _ in range(24)]   # [sales, cents] per hour
+
+    def record(self, lines, catalog, tax, method="card", hour=None, discount=0):
+        """Add one completed sale of cart `lines`, with `tax` and `discount` in cents"""
+        by_id = catalog.by_id
+        items = []
+        for line in lines:
+            amount = cents(line.price) * line.qty
+            product = by_id.get(line.id)
+            items.append([line.id, product.category_id if product else "", line.qty, amount])
+        sale = [time.localtime()[3] if hour is None else hour, method, tax, items]
+        if discount:
+            sale.append(discount)
+        self._apply(sale)
+        self._log(sale)
+
+    def _apply(self, sale):
+        hour, method, tax, items = sale[:4]
+        discount = sale[4] if len(sale) > 4 else 0
+        total = tax - discount
+        for pid, cat_id, qty, amount in items:
+            total += amount
+            self.units += qty
+            _bump(self.products, pid, qty, amount)
+            _bump(self.categories, cat_id, qty, amount)
+        self.sales += 1
+        self.gross += total
+        self.tax += tax
+        self.discount += discount
+        _bump(self.methods, method, 1, total)
+        hour_totals = self.hours[hour]
+        hour_totals[0] += 1
+        hour_totals[1] += total
+
+    def report(self, catalog, kind="X", currency="$", top=10):
+        """Report text for the shift so far"""
+        names = {c.id: c.name for c in catalog.categories}
+        opened = time.localtime(self.opened)
+        title = f"Z REPORT #{self.z_number}" if kind == "Z" else "X REPORT"
+        out = [
+            f"{title}  since {opened[3]:02d}:{opened[4]:02d}",
+            f"Sales {self.sales}   Items {self.units}",
+            f"Gross {money(self.gross, currency)}",
+            f"Tax {money(self.tax, currency)}   Net {money(self.gross - self.tax, currency)}",
+            f"Discounts {money(self.discount, currency)}",
+            "",
+            "PAYMENTS",
+        ]
+        for method, (count, amount) in self.methods.items():
+            out.append(f"  {method} x{count}  {money(amount, currency)}")
+
+        out.append("")
+        out.append("CATEGORIES")
+        for cat_id, (units, amount) in self.categories.items():
+            out.append(f"  {names.get(cat_id, cat_id or '-')} x{units}  {money(amount, currency)}")
+
+        out.append("")
+        out.append(f"TOP {top} PRODUCTS")
+        ranked = sorted(self.products.items(), key=lambda item: -item[1][1])
+        for pid, (units, amount) in ranked[:top]:
+            product = catalog.by_id.get(pid)
+            out.append(f"  {product.name if product else pid} x{units}  "
+                       f"{money(amount, currency)}")
+
+        out.append("")
+        out.append("HOURS")
+        for hour, (count, amount) in enumerate(self.hours):
+            if count:
+                out.append(f"  {hour:02d}:00 x{count}  {money(amount, currency)}")
+        return "\n".join(out)
+
+    def close_day(self, catalog, currency="$"):
+        """Z report: the final report text, then start a new shift"""
+        text = self.report(catalog, "Z", currency)
+        self.z_number += 1
+        self.reset()
+        # Written straight away - a Z must not be lost to a reboot. If the
+        # snapshot can't be written, a Z record in the log replays the
+        # reset on load instead
+        if self.path and not self.compact() and not self._log(["Z", self.z_number, self.opened]):
+            text += "\n\nZ NOT SAVED - totals may return after a restart"
+        return text
+
+    # Persistence
+
+    def to_json(self):
+        return {
+            "z": self.z_number, "opened": self.opened, "sales": self.sales,
+            "units": self.units, "gross": self.gross, "tax": self.tax,
+            "discount": self.discount, "products": self.products, "categories": self.categories,
+            "methods": self.methods, "hours": self.hours,
+        }
+
+    def wants_compact(self):
+        return self.path is not None and self.logged >= self.compact_every and \
+            self.logged >= self._retry_at
+
+    def _log(self, sale):
+        """Append a sale (or Z) record; True if it was written"""
+        if not self.path:
+            return False
+        try:
+            with open(self.path + ".log", "a") as f:
+                if f.tell() == 0:
+                    f.write(f"@{self._gen}\n")
+                f.write(json.dumps(sale) + "\n")
+        except OSError as e:
+            print(f"[POS] Logging sale failed: {e}")
+            return False
+        self.logged += 1
+        return True
+
+    def compact(self):
+        """Snapshot the totals and start a new log; returns True if it wrote"""
+        if not self.path:
+            return False
+        gen = self._gen + 1
+        data = self.to_json()
+        data["gen"] = gen
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.rename(tmp, self.path)
+            with open(self.path + ".log", "w") as f:
+                f.write(f"@{gen}\n")
+        except OSError as e:
+            print(f"[POS] Saving sales totals failed: {e}")
+            # Keep logging; the idle loop tries again after the next sale
+            # rather than every cycle
+            self._retry_at = self.logged + 1
+            return False
+        self._gen = gen
+        self.logged = 0
+        self._retry_at = 0
+        return True
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._gen = data["gen"]
+            self.z_number = data["z"]
+            self.opened = data["opened"]
+            self.sales = data["sales"]
+            self.units = data["units"]
+            self.gross = data["gross"]
+            self.tax = data["tax"]
+            self.discount = data.get("discount", 0)
+            self.products = data["products"]
+            self.categories = data["categories"]
+            self.methods = data["methods"]
+            self.hours = data["hours"]
+        except OSError:
+            pass
+        except (ValueError, KeyError) as e:
+            print(f"[POS] Sales totals unreadable, starting a new shift: {e}")
+            self.reset()
+            self._gen = 0
+
+        try:
+            with open(self.path + ".log") as f:
+                records = f.read().split("\n")
+        except OSError:
+            return
+        # Sales logged since the snapshot; a torn last record is dropped
+        records.pop()
+        if not records or records[0] != f"@{self._gen}":
+            return
+        damaged = False
+        for record in records[1:]:
+            try:
+                sale = json.loads(record)
+                if sale[0] == "Z":
+                    # Day closed but its snapshot was never written
+                    self.reset()
+                    self.z_number, self.opened = sale[1], sale[2]
+                else:
+                    self._apply(sale)
+            except (ValueError, KeyError, TypeError, IndexError):
+                damaged = True
+                continue
+            self.logged += 1
+        if damaged:
+            # Later appends would land after the bad record
+            self.compact()
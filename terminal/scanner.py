@@ -0,0 +1,128 @@
+"""
+Windcave Terminal POS - Barcode Scanner Input
+Line-oriented, non-blocking scan sources polled from the main loop.
+
+Sources:
+- uart:  serial/HID-bridge scanner on a machine.UART (production)
+- stdin: type or pipe barcodes into the simulator's terminal
+- udp:   send barcodes as datagrams, e.g. `echo 94000 | nc -u -w0 host 9100`
+"""
+
+import time
+from array import array
+
+
+class ScanStats:
+    """Scan-to-cart latency over a fixed window of recent scans"""
+
+    WINDOW = 128
+
+    def __init__(self):
+        self.count = 0
+        self.misses = 0
+        self.max_us = 0
+        self._samples = array('I', bytes(4 * self.WINDOW))
+
+    def record(self, us):
+        self._samples[self.count % self.WINDOW] = us
+        self.count += 1
+        if us > self.max_us:
+            self.max_us = us
+
+    def summary(self):
+        n = min(self.count, self.WINDOW)
+        if not n:
+            return {"count": 0, "misses": self.misses}
+        ordered = sorted(self._samples[:n])
+        return {
+            "count": self.count,
+            "misses": self.misses,
+            "mean_us": sum(ordered) // n,
+            "p50_us": ordered[n // 2],
+            "p95_us": ordered[min(n - 1, n * 95 // 100)],
+            "max_us": self.max_us
+        }
+
+
+class _LineReader:
+    """Splits a byte stream into scan codes"""
+
+    def __init__(self):
+        self._buf = b""
+
+    def _feed(self, data, handler):
+        if not data:
+            return
+        stamp = time.ticks_us()
+        self._buf += data
+        while True:
+            end = -1
+            for sep in (b"\n", b"\r"):
+                i = self._buf.find(sep)
+                if i >= 0 and (end < 0 or i < end):
+                    end = i
+            if end < 0:
+                break
+            code = self._buf[:end].strip()
+            self._buf = self._buf[end + 1:]
+            if code:
+                handler(code.decode(), stamp)
+
+
+class UartSource(_LineReader):
+    def __init__(self, uart_id, baudrate):
+        super().__init__()
+        from machine import UART
+        self.uart = UART(uart_id, baudrate)
+
+    def poll(self, handler):
+        if self.uart.any():
+            self._feed(self.uart.read(), handler)
+
+
+class StdinSource(_LineReader):
+    def __init__(self):
+        super().__init__()
+        import sys
+        import select
+        self.stream = sys.stdin.buffer if hasattr(sys.stdin, 'buffer') else sys.stdin
+        self.poller = select.poll()
+        self.poller.register(sys.stdin, select.POLLIN)
+
+    def poll(self, handler):
+        while self.poller.poll(0):
+            data = self.stream.read(1)
+            if not data:
+                break
+            self._feed(data if isinstance(data, bytes) else data.encode(), handler)
+
+
+class UdpSource(_LineReader):
+    def __init__(self, port):
+        super().__init__()
+        import socket
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(socket.getaddrinfo("0.0.0.0", port)[0][-1])
+        self.sock.setblocking(False)
+
+    def poll(self, handler):
+        while True:
+            try:
+                data = self.sock.recv(256)
+            except OSError:
+                return
+            self._feed(data + b"\n", handler)
+
+
+def open_scanner(kind, uart_id=1, baudrate=9600, port=9100):
+    """Create the configured scan source, or None if unavailable"""
+    try:
+        if kind == "uart":
+            return UartSource(uart_id, baudrate)
+        if kind == "stdin":
+            return StdinSource()
+        if kind == "udp":
+            return UdpSource(port)
+    except Exception as e:
+        print(f"[POS] Scanner ({kind}) unavailable: {e}")
+    return None
@@ -0,0 +1,111 @@
+"""
+Windcave Terminal POS - Product Search
+Prefix index over product names and SKUs, built once per sync.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+# Longest prefix stored in the index. Longer query words are answered
+# from the shortest-prefix candidate list and verified against tokens.
+MAX_PREFIX = 3
+
+
+def _tokens(product):
+    text = product.name.lower()
+    sku = product.sku
+    if sku:
+        text += " " + str(sku).lower()
+    return text.replace('-', ' ').split()
+
+
+class SearchIndex:
+    """Maps word prefixes to positions in the catalog's product list"""
+
+    def __init__(self, products):
+        self.products = products
+        self.tokens = []     # token list per product position
+        self.prefixes = {}   # prefix -> ascending list of product positions
+
+        for pos, product in enumerate(products):
+            tokens = _tokens(product)
+            self.tokens.append(tokens)
+            seen = set()
+            for tok in tokens:
+                for n in range(1, min(len(tok), MAX_PREFIX) + 1):
+                    prefix = tok[:n]
+                    if prefix not in seen:
+                        seen.add(prefix)
+                        bucket = self.prefixes.get(prefix)
+                        if bucket is None:
+                            self.prefixes[prefix] = [pos]
+                        else:
+                            bucket.append(pos)
+
+    def lookup(self, query):
+        """Positions of products where every query word prefixes a token"""
+        words = query.lower().replace('-', ' ').split()
+        if not words:
+            return []
+
+        # Start from the smallest bucket; positions stay in catalog order
+        best = None
+        for word in words:
+            bucket = self.prefixes.get(word[:MAX_PREFIX])
+            if bucket is None:
+                return []
+            if best is None or len(bucket) < len(best):
+                best = bucket
+
+        if len(words) == 1 and len(words[0]) <= MAX_PREFIX:
+            return best
+        return self.refine(best, words)
+
+    def refine(self, positions, words):
+        """Filter `positions` down to those matching all `words`"""
+        tokens = self.tokens
+        out = []
+        for pos in positions:
+            toks = tokens[pos]
+            for word in words:
+                for tok in toks:
+                    if tok.startswith(word):
+                        break
+                else:
+                    break
+            else:
+                out.append(pos)
+        return out
+
+
+class SearchSession:
+    """Incremental search as the user types.
+
+    Appending characters can only narrow the result set, so each
+    keystroke refines the previous results instead of re-querying.
+    """
+
+    def __init__(self, index, limit=None):
+        self.index = index
+        self.limit = limit
+        self.query = ""
+        self.positions = []
+
+    def update(self, query):
+        """Set the current query, returning the matching products"""
+        query = query.strip().lower()
+        prev = self.query
+        if not query:
+            self.positions = []
+        elif prev and query.startswith(prev) and ' ' not in query[len(prev) - 1:]:
+            # Same words, last one extended - refine previous results
+            self.positions = self.index.refine(self.positions, query.split())
+        else:
+            self.positions = self.index.lookup(query)
+        self.query = query
+
+        products = self.index.products
+        positions = self.positions if self.limit is None else self.positions[:self.limit]
+        return [products[pos] for pos in positions]
+
+    def count(self):
+        return len(self.positions)
@@ -0,0 +1,201 @@
+"""
+Windcave Terminal POS - Open Tabs
+Parked orders (restaurant tabs) kept packed, so dozens of them cost a
+few KB instead of a CartLine object graph each.
+
+A tab is one bytes object: per line a fixed 16-byte header (product id
+length, flags, qty, unit price in cents, modifier mask, catalog version)
+followed by the product id. Names and modifier text are not stored;
+they are looked up in the current catalog when the tab is opened again.
+Prices are stored, so units keep the price they were added at.
+
+With a directory, each parked tab is also written to flash as
+tab-<n>.bin and removed when it is opened, so open tabs survive a
+reboot. Only park and open write; nothing happens per tap. The cart
+journal records parking (and opening) around these writes, so a power
+cut between the two leaves the order in one place, not both.
+
+No LVGL imports - this module also runs under CPython for benchmarks.
+"""
+
+import os
+import struct
+
+from records import CartLine
+
+_LINE = "<BBHiII"
+_LINE_SIZE = struct.calcsize(_LINE)
+_REPRICED = 1    # line key carries its version (see Cart.add)
+
+
+def pack_lines(lines):
+    """Packed form of cart lines"""
+    parts = []
+    for line in lines:
+        pid = line.id.encode()
+        flags = _REPRICED if len(line.key) > 2 else 0
+        parts.append(struct.pack(_LINE, len(pid), flags, line.qty,
+                                 round(line.price * 100), line.key[1], line.version))
+        parts.append(pid)
+    return b"".join(parts)
+
+
+def unpack_lines(data, catalog=None):
+    """CartLines from pack_lines() output, named from `catalog`"""
+    by_id = catalog.by_id if catalog else {}
+    tables = catalog.modifiers if catalog else {}
+    lines = []
+    pos = 0
+    end = len(data)
+    while pos < end:
+        size, flags, qty, cents, mask, version = struct.unpack_from(_LINE, data, pos)
+        pos += _LINE_SIZE
+        pid = data[pos:pos + size].decode()
+        pos += size
+
+        product = by_id.get(pid)
+        table = tables.get(pid)
+        key = (pid, mask, version) if flags & _REPRICED else (pid, mask)
+        # A product removed from the catalog since keeps its id as name
+        lines.append(CartLine(pid, key, product.name if product else pid, cents / 100,
+                              table.text(mask) if table else "", qty, version))
+    return lines
+
+
+class Tab:
+    """One parked order"""
+
+    __slots__ = ("id", "name", "data", "count", "total")
+
+    def __init__(self, id, name, data, count, total):
+        self.id = id
+        self.name = name
+        self.data = data      # pack_lines() bytes
+        self.count = count    # units, for the tab list
+        self.total = total    # subtotal, for the tab list
+
+
+class TabStore:
+    """Open tabs, in the order they were parked"""
+
+    def __init__(self, directory=None, max_tabs=60):
+        self.directory = directory
+        self.max_tabs = max_tabs
+        self.tabs = []
+        self._next = 1
+
+        if directory:
+            try:
+                os.mkdir(directory)
+            except OSError:
+                pass
+            self._load()
+
+    def __len__(self):
+        return len(self.tabs)
+
+    def __iter__(self):
+        return iter(self.tabs)
+
+    def new_name(self):
+        return f"Tab {self._next}"
+
+    def next_id(self):
+        """Id the next parked tab gets"""
+        return self._next
+
+    def full(self):
+        return len(self.tabs) >= self.max_tabs
+
+    def has(self, tab_id):
+        for tab in self.tabs:
+            if tab.id == tab_id:
+                return True
+        return False
+
+    def park(self, cart, name=None):
+        """Store the lines of `cart` as a tab (the cart is left as is).
+
+        Returns the tab, or None when max_tabs are already open.
+        """
+        if self.full():
+            return None
+        tab = Tab(self._next, name or self.new_name(), pack_lines(cart.lines),
+                  cart.count(), cart.subtotal())
+        self._next += 1
+        self.tabs.append(tab)
+        self._write(tab)
+        return tab
+
+    def open(self, tab, cart, catalog=None, keep_file=False):
+        """Move `tab` into (empty) `cart`, removing it from the store.
+
+        keep_file leaves its flash copy for forget(), once the cart
+        journal holds the order.
+        """
+        for line in unpack_lines(tab.data, catalog):
+            cart.restore(line)
+        self.tabs.remove(tab)
+        if not keep_file:
+            self._remove(tab.id)
+
+    def forget(self, tab_id):
+        """Drop tab `tab_id` and its flash copy (its order is in the cart)"""
+        for tab in self.tabs:
+            if tab.id == tab_id:
+                self.tabs.remove(tab)
+                break
+        self._remove(tab_id)
+
+    def memory(self):
+        """Bytes of packed line data held for all tabs"""
+        return sum(len(tab.data) for tab in self.tabs)
+
+    # Flash copies
+
+    def _path(self, tab_id):
+        return f"{self.directory}/tab-{tab_id}.bin"
+
+    def _write(self, tab):
+        if not self.directory:
+            return
+        name = tab.name.encode()
+        try:
+            with open(self._path(tab.id), "wb") as f:
+                f.write(bytes((len(name),)) + name + tab.data)
+        except OSError as e:
+            print(f"[POS] Tab write failed: {e}")
+
+    def _remove(self, tab_id):
+        if not self.directory:
+            return
+        try:
+            os.remove(self._path(tab_id))
+        except OSError:
+            pass
+
+    def _load(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        found = []
+        for filename in names:
+            if not (filename.startswith("tab-") and filename.endswith(".bin")):
+                continue
+            try:
+                tab_id = int(filename[4:-4])
+                with open(f"{self.directory}/{filename}", "rb") as f:
+                    raw = f.read()
+                name = raw[1:1 + raw[0]].decode()
+                lines = unpack_lines(raw[1 + raw[0]:])
+            except Exception as e:
+                # Damaged copy: skip it rather than fail to boot
+                print(f"[POS] Tab {filename} unreadable: {e}")
+                continue
+            found.append(Tab(tab_id, name, raw[1 + raw[0]:], sum(l.qty for l in lines),
+                             sum(l.price * l.qty for l in lines)))
+        found.sort(key=lambda tab: tab.id)
+        self.tabs = found
+        if found:
+            self._next = found[-1].id + 1
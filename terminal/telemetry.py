@@ -0,0 +1,109 @@
+"""
+Windcave Terminal POS - Telemetry
+Fixed-size counters and log2 histograms aggregated in RAM and posted to
+the backend periodically, so field performance is visible fleet-wide.
+
+Memory is bounded by the number of metric names, not by how many
+samples are recorded. No LVGL imports - the mock backend uses the same
+Histogram to merge and summarize what terminals send.
+"""
+
+# Bucket i holds values in [2^(i-1), 2^i); bucket 0 holds < 1, so record
+# timings that are mostly under a millisecond in microseconds (*_us)
+BUCKETS = 24
+
+
+class Histogram:
+    """Log2-bucketed histogram: constant memory, ~2x resolution"""
+
+    def __init__(self, counts=None, n=0, total=0, peak=0):
+        self.counts = counts or [0] * BUCKETS
+        self.n = n
+        self.total = total
+        self.peak = peak
+
+    def add(self, value):
+        b = 0
+        v = int(value)
+        while v and b < BUCKETS - 1:
+            v >>= 1
+            b += 1
+        self.counts[b] += 1
+        self.n += 1
+        self.total += value
+        if value > self.peak:
+            self.peak = value
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.n += other.n
+        self.total += other.total
+        if other.peak > self.peak:
+            self.peak = other.peak
+
+    def percentile(self, pct):
+        """Estimate of the pct-th percentile, interpolated within its bucket"""
+        if not self.n:
+            return 0
+        rank = self.n * pct / 100
+        seen = 0
+        for b, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                low = (1 << (b - 1)) if b else 0
+                high = 1 << b
+                return min(low + (high - low) * (rank - seen) / c, self.peak)
+            seen += c
+        return self.peak
+
+    def mean(self):
+        return self.total / self.n if self.n else 0
+
+    def to_dict(self):
+        # Trailing empty buckets are dropped to keep the payload small
+        last = len(self.counts)
+        while last and not self.counts[last - 1]:
+            last -= 1
+        return {"n": self.n, "sum": self.total, "max": self.peak, "b": self.counts[:last]}
+
+    @classmethod
+    def from_dict(cls, d):
+        counts = list(d.get("b", []))[:BUCKETS]
+        counts += [0] * (BUCKETS - len(counts))
+        return cls(counts, d.get("n", 0), d.get("sum", 0), d.get("max", 0))
+
+
+class Telemetry:
+    """Named histograms, counters and low-water marks for one report period"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.low = {}
+
+    def record(self, name, value):
+        h = self.histograms.get(name)
+        if h is None:
+            h = self.histograms[name] = Histogram()
+        h.add(value)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def low_water(self, name, value):
+        current = self.low.get(name)
+        if current is None or value < current:
+            self.low[name] = value
+
+    def snapshot(self):
+        """Payload for the backend"""
+        return {
+            "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            "counters": dict(self.counters),
+            "low": dict(self.low),
+        }
+
+    def reset(self):
+        self.histograms = {}
+        self.counters = {}
+        self.low = {}
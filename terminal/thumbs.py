@@ -0,0 +1,203 @@
+"""
+Windcave Terminal POS - Product Thumbnails
+Content-addressed flash cache of pre-scaled LVGL binary images (see
+build_thumbnails.py) plus a bounded in-RAM LRU of decoded images.
+
+Nothing here blocks the grid: get() only looks in RAM. Flash reads and
+downloads happen one at a time from idle_step(), which the main loop
+calls when the screen hasn't been touched for a while.
+
+Only the pinned images (those in view) are safe from eviction; on_evict
+lets the grid take any other image off its tiles before it is dropped,
+so max_items really bounds the decoded pixel data held.
+"""
+
+import os
+import struct
+
+try:
+    import hashlib
+    import binascii
+except ImportError:
+    hashlib = None
+
+HEADER_SIZE = 12
+
+
+class ThumbCache:
+    """Thumbnails for one tile size"""
+
+    def __init__(self, flash_dir, size, base_url=None, max_items=16, http=None):
+        self.flash_dir = flash_dir
+        self.size = str(size)
+        self.base_url = base_url
+        self.max_items = max_items
+        self.http = http
+        self.on_ready = None     # fn(digest, image dsc) when a decode finishes
+        self.on_evict = None     # fn(digest) before a decoded image is dropped
+        self.pinned = set()      # digests in view - never evicted
+
+        self._ram = {}           # digest -> [dsc, pixel data, last use]
+        self._clock = 0
+        self._decode = []        # digests wanted on screen, in request order
+        self._download = []      # digests to fetch to flash ahead of time
+        self.stats = {"hits": 0, "misses": 0, "loads": 0,
+                      "downloads": 0, "evictions": 0, "errors": 0}
+
+        try:
+            os.mkdir(flash_dir)
+        except OSError:
+            pass
+        try:
+            names = os.listdir(flash_dir)
+        except OSError:
+            names = []
+        self._on_flash = set(name[:-4] for name in names if name.endswith(".bin"))
+
+    def key_for(self, product):
+        """Thumbnail digest for this tile size, or None"""
+        thumb = product.thumb
+        return thumb.get(self.size) if thumb else None
+
+    def get(self, digest, load=True):
+        """Decoded image if it is in RAM; otherwise None, queueing it if `load`"""
+        entry = self._ram.get(digest)
+        if entry is not None:
+            self._clock += 1
+            entry[2] = self._clock
+            self.stats["hits"] += 1
+            return entry[0]
+
+        if load:
+            self.stats["misses"] += 1
+            if digest not in self._decode:
+                self._decode.append(digest)
+        return None
+
+    def prefetch(self, digests):
+        """Queue downloads of thumbnails not yet on flash"""
+        for digest in digests:
+            if digest not in self._on_flash and digest not in self._download:
+                self._download.append(digest)
+
+    def pending(self):
+        return bool(self._decode or self._download)
+
+    def idle_step(self):
+        """Do one unit of background work; returns True if any was done"""
+        while self._decode:
+            digest = self._decode.pop(0)
+            if digest in self._ram:
+                continue
+            if digest not in self._on_flash:
+                # Fetch now, decode on the next idle step
+                if self._fetch(digest):
+                    self._decode.insert(0, digest)
+                return True
+            dsc = self._load(digest)
+            if dsc is not None and self.on_ready:
+                self.on_ready(digest, dsc)
+            return True
+
+        while self._download:
+            digest = self._download.pop(0)
+            if digest not in self._on_flash:
+                self._fetch(digest)
+                return True
+        return False
+
+    def prune(self, keep):
+        """Delete flash files not referenced by the current catalog"""
+        for digest in list(self._on_flash):
+            if digest not in keep:
+                try:
+                    os.remove(f"{self.flash_dir}/{digest}.bin")
+                except OSError:
+                    pass
+                self._on_flash.discard(digest)
+
+    def shrink(self, max_items):
+        """Lower the RAM budget (e.g. when the heap runs low)"""
+        self.max_items = max_items
+        self._evict()
+
+    def _load(self, digest):
+        import lvgl as lv
+        try:
+            with open(f"{self.flash_dir}/{digest}.bin", "rb") as f:
+                header = f.read(HEADER_SIZE)
+                data = f.read()
+            if len(header) < HEADER_SIZE:
+                raise ValueError("truncated header")
+            magic, cf, flags, w, h, stride, _ = struct.unpack("<BBHHHHH", header)
+        except (OSError, ValueError) as e:
+            # Unreadable or corrupt: fetched again when next wanted
+            print(f"[POS] Thumbnail {digest} unreadable: {e}")
+            self._on_flash.discard(digest)
+            self.stats["errors"] += 1
+            return None
+
+        dsc = lv.image_dsc_t({
+            "header": {"magic": magic, "cf": cf, "flags": flags, "w": w, "h": h, "stride": stride},
+            "data_size": len(data),
+            "data": data,
+        })
+
+        self._clock += 1
+        # Pixel data stays referenced here for as long as LVGL may draw it
+        self._ram[digest] = [dsc, data, self._clock]
+        self.stats["loads"] += 1
+        self._evict()
+        return dsc
+
+    def _evict(self):
+        while len(self._ram) > self.max_items:
+            oldest = None
+            for digest, entry in self._ram.items():
+                if digest in self.pinned:
+                    continue
+                if oldest is None or entry[2] < self._ram[oldest][2]:
+                    oldest = digest
+            if oldest is None:
+                return
+            if self.on_evict:
+                self.on_evict(oldest)
+            del self._ram[oldest]
+            self.stats["evictions"] += 1
+
+    def _fetch(self, digest):
+        if not (self.http and self.base_url):
+            return False
+        try:
+            response = self.http.get(f"{self.base_url}/api/thumbs/{digest}.bin")
+            ok = response.status_code == 200
+            data = response.content if ok else None
+            response.close()
+        except Exception as e:
+            print(f"[POS] Thumbnail {digest} download failed: {e}")
+            ok = False
+
+        if ok and hashlib and hasattr(hashlib, "sha1"):
+            ok = binascii.hexlify(hashlib.sha1(data).digest()).decode() == digest
+        if not ok:
+            self.stats["errors"] += 1
+            return False
+
+        # Write then rename so a power cut never leaves a partial file
+        tmp = f"{self.flash_dir}/{digest}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.rename(tmp, f"{self.flash_dir}/{digest}.bin")
+        except OSError as e:
+            print(f"[POS] Saving thumbnail {digest} failed: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            self._on_flash.discard(digest)
+            self.stats["errors"] += 1
+            return False
+        self._on_flash.add(digest)
+        self.stats["downloads"] += 1
+        return True